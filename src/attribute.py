@@ -5,8 +5,8 @@ from enum import Enum
 
 from .config_errors import ConfigAttributeError, ConfigExcludedAttributeError, ConfigApiException
 from .thread_state import thread_local
-from .envs import MC_NO_ENV
-from .values import MC_TODO
+from .envs import MC_NO_ENV, _McEnvSet
+from .values import MC_NO_VALUE, MC_TODO
 
 
 class Where(Enum):
@@ -20,19 +20,117 @@ class Where(Enum):
     FROZEN = 7
 
 
+_MC_UNSET = object()
+
+# Looking up an Enum member through the Enum class is slow, this is used when reading attributes
+_WHERE_FROZEN = Where.FROZEN
+
+
+class _McEnvValues():
+    """Mapping env -> value of an attribute.
+
+    The values are stored in a list indexed by `Env.index`, which takes one reference per env instead of a hash table entry per env, and
+    lookup is a list index. Index 0 is reserved (see `EnvFactory`), it is used by `MC_NO_ENV` and env sets, for which there are never
+    values stored.
+
+    Setting the value for an env never changes the lookup of the other envs, also not while it is being done, as the values of loaded envs
+    may be read from other threads while other envs are loaded (see `warm_up`).
+    """
+
+    __slots__ = ('indexed',)
+
+    def __init__(self):
+        self.indexed = [_MC_UNSET]
+
+    def __getitem__(self, env):
+        try:
+            val = self.indexed[env.index]
+        except IndexError:
+            raise KeyError(env) from None
+        if val is _MC_UNSET:
+            raise KeyError(env)
+        return val
+
+    def get(self, env, default=None):
+        try:
+            val = self.indexed[env.index]
+        except IndexError:
+            return default
+        return default if val is _MC_UNSET else val
+
+    def __contains__(self, env):
+        return self.get(env, _MC_UNSET) is not _MC_UNSET
+
+    def __setitem__(self, env, value):
+        indexed = self.indexed
+        if env.index >= len(indexed):
+            indexed.extend([_MC_UNSET] * (env.index + 1 - len(indexed)))
+        indexed[env.index] = value
+
+    def __bool__(self):
+        return any(val is not _MC_UNSET for val in self.indexed)
+
+
 class _McAttribute():
     "Give property access to env specific values"
-    __slots__ = ('env_values', 'where_from', 'from_eg')
+    __slots__ = ('env_values', 'where_from', 'from_eg', 'env_states')
 
     def __init__(self):
-        self.env_values = {}
+        self.env_values = _McEnvValues()
         self.where_from = Where.NOWHERE
+        self.env_states = None
 
     def set(self, env, value, where_from, from_eg):
         self.env_values[env] = value
         self.where_from = where_from
         self.from_eg = from_eg
 
+    def activate_env_state(self, env):
+        """Restore 'where_from' and 'from_eg' saved for env by 'save_env_state' (only used when loading with 'single_pass')"""
+        if self.env_states:
+            state = self.env_states.get(env)
+            if state:
+                self.where_from, self.from_eg = state
+
+    def save_env_state(self, env):
+        if self.env_states is None:
+            self.env_states = {}
+        self.env_states[env] = (self.where_from, getattr(self, 'from_eg', None))
+
+    def freeze_env_states(self, envs):
+        """Mark the value as used for all envs"""
+        self.where_from = Where.FROZEN
+        if self.env_states is None:
+            self.env_states = {}
+        from_eg = getattr(self, 'from_eg', None)
+        for env in envs:
+            state = self.env_states.get(env)
+            self.env_states[env] = (Where.FROZEN, state[1] if state else from_eg)
+
+
+def _mc_env_set_value(obj, attr_name, env_set):
+    """Get the value of an attribute when the current env is an env set (loading with 'single_pass').
+
+    This is only possible if the attribute has the same value for all envs in the set.
+    """
+
+    mc_attribute = obj._mc_attributes[attr_name]
+    env_values = mc_attribute.env_values
+    envs = iter(env_set.envs)
+    val = env_values.get(next(envs), MC_NO_VALUE)
+    for env in envs:
+        env_val = env_values.get(env, MC_NO_VALUE)
+        if env_val is not val and env_val != val:
+            msg = "Trying to access attribute '{attr_name}' which has env specific values while loading with 'single_pass' for {env_set}. " \
+                "The config must not depend on env specific values when loading with 'single_pass'."
+            raise ConfigApiException(msg.format(attr_name=attr_name, env_set=env_set)) from None
+
+    if val is MC_NO_VALUE:
+        raise KeyError(attr_name)
+
+    mc_attribute.freeze_env_states(env_set.envs)
+    return val
+
 
 class _McAttributeAccessor():
     __slots__ = ('attr_name', 'attr')
@@ -41,31 +139,68 @@ class _McAttributeAccessor():
         self.attr_name = attr_name
 
     def __get__(self, obj, objtype):
-        if not obj:
-            if obj is None:
-                return self
+        if obj is None:
+            return self
+        return obj._mc_root._mc_getattr_impl(self, obj)
+
+    def _mc_get_sealed(self, obj):
+        """Read only lookup with `_McEnvValues.__getitem__` inlined, used for sealed configurations, see `McConfigRoot.seal`.
 
+        Errors are reported by the full lookup.
+        """
+        current_env = thread_local.env
+        if obj._mc_handled_env_bits & current_env.mask:
+            mc_attribute = obj._mc_attributes.get(self.attr_name)
+            if mc_attribute is not None:
+                indexed = mc_attribute.env_values.indexed
+                if current_env.index < len(indexed):
+                    val = indexed[current_env.index]
+                    if val is not _MC_UNSET:
+                        return val
+        return self._mc_get(obj)
+
+    def _mc_get_warming_up(self, obj):
+        """Used while the remaining envs are loaded in the background (see `warm_up`).
+
+        Reading a value of a loaded env does not mark it as used, as the values of loaded envs are read from other threads.
+        """
+        return self._mc_get(obj, thread_local.env not in obj._mc_root._mc_root_proxies)
+
+    def _mc_get(self, obj, mark_used=True):
+        if not obj:
             cr = obj._mc_root
             current_env = thread_local.env
             if cr._mc_config_loaded:
                 raise ConfigExcludedAttributeError(obj, self.attr_name, current_env)
 
-        cr = obj._mc_root
         current_env = thread_local.env
 
         try:
             mc_attribute = obj._mc_attributes[self.attr_name]
-            val = mc_attribute.env_values[current_env]
-            if not cr._mc_in_json:
-                mc_attribute.where_from = Where.FROZEN
+            # `_McEnvValues.__getitem__` inlined
+            val = mc_attribute.env_values.indexed[current_env.index]
+            if val is _MC_UNSET:
+                raise KeyError(self.attr_name)
+            if not thread_local.in_json:
+                if mark_used:
+                    mc_attribute.where_from = _WHERE_FROZEN
                 if val == MC_TODO:
                     raise ConfigAttributeError(obj, self.attr_name, 'Trying got get {}.'.format(MC_TODO.name))
             return val
-        except KeyError as ex:
+        except (KeyError, IndexError):
+            if isinstance(current_env, _McEnvSet):
+                try:
+                    val = _mc_env_set_value(obj, self.attr_name, current_env)
+                    if val == MC_TODO:
+                        raise ConfigAttributeError(obj, self.attr_name, 'Trying got get {}.'.format(MC_TODO.name))
+                    return val
+                except KeyError:
+                    pass
+
             # mc attribute does not exist for current instance or current env
             if current_env is MC_NO_ENV:
                 msg = "Trying to access attribute '{attr_name}'. "
-                if cr._mc_in_post_validate:
+                if obj._mc_root._mc_in_post_validate:
                     msg += "Item.attribute access is not allowed in 'mc_post_validate' as there is no current env. "
                 else:
                     msg += "Item.attribute access is not allowed when config is instantiated with 'MC_NO_ENV'. "
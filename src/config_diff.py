@@ -0,0 +1,274 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Compare two loaded configurations, or one configuration for two envs, without creating json.
+
+The item trees are walked in parallel and the env specific attribute values, the repeatable keys and the envs in which each item exists
+are compared directly. The differences are yielded as `ConfigChange` records while walking, so nothing is materialized.
+
+Items are identified by their path from the root, e.g. "Root.ritems['a']". References to items in attribute values are compared by path,
+so two configurations loaded from different versions of the config modules can be compared. Envs are matched by name.
+"""
+
+from enum import Enum
+
+from .envs import BaseEnv
+from .values import MC_NO_VALUE
+from .config_errors import ConfigApiException
+from . import multiconf as _mc
+
+
+class Change(Enum):
+    ADDED = 1
+    REMOVED = 2
+    CHANGED = 3
+
+
+def _value_repr(value):
+    if issubclass(type(value), _mc._ItemParentProxy):
+        value = value._mc_proxied_item
+    if isinstance(value, _mc._ConfigBase):
+        # Don't create the json repr of items
+        return '<{}>'.format(type(value).__qualname__)
+    return repr(value)
+
+
+class ConfigChange():
+    """A single difference.
+
+    Attributes:
+        kind (Change): ADDED/REMOVED means that the item or attribute only exists in the new/old configuration or env.
+            CHANGED means that the attribute value or the item class differs.
+        path (str): Path of the item from the root, '' for the root.
+        attr_name (str): Name of the attribute, None if the change is for the item itself.
+        env (Env): The env for which the item or attribute differs (of the old configuration, or of the new if the env was added).
+            None when comparing envs of the same configuration.
+        old: The old value or item class (MC_NO_VALUE if the attribute was added).
+        new: The new value or item class (MC_NO_VALUE if the attribute was removed).
+    """
+
+    __slots__ = ('kind', 'path', 'attr_name', 'env', 'old', 'new')
+
+    def __init__(self, kind, path, attr_name, env, old=MC_NO_VALUE, new=MC_NO_VALUE):
+        self.kind = kind
+        self.path = path
+        self.attr_name = attr_name
+        self.env = env
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        where = self.path if self.attr_name is None else (self.path + '.' + self.attr_name if self.path else self.attr_name)
+        msg = "{kind} {where}".format(kind=self.kind.name.lower(), where=where or '<root>')
+        if self.env is not None:
+            msg += " for " + repr(self.env)
+        if self.kind is Change.CHANGED:
+            msg += ": {old} -> {new}".format(old=_value_repr(self.old), new=_value_repr(self.new))
+        return msg
+
+    __str__ = __repr__
+
+
+def _child_items(item):
+    """Return dict: path step -> nested item, for all items contained in 'item', including excluded items, items created by builders and
+    items from the 'with' block of builders (the proxied item), but not builders and DefaultItems. This is the containment shown by json.
+    """
+
+    children = {}
+    for key, kind, val in _mc._mc_child_entries(item):
+        if key[0] == '_' or kind is _mc._ChildKind.VALUE:
+            continue
+
+        if kind is _mc._ChildKind.REPEATABLE:
+            for mc_key, ritem in val.all_items.items():
+                if issubclass(type(ritem), _mc._ItemParentProxy):
+                    ritem = ritem._mc_proxied_item
+                if issubclass(type(ritem), _mc._RealConfigItemMixin):
+                    children['{key}[{mc_key!r}]'.format(key=key, mc_key=mc_key)] = ritem
+            continue
+
+        if kind is _mc._ChildKind.PROXY:
+            val = val._mc_proxied_item
+        if issubclass(type(val), _mc._RealConfigItemMixin):
+            children[key] = val
+    return children
+
+
+def _join(path, step):
+    return path + '.' + step if path and not step.startswith('[') else path + step
+
+
+class _Differ():
+    def __init__(self, root_a, root_b, env_pairs):
+        self.root_a = root_a
+        self.root_b = root_b
+        self.env_pairs = env_pairs
+        self.paths = {}  # id(root) -> {id(item): path}
+
+    def _item_paths(self, root):
+        paths = self.paths.get(id(root))
+        if paths is None:
+            paths = self.paths[id(root)] = {}
+            todo = [(root, '')]
+            while todo:
+                item, path = todo.pop()
+                paths[id(item)] = path
+                todo.extend((child, _join(path, step)) for step, child in _child_items(item).items())
+        return paths
+
+    def _ref_path(self, item, root):
+        if issubclass(type(item), _mc._ItemParentProxy):
+            item = item._mc_proxied_item
+        return self._item_paths(root).get(id(item))
+
+    def _equal(self, val_a, val_b):
+        typ_a = type(val_a)
+        if issubclass(typ_a, (_mc._ConfigBase, _mc._ItemParentProxy)):
+            if not issubclass(type(val_b), (_mc._ConfigBase, _mc._ItemParentProxy)):
+                return False
+            if self.root_a is self.root_b and val_a is val_b:
+                return True
+            path_a = self._ref_path(val_a, self.root_a)
+            return path_a is not None and path_a == self._ref_path(val_b, self.root_b)
+
+        if typ_a is not type(val_b):
+            return False
+
+        if issubclass(typ_a, (list, tuple)):
+            return len(val_a) == len(val_b) and all(self._equal(aa, bb) for aa, bb in zip(val_a, val_b))
+
+        if issubclass(typ_a, dict):
+            return val_a.keys() == val_b.keys() and all(self._equal(val, val_b[key]) for key, val in val_a.items())
+
+        if issubclass(typ_a, BaseEnv):
+            return val_a.name == val_b.name
+
+        try:
+            return bool(val_a == val_b)
+        except Exception:  # pylint: disable=broad-except
+            return val_a is val_b
+
+    def _diff_attributes(self, item_a, item_b, path, env_a, env_b, change_env):
+        attributes_a = item_a._mc_attributes
+        attributes_b = item_b._mc_attributes
+
+        for attr_name, mc_attr in attributes_a.items():
+            val_a = mc_attr.env_values.get(env_a, MC_NO_VALUE)
+            mc_attr_b = attributes_b.get(attr_name)
+            val_b = mc_attr_b.env_values.get(env_b, MC_NO_VALUE) if mc_attr_b is not None else MC_NO_VALUE
+
+            if val_a is MC_NO_VALUE:
+                if val_b is not MC_NO_VALUE:
+                    yield ConfigChange(Change.ADDED, path, attr_name, change_env, new=val_b)
+            elif val_b is MC_NO_VALUE:
+                yield ConfigChange(Change.REMOVED, path, attr_name, change_env, old=val_a)
+            elif not self._equal(val_a, val_b):
+                yield ConfigChange(Change.CHANGED, path, attr_name, change_env, val_a, val_b)
+
+        for attr_name, mc_attr_b in attributes_b.items():
+            if attr_name not in attributes_a:
+                val_b = mc_attr_b.env_values.get(env_b, MC_NO_VALUE)
+                if val_b is not MC_NO_VALUE:
+                    yield ConfigChange(Change.ADDED, path, attr_name, change_env, new=val_b)
+
+    def _diff_item(self, item_a, item_b, path, env_pairs):
+        cls_a = type(item_a)
+        cls_b = type(item_b)
+        if (cls_a.__module__, cls_a.__qualname__) != (cls_b.__module__, cls_b.__qualname__):
+            yield ConfigChange(Change.CHANGED, path, None, None, cls_a, cls_b)
+
+        in_both = []
+        for env_a, env_b, change_env in env_pairs:
+            in_a = item_a._mc_handled_env_bits & env_a.mask
+            in_b = item_b._mc_handled_env_bits & env_b.mask
+            if in_a and in_b:
+                in_both.append((env_a, env_b, change_env))
+                yield from self._diff_attributes(item_a, item_b, path, env_a, env_b, change_env)
+            elif in_a:
+                yield ConfigChange(Change.REMOVED, path, None, change_env)
+            elif in_b:
+                yield ConfigChange(Change.ADDED, path, None, change_env)
+
+        if not in_both:
+            return
+
+        children_a = _child_items(item_a)
+        children_b = _child_items(item_b) if item_b is not item_a else children_a
+        for step, child_a in children_a.items():
+            child_path = _join(path, step)
+            child_b = children_b.get(step)
+            if child_b is not None:
+                yield from self._diff_item(child_a, child_b, child_path, in_both)
+                continue
+
+            for env_a, _, change_env in in_both:
+                if child_a._mc_handled_env_bits & env_a.mask:
+                    yield ConfigChange(Change.REMOVED, child_path, None, change_env)
+
+        for step, child_b in children_b.items():
+            if step not in children_a:
+                for _, env_b, change_env in in_both:
+                    if child_b._mc_handled_env_bits & env_b.mask:
+                        yield ConfigChange(Change.ADDED, _join(path, step), None, change_env)
+
+    def diff(self):
+        yield from self._diff_item(self.root_a, self.root_b, '', self.env_pairs)
+
+
+def _check_loaded(config):
+    if not config._mc_config_loaded or config._mc_lazy_load:
+        raise ConfigApiException("Only a configuration which is loaded for all envs (without 'lazy_load') can be compared.")
+
+
+def _diff_configs(config_a, config_b):
+    envs_a = config_a._mc_env_factory.envs
+    envs_b = config_b._mc_env_factory.envs
+
+    env_pairs = []
+    for env_name, env_a in envs_a.items():
+        env_b = envs_b.get(env_name)
+        if env_b is None:
+            yield ConfigChange(Change.REMOVED, '', None, env_a)
+            continue
+        env_pairs.append((env_a, env_b, env_a))
+
+    yield from _Differ(config_a, config_b, env_pairs).diff()
+
+    for env_name, env_b in envs_b.items():
+        if env_name not in envs_a:
+            yield ConfigChange(Change.ADDED, '', None, env_b)
+
+
+def diff_configs(config_a, config_b):
+    """Compare two loaded configurations, e.g. loaded from two versions of the config modules.
+
+    Arguments:
+        config_a (McConfigRoot): The old configuration.
+        config_b (McConfigRoot): The new configuration.
+
+    Return (iterator of ConfigChange): The differences, per env. An env which only exists in one of the configurations gives a single ADDED or
+        REMOVED change for the root.
+    """
+
+    _check_loaded(config_a)
+    _check_loaded(config_b)
+    return _diff_configs(config_a, config_b)
+
+
+def diff_envs(config, env_a, env_b):
+    """Compare a loaded configuration for two envs.
+
+    Arguments:
+        config (McConfigRoot): The configuration.
+        env_a (Env): The env considered 'old'.
+        env_b (Env): The env considered 'new'.
+
+    Return (iterator of ConfigChange): The differences, with `env` None.
+    """
+
+    _check_loaded(config)
+    for env in env_a, env_b:
+        if env.factory != config._mc_env_factory:
+            raise ConfigApiException("The env {} must be from the 'env_factory' specified for 'mc_config'.".format(env))
+
+    return _Differ(config, config, [(env_a, env_b, None)]).diff()
@@ -0,0 +1,660 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Save a loaded configuration as a flat, read-only image file which can be memory mapped and shared by many processes.
+
+The image consists of a header followed by sections of little endian unsigned 32 bit records:
+
+strings:
+    Offsets into the string blob, followed by the blob. Holds env names, attribute and item names and class names.
+
+envs:
+    Per env: name, config function result value, TODO messages value.
+
+items:
+    Per item: parent item, class name, name, flags, first member, number of members.
+    The root item is item 0, and each item is followed by its children in depth first order.
+
+exists:
+    Per item a bitmap with one bit per env, set if the item exists in the env.
+
+members:
+    Per member of an item (attribute, child item, repeatable or private value): name, kind, target.
+
+slots:
+    Per attribute one value offset per env, `_MISSING` if the attribute has no value in the env.
+
+repeatables, repeatable entries:
+    Per repeatable: first entry, number of entries. Per entry: key value offset, item.
+
+values:
+    Tagged value records. Identical values are only stored once. Values which are not None, bool, int, float or str are pickled,
+    with references to items pickled as item numbers.
+
+`ConfigImage` gives read-only access to the image with the same attribute, child item and RepeatableDict semantics as the loaded config,
+but without copying the values into each process.
+"""
+
+import os
+import sys
+import io
+import mmap
+import types
+import struct
+import pickle
+import importlib
+from array import array
+from collections.abc import Mapping
+from typing import Any
+
+from .values import MC_TODO
+from .attribute import _McAttributeAccessor
+from .property_wrapper import _McPropertyWrapper
+from .repeatable import RepeatableDict
+from .config_errors import ConfigException, ConfigApiException, ConfigAttributeError, ConfigExcludedAttributeError, ConfigExcludedKeyError
+from .config_errors import _line_msg
+from . import multiconf as _mc
+
+
+_MAGIC = b'MCIMAGE\n'
+_VERSION = 1
+_NUM_SECTIONS = 10
+_HEADER = struct.Struct('<8sIIII{}I'.format(_NUM_SECTIONS))
+
+_MISSING = 0xffffffff
+_NO_PARENT = 0xffffffff
+
+# Record sizes in 32 bit words
+_ENV_REC = 3
+_ITEM_REC = 6
+_MEMBER_REC = 3
+_REPEATABLE_REC = 2
+_RENTRY_REC = 2
+
+# Item flags
+_NOT_CONFIG_ITEM = 1  # Builders and DefaultItems
+_DEFAULT_VALUE_ITEM = 2
+
+# Member kinds
+_ATTR = 0
+_ITEM = 1
+_REPEATABLE = 2
+_VALUE = 3
+
+# Value tags
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_FLOAT = 4
+_TAG_STR = 5
+_TAG_ITEM = 6
+_TAG_PICKLE = 7
+
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+_U32 = struct.Struct('<I')
+
+
+class _ImagePickler(pickle.Pickler):
+    def __init__(self, file, writer):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.writer = writer
+
+    def persistent_id(self, obj):
+        if issubclass(type(obj), (_mc._ConfigBase, _mc._ItemParentProxy)):
+            return self.writer.ref(obj)
+        return None
+
+
+class _ImageUnpickler(pickle.Unpickler):
+    def __init__(self, file, image, env_index):
+        super().__init__(file)
+        self.image = image
+        self.env_index = env_index
+
+    def persistent_load(self, pid):
+        return _ImageItem(self.image, pid, self.env_index, None)
+
+
+def _u32_bytes(values):
+    arr = array('I', values)
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+class _ImageWriter():
+    def __init__(self, root):
+        self.root = root
+        self.envs = list(root._mc_env_factory.envs.values())
+        self.strings = {}
+        self.items = []
+        self.item_index = {}  # id(item) -> item number
+        self.values = bytearray()
+        self.value_offsets = {}  # encoded value -> offset
+
+    def string(self, ss):
+        try:
+            return self.strings[ss]
+        except KeyError:
+            index = self.strings[ss] = len(self.strings)
+            return index
+
+    def _assign_indexes(self, item):
+        self.item_index[id(item)] = len(self.items)
+        self.items.append(item)
+        for _, kind, val in _mc._mc_child_entries(item):
+            if kind is _mc._ChildKind.REPEATABLE:
+                for ritem in val.all_items.values():
+                    if not issubclass(type(ritem), _mc._ItemParentProxy):
+                        self._assign_indexes(ritem)
+            elif kind is _mc._ChildKind.ITEM and val._mc_contained_in is item:
+                self._assign_indexes(val)
+
+    def ref(self, obj):
+        if issubclass(type(obj), _mc._ItemParentProxy):
+            obj = obj._mc_proxied_item
+
+        try:
+            return self.item_index[id(obj)]
+        except KeyError:
+            raise ConfigApiException("Cannot save reference to item {item} which is not part of the configuration.".format(item=obj._mc_excl_repr())) from None
+
+    def _encode(self, val):
+        typ = type(val)
+        if val is None:
+            return bytes((_TAG_NONE,))
+        if typ is bool:
+            return bytes((_TAG_TRUE if val else _TAG_FALSE,))
+        if typ is int and -2**63 <= val < 2**63:
+            return bytes((_TAG_INT,)) + _INT.pack(val)
+        if typ is float:
+            return bytes((_TAG_FLOAT,)) + _FLOAT.pack(val)
+        if typ is str:
+            data = val.encode('utf-8', 'surrogatepass')
+            return bytes((_TAG_STR,)) + _U32.pack(len(data)) + data
+        if issubclass(typ, (_mc._ConfigBase, _mc._ItemParentProxy)):
+            return bytes((_TAG_ITEM,)) + _U32.pack(self.ref(val))
+
+        ff = io.BytesIO()
+        _ImagePickler(ff, self).dump(val)
+        data = ff.getvalue()
+        return bytes((_TAG_PICKLE,)) + _U32.pack(len(data)) + data
+
+    def value(self, val):
+        """Return offset of the value record for 'val'."""
+        encoded = self._encode(val)
+        try:
+            return self.value_offsets[encoded]
+        except KeyError:
+            offset = self.value_offsets[encoded] = len(self.values)
+            self.values += encoded
+            return offset
+
+    def _class_name(self, item):
+        cls = type(item)
+        return self.string(cls.__module__ + ':' + cls.__qualname__)
+
+    def write(self):
+        root = self.root
+        envs = self.envs
+        self._assign_indexes(root)
+
+        env_recs = []
+        for env in envs:
+            env_recs.extend((self.string(env.name), self.value(root._mc_config_result.get(env)), self.value(root._mc_todo_msgs[env])))
+
+        item_recs = []
+        exists = bytearray()
+        bitmap_size = (len(envs) + 7) // 8
+        member_recs = []
+        slot_recs = []
+        repeatable_recs = []
+        rentry_recs = []
+
+        for item in self.items:
+            first_member = len(member_recs) // _MEMBER_REC
+            for name, mc_attr in item._mc_attributes.items():
+                env_values = mc_attr.env_values
+                member_recs.extend((self.string(name), _ATTR, len(slot_recs) // len(envs)))
+                slot_recs.extend(self.value(env_values[env]) if env in env_values else _MISSING for env in envs)
+
+            for key, kind, val in _mc._mc_child_entries(item):
+                if kind is _mc._ChildKind.REPEATABLE:
+                    all_items = val.all_items
+                    member_recs.extend((self.string(key), _REPEATABLE, len(repeatable_recs) // _REPEATABLE_REC))
+                    repeatable_recs.extend((len(rentry_recs) // _RENTRY_REC, len(all_items)))
+                    for mc_key, ritem in all_items.items():
+                        rentry_recs.extend((self.value(mc_key), self.ref(ritem)))
+                elif kind is _mc._ChildKind.VALUE:
+                    member_recs.extend((self.string(key), _VALUE, self.value(val)))
+                else:
+                    member_recs.extend((self.string(key), _ITEM, self.ref(val)))
+
+            contained_in = item._mc_contained_in
+            flags = (0 if isinstance(item, _mc.ConfigItem) else _NOT_CONFIG_ITEM) | (_DEFAULT_VALUE_ITEM if item._mc_is_default_value_item else 0)
+            item_recs.extend((
+                self.item_index[id(contained_in)] if contained_in is not None else _NO_PARENT, self._class_name(item), self.string(item.named_as()),
+                flags, first_member, len(member_recs) // _MEMBER_REC - first_member))
+
+            bitmap = bytearray(bitmap_size)
+            for env_index, env in enumerate(envs):
+                if item._mc_handled_env_bits & env.mask:
+                    bitmap[env_index // 8] |= 1 << (env_index % 8)
+            exists += bitmap
+
+        strings = [ss.encode('utf-8', 'surrogatepass') for ss in self.strings]
+        string_offsets = [0]
+        for ss in strings:
+            string_offsets.append(string_offsets[-1] + len(ss))
+
+        sections = [
+            _u32_bytes(string_offsets), b''.join(strings), _u32_bytes(env_recs), _u32_bytes(item_recs), bytes(exists),
+            _u32_bytes(member_recs), _u32_bytes(slot_recs), _u32_bytes(repeatable_recs), _u32_bytes(rentry_recs), bytes(self.values)]
+
+        data = bytearray(_HEADER.size)
+        offsets = []
+        for section in sections:
+            data += bytes(-len(data) % 8)
+            offsets.append(len(data))
+            data += section
+
+        if len(data) >= 2**32:
+            raise ConfigApiException("Configuration is too big to be saved as an image ({} bytes).".format(len(data)))
+
+        _HEADER.pack_into(data, 0, _MAGIC, _VERSION, len(envs), len(self.items), len(strings), *offsets)
+        return data
+
+
+def save_image(config, file_name):
+    """Save the loaded 'config' as a read-only image in 'file_name', see `ConfigImage`.
+
+    Attribute values and private attributes which are not None, bool, int, float or str must be picklable (references to items are handled).
+    The image is written to a temporary file which replaces 'file_name', so a `ConfigImage` which has the previous image open keeps reading
+    the previous image, and never sees a partially written file.
+    """
+
+    if not config._mc_config_loaded or config._mc_lazy_load:
+        raise ConfigApiException("Only a configuration which is loaded for all envs (without 'lazy_load') can be saved as an image.")
+
+    try:
+        data = _ImageWriter(config).write()
+    except (pickle.PicklingError, TypeError, AttributeError) as ex:
+        raise ConfigApiException("Cannot save image of configuration: {}".format(ex)) from ex
+
+    tmp_file_name = '{}.{}.tmp'.format(file_name, os.getpid())
+    with open(tmp_file_name, 'wb') as ff:
+        ff.write(data)
+    os.replace(tmp_file_name, file_name)
+
+
+class ConfigImage():
+    """Read-only configuration backed by an image file saved by `save_image`.
+
+    The file is memory mapped, so processes using the same image share the pages holding the values.
+    Calling the image with an env gives the root item for the env, with the same attribute, child item and RepeatableDict access as the
+    loaded configuration. Values which are not None, bool, int, float or str are unpickled on each access.
+
+    @property methods and other methods of item classes are called with the image item as 'self' if the item class can be imported.
+    Configurations can not be modified through the image.
+
+    Arguments:
+        file_name (str): The image file.
+        env_factory (EnvFactory): If specified, envs are returned as the Env objects from this factory, otherwise as env names.
+    """
+
+    def __init__(self, file_name, env_factory=None):
+        if sys.byteorder != 'little':
+            raise ConfigApiException("Configuration images can only be used on little endian platforms.")
+
+        with open(file_name, 'rb') as ff:
+            self._mc_mmap = mmap.mmap(ff.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mm = self._mc_mmap
+        if len(mm) < _HEADER.size:
+            raise ConfigApiException("Not a configuration image: '{}'.".format(file_name))
+
+        magic, version, num_envs, num_items, num_strings, *offsets = _HEADER.unpack_from(mm)
+        if magic != _MAGIC or version != _VERSION:
+            raise ConfigApiException("Not a configuration image, or unsupported image version: '{}'.".format(file_name))
+
+        (strings_off, blob_off, envs_off, items_off, exists_off, members_off, slots_off, repeatables_off, rentries_off, values_off) = offsets
+        view = memoryview(mm)
+
+        def u32_section(offset, num_records, rec_size):
+            return view[offset:offset + 4 * num_records * rec_size].cast('I')
+
+        string_offsets = u32_section(strings_off, num_strings + 1, 1)
+        self._mc_strings = [str(view[blob_off + string_offsets[ii]:blob_off + string_offsets[ii + 1]], 'utf-8', 'surrogatepass') for ii in range(num_strings)]
+        self._mc_string_index = {ss: index for index, ss in enumerate(self._mc_strings)}
+
+        self._mc_num_envs = num_envs
+        self._mc_env_recs = u32_section(envs_off, num_envs, _ENV_REC)
+        self._mc_items = u32_section(items_off, num_items, _ITEM_REC)
+        self._mc_bitmap_size = (num_envs + 7) // 8
+        self._mc_exists = view[exists_off:exists_off + num_items * self._mc_bitmap_size]
+        self._mc_members = u32_section(members_off, (slots_off - members_off) // 4, 1)
+        self._mc_slots = u32_section(slots_off, (repeatables_off - slots_off) // 4, 1)
+        self._mc_repeatables = u32_section(repeatables_off, (rentries_off - repeatables_off) // 4, 1)
+        self._mc_rentries = u32_section(rentries_off, (values_off - rentries_off) // 4, 1)
+        self._mc_values_off = values_off
+
+        env_names = [self._mc_strings[self._mc_env_recs[ii * _ENV_REC]] for ii in range(num_envs)]
+        self._mc_env_index = {name: index for index, name in enumerate(env_names)}
+        if env_factory is None:
+            self._mc_envs = env_names
+        else:
+            self._mc_envs = []
+            for name in env_names:
+                env = env_factory.envs.get(name)
+                if env is None:
+                    raise ConfigApiException("Env '{}' in configuration image '{}' is not defined in 'env_factory'.".format(name, file_name))
+                self._mc_envs.append(env)
+                self._mc_env_index[env] = self._mc_env_index[name]
+
+        self._mc_classes = {}  # class name string number -> class or None
+        self._mc_repeatable_keys = {}  # repeatable number -> {key: item number}
+
+    @property
+    def envs(self):
+        """Return (list): The envs in the image, as Env objects or names, see `ConfigImage`."""
+        return list(self._mc_envs)
+
+    def _mc_get_env_index(self, env):
+        try:
+            return self._mc_env_index[env]
+        except (KeyError, TypeError):
+            raise ConfigException("The selected env {} is not in the configuration image.".format(env)) from None
+
+    def __call__(self, env, allow_todo=False):
+        """Get the configuration for the specified env.
+
+        Arguments:
+            env (Env or str): The environment for which to retrieve the config.
+            allow_todo (bool): If true, then retrieving a configuration for an env which contains `MC_TODO` values will not raise an error.
+
+        Return (root item): The root of the configuration for env.
+        """
+
+        env_index = self._mc_get_env_index(env)
+        if not allow_todo:
+            todo_msgs = self._mc_value(self._mc_env_recs[env_index * _ENV_REC + 2], env_index)
+            if todo_msgs:
+                for msg, fname, line in todo_msgs:
+                    print(_line_msg(file_name=fname, line_num=line), file=sys.stderr)
+                    print(msg, file=sys.stderr)
+                raise ConfigException("Trying to get invalid configuration containing MC_TODO")
+
+        return _ImageRoot(self, 0, env_index, None)
+
+    def _mc_item_exists(self, index, env_index):
+        return self._mc_exists[index * self._mc_bitmap_size + env_index // 8] >> (env_index % 8) & 1
+
+    def _mc_member(self, index, name):
+        """Return (kind, target) of the member 'name' of item 'index' or None."""
+        name_index = self._mc_string_index.get(name)
+        if name_index is None:
+            return None
+
+        members = self._mc_members
+        first = self._mc_items[index * _ITEM_REC + 4]
+        for member in range(first * _MEMBER_REC, (first + self._mc_items[index * _ITEM_REC + 5]) * _MEMBER_REC, _MEMBER_REC):
+            if members[member] == name_index:
+                return members[member + 1], members[member + 2]
+        return None
+
+    def _mc_members_of(self, index):
+        """Yield (name, kind, target) for all members of item 'index'."""
+        members = self._mc_members
+        first = self._mc_items[index * _ITEM_REC + 4]
+        for member in range(first * _MEMBER_REC, (first + self._mc_items[index * _ITEM_REC + 5]) * _MEMBER_REC, _MEMBER_REC):
+            yield self._mc_strings[members[member]], members[member + 1], members[member + 2]
+
+    def _mc_value(self, offset, env_index):
+        mm = self._mc_mmap
+        offset += self._mc_values_off
+        tag = mm[offset]
+        if tag == _TAG_NONE:
+            return None
+        if tag == _TAG_FALSE:
+            return False
+        if tag == _TAG_TRUE:
+            return True
+        if tag == _TAG_INT:
+            return _INT.unpack_from(mm, offset + 1)[0]
+        if tag == _TAG_FLOAT:
+            return _FLOAT.unpack_from(mm, offset + 1)[0]
+        if tag == _TAG_ITEM:
+            return _ImageItem(self, _U32.unpack_from(mm, offset + 1)[0], env_index, None)
+
+        length = _U32.unpack_from(mm, offset + 1)[0]
+        data = mm[offset + 5:offset + 5 + length]
+        if tag == _TAG_STR:
+            return str(data, 'utf-8', 'surrogatepass')
+        return _ImageUnpickler(io.BytesIO(data), self, env_index).load()
+
+    def _mc_class(self, index):
+        """Return the item class of item 'index', or None if it cannot be imported."""
+        name_index = self._mc_items[index * _ITEM_REC + 1]
+        try:
+            return self._mc_classes[name_index]
+        except KeyError:
+            pass
+
+        module_name, qualname = self._mc_strings[name_index].split(':')
+        cls = None
+        if '<locals>' not in qualname:
+            try:
+                cls = sys.modules.get(module_name) or importlib.import_module(module_name)
+                for name in qualname.split('.'):
+                    cls = getattr(cls, name)
+            except (ImportError, AttributeError):
+                cls = None
+
+        self._mc_classes[name_index] = cls
+        return cls
+
+    def _mc_repeatable(self, index):
+        """Return dict: key -> item number for the entries of repeatable 'index'."""
+        try:
+            return self._mc_repeatable_keys[index]
+        except KeyError:
+            pass
+
+        first = self._mc_repeatables[index * _REPEATABLE_REC]
+        rentries = self._mc_rentries
+        entries = {}
+        for entry in range(first * _RENTRY_REC, (first + self._mc_repeatables[index * _REPEATABLE_REC + 1]) * _RENTRY_REC, _RENTRY_REC):
+            entries[self._mc_value(rentries[entry], None)] = rentries[entry + 1]
+        self._mc_repeatable_keys[index] = entries
+        return entries
+
+
+class _ImageItem():
+    """Read-only view of an item in a `ConfigImage` for a single env"""
+    __slots__ = ('_mc_image', '_mc_index', '_mc_env_index', '_mc_parent')
+
+    # Used by ConfigExcludedAttributeError
+    _mc_attributes: Mapping[str, Any] = types.MappingProxyType({})
+
+    def __init__(self, image, index, env_index, parent):
+        object.__setattr__(self, '_mc_image', image)
+        object.__setattr__(self, '_mc_index', index)
+        object.__setattr__(self, '_mc_env_index', env_index)
+        object.__setattr__(self, '_mc_parent', parent)
+
+    def __getattr__(self, name):
+        image = self._mc_image
+        env_index = self._mc_env_index
+        member = image._mc_member(self._mc_index, name)
+        if member is None:
+            return self._mc_class_attr(name)
+
+        kind, target = member
+        if kind == _ATTR:
+            if not self:
+                ex = ConfigExcludedAttributeError(self, name, self.env)
+                value_offset = image._mc_slots[target * image._mc_num_envs + env_index]
+                ex.value = image._mc_value(value_offset, env_index) if value_offset != _MISSING else None
+                raise ex
+
+            value_offset = image._mc_slots[target * image._mc_num_envs + env_index]
+            if value_offset == _MISSING:
+                # Not set for env, may be an overwritten @property
+                return self._mc_class_attr(name, is_attribute=True)
+            val = image._mc_value(value_offset, env_index)
+            if val is MC_TODO:
+                raise ConfigAttributeError(self, name, 'Trying got get {}.'.format(MC_TODO.name))
+            return val
+
+        if kind == _ITEM:
+            return _ImageItem(image, target, env_index, self)
+        if kind == _REPEATABLE:
+            return _ImageRepeatableDict(image, target, env_index, self)
+        return image._mc_value(target, env_index)
+
+    def _mc_class_attr(self, name, is_attribute=False):
+        """Get @property or method 'name' from the item class"""
+        cls = self._mc_image._mc_class(self._mc_index)
+        cls_attr = getattr(cls, name, None) if cls is not None and not name.startswith('_mc_') else None
+
+        if isinstance(cls_attr, _McPropertyWrapper):
+            cls_attr = cls_attr.prop
+        if isinstance(cls_attr, property):
+            return cls_attr.__get__(self, cls)
+        if isinstance(cls_attr, _McAttributeAccessor) or is_attribute:
+            if not self:
+                raise ConfigExcludedAttributeError(self, name, self.env)
+            raise ConfigAttributeError(self, name, '')
+        if isinstance(cls_attr, types.FunctionType) and not cls_attr.__module__.startswith(__package__ + '.'):
+            return types.MethodType(cls_attr, self)
+        if isinstance(cls_attr, types.MethodType) and cls_attr.__self__ is cls:
+            # classmethod
+            return cls_attr
+
+        raise AttributeError("{!r} object has no attribute {!r}".format(self._mc_class_name(), name))
+
+    def __setattr__(self, name, value):
+        raise ConfigApiException("Cannot set attribute '{}' on read-only configuration image item {}.".format(name, self._mc_class_name()))
+
+    def __bool__(self):
+        return bool(self._mc_image._mc_item_exists(self._mc_index, self._mc_env_index))
+
+    def __eq__(self, other):
+        return isinstance(other, _ImageItem) and self._mc_image is other._mc_image and self._mc_index == other._mc_index \
+            and self._mc_env_index == other._mc_env_index
+
+    def __hash__(self):
+        return hash((self._mc_index, self._mc_env_index))
+
+    def _mc_class_name(self):
+        return self._mc_image._mc_strings[self._mc_image._mc_items[self._mc_index * _ITEM_REC + 1]].replace(':', '.')
+
+    def _mc_excl_repr(self):
+        return "Excluded: <class '{}'>".format(self._mc_class_name())
+
+    def __repr__(self):
+        if self:
+            return "<image item '{}' of class '{}' for {}>".format(self.named_as(), self._mc_class_name(), self.env)
+        return self._mc_excl_repr()
+
+    def named_as(self):
+        return self._mc_image._mc_strings[self._mc_image._mc_items[self._mc_index * _ITEM_REC + 2]]
+
+    @property
+    def env(self):
+        return self._mc_image._mc_envs[self._mc_env_index]
+
+    @property
+    def contained_in(self):
+        if self._mc_parent is not None:
+            return self._mc_parent
+
+        parent = self._mc_image._mc_items[self._mc_index * _ITEM_REC]
+        if parent == _NO_PARENT:
+            return None
+        return _ImageItem(self._mc_image, parent, self._mc_env_index, None)
+
+    @property
+    def root_conf(self):
+        return _ImageRoot(self._mc_image, 0, self._mc_env_index, None)
+
+    @property
+    def mc_is_default_value_item(self):
+        return bool(self._mc_image._mc_items[self._mc_index * _ITEM_REC + 3] & _DEFAULT_VALUE_ITEM)
+
+    def getattr(self, attr_name, env):
+        """Get the value of 'attr_name' for 'env'"""
+        return getattr(_ImageItem(self._mc_image, self._mc_index, self._mc_image._mc_get_env_index(env), self._mc_parent), attr_name)
+
+    def items(self, with_excluded=False):
+        """Iterate all nested ConfigItems and RepeatableDicts, like `ConfigItem.items`.
+
+        Yields:
+            (key, item): The nested items.
+        """
+
+        image = self._mc_image
+        for name, kind, target in image._mc_members_of(self._mc_index):
+            if kind == _ITEM:
+                if image._mc_items[target * _ITEM_REC + 3] & _NOT_CONFIG_ITEM:
+                    continue
+                item = _ImageItem(image, target, self._mc_env_index, self)
+            elif kind == _REPEATABLE:
+                item = _ImageRepeatableDict(image, target, self._mc_env_index, self)
+            else:
+                continue
+
+            if item or with_excluded:
+                yield name, item
+
+
+class _ImageRoot(_ImageItem):
+    __slots__ = ()
+
+    @property
+    def mc_config_result(self):
+        image = self._mc_image
+        return image._mc_value(image._mc_env_recs[self._mc_env_index * _ENV_REC + 1], self._mc_env_index)
+
+
+class _ImageRepeatableItems(Mapping):
+    """Read-only mapping key -> item of all entries of a repeatable in a `ConfigImage`, the items are created on access"""
+    __slots__ = ('_mc_image', '_mc_entries', '_mc_env_index', '_mc_parent')
+
+    def __init__(self, image, index, env_index, parent):
+        self._mc_image = image
+        self._mc_entries = image._mc_repeatable(index)
+        self._mc_env_index = env_index
+        self._mc_parent = parent
+
+    def __getitem__(self, key):
+        return _ImageItem(self._mc_image, self._mc_entries[key], self._mc_env_index, self._mc_parent)
+
+    def __iter__(self):
+        return iter(self._mc_entries)
+
+    def __len__(self):
+        return len(self._mc_entries)
+
+
+class _ImageRepeatableDict(RepeatableDict):
+    """Read-only view of a RepeatableDict in a `ConfigImage` for a single env
+
+    The lookups and iteration are inherited from RepeatableDict, with 'all_items' holding the image items of all envs.
+    """
+    __slots__ = ()
+
+    def __init__(self, image, index, env_index, parent):  # pylint: disable=super-init-not-called
+        self._all_items = _ImageRepeatableItems(image, index, env_index, parent)
+        self._mc_env_index = None
+
+    def _mc_exists(self, key, val):
+        return bool(val)
+
+    def _mc_items(self):
+        return [(key, val) for key, val in self._all_items.items() if val]
+
+    def __repr__(self):
+        return repr(dict(self._mc_items()))
@@ -0,0 +1,141 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Re-import the Python modules a loaded configuration was loaded from when they change, and load a new configuration.
+
+The tracked modules are the module defining the config function and all user modules reachable from it through module globals, i.e. the
+modules defining item classes and helper functions creating items. Modules of the standard library, installed packages and multiconf itself
+are not tracked. Loading a configuration only records the time the load started. The tracked modules are found, and the modification time
+and size of their files recorded, when first checking for changes, where a module file modified after the load started is already changed.
+
+There is no incremental reload. Items are created by nested 'with' blocks executed by the config function for each env, and attribute values
+depend on enclosing items and the current env, so there is no smaller unit than the configuration which can be re-executed, and no part of
+the old configuration can be reused with the re-imported item classes. `McConfigRoot.reimport_and_load` re-imports the changed modules and
+the modules depending on them, and loads a new configuration for all envs from the re-imported config function, while an unchanged
+configuration is kept as is. The old configuration keeps the old item classes.
+"""
+
+import os
+import sys
+import sysconfig
+import importlib
+import types
+
+
+_MC_PACKAGE = __name__.split('.', maxsplit=1)[0]
+_NOT_USER_PATHS = tuple(sorted({os.path.join(sysconfig.get_paths()[name], '') for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')}))
+
+
+def _user_module(mod_name):
+    """Return the module 'mod_name' if it is a user module with a source file, otherwise None."""
+    mod = sys.modules.get(mod_name)
+    mod_file = getattr(mod, '__file__', None)
+    if not mod_file or not mod_file.endswith('.py') or mod_name.split('.', maxsplit=1)[0] == _MC_PACKAGE or mod_file.startswith(_NOT_USER_PATHS):
+        return None
+    return mod
+
+
+def _referenced_module_names(mod):
+    names = set()
+    for value in list(vars(mod).values()):
+        if isinstance(value, types.ModuleType):
+            names.add(value.__name__)
+            continue
+
+        mod_name = getattr(value, '__module__', None)
+        if isinstance(mod_name, str):
+            names.add(mod_name)
+    names.discard(mod.__name__)
+    return names
+
+
+def module_dependencies(conf_func_module_name):
+    """Return dict: module name -> set of names of the tracked modules it references, for all modules tracked for the config function."""
+    deps = {}
+    todo = [conf_func_module_name]
+    while todo:
+        mod_name = todo.pop()
+        if mod_name in deps:
+            continue
+
+        mod = _user_module(mod_name)
+        if mod is None:
+            continue
+
+        deps[mod_name] = _referenced_module_names(mod)
+        todo.extend(deps[mod_name])
+
+    for mod_name, refs in deps.items():
+        deps[mod_name] = refs.intersection(deps)
+    return deps
+
+
+def _stamp(mod_name):
+    try:
+        stat = os.stat(sys.modules[mod_name].__file__)
+    except (KeyError, OSError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def module_stamps(conf_func_module_name, changed_since_ns=None):
+    """Return dict: module name -> (file modification time, file size) for the modules tracked for the config function.
+
+    The stamp is None for a module modified at or after 'changed_since_ns' (see `time.time_ns`), so that it is reported as changed.
+    """
+    stamps = {}
+    for mod_name in module_dependencies(conf_func_module_name):
+        stamp = _stamp(mod_name)
+        stamps[mod_name] = None if stamp is None or (changed_since_ns is not None and stamp[0] >= changed_since_ns) else stamp
+    return stamps
+
+
+def changed_modules(stamps):
+    """Return list of names of the modules in 'stamps' which changed since the stamps were taken."""
+    return [mod_name for mod_name, stamp in stamps.items() if stamp is None or _stamp(mod_name) != stamp]
+
+
+def reloaded_function(func):
+    """Return the object with the qualified name of 'func' in the (reloaded) module of 'func', or None if 'func' is not defined at module level."""
+    obj = sys.modules.get(func.__module__)
+    for name in func.__qualname__.split('.'):
+        obj = getattr(obj, name, None)
+    return obj
+
+
+def reload_order(changed, deps):
+    """Return list of the names of the changed modules and the modules (transitively) depending on them, each after its dependencies."""
+    dependents = {mod_name: set() for mod_name in deps}
+    for mod_name, refs in deps.items():
+        for ref in refs:
+            dependents[ref].add(mod_name)
+
+    affected = set()
+    todo = list(changed)
+    while todo:
+        mod_name = todo.pop()
+        if mod_name not in affected:
+            affected.add(mod_name)
+            todo.extend(dependents.get(mod_name, ()))
+
+    order = []
+    visited = set()
+
+    def visit(mod_name):
+        if mod_name in visited:
+            return
+        visited.add(mod_name)
+        for ref in sorted(deps.get(mod_name, ())):
+            if ref in affected:
+                visit(ref)
+        order.append(mod_name)
+
+    for mod_name in sorted(affected):
+        visit(mod_name)
+    return order
+
+
+def reload_modules(mod_names):
+    importlib.invalidate_caches()
+    for mod_name in mod_names:
+        importlib.reload(sys.modules[mod_name])
@@ -0,0 +1,161 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Export an item tree for one env as plain nested dicts, for machine consumption.
+
+Unlike the json output there is no meta information, and @property methods are only called if requested.
+The attribute values are read directly from the env values of the attributes.
+
+An item is exported as a dict with its attribute values and nested items. A repeatable is exported as a dict of mc_key -> item dict.
+Excluded items, builders and DefaultItems are left out. An item referenced from an attribute value is exported as
+{'#ref': <path>}, where the path is relative to the exported item, e.g. "ritems['a']", or None if the item is not nested under the
+exported item. Other values are exported as they are, so the result may contain values which need to be converted by the consumer, e.g.
+envs or enums.
+
+Items from the 'with' block of a builder are exported through the proxy for their parent (as for json), so that @property methods see the
+parent as 'contained_in'. If a @property method raises an exception the value is {'#error': <exception repr>}, and the traceback is printed, or
+{'#invalid usage context': <exception repr>} for an InvalidUsageException.
+"""
+
+import sys, traceback
+
+from .thread_state import thread_local
+from .envs import MC_NO_ENV, _McEnvSet
+from .values import MC_NO_VALUE
+from .property_wrapper import property_names
+from .config_errors import ConfigApiException, InvalidUsageException
+from . import multiconf as _mc
+
+
+_plain_types = frozenset((str, int, float, bool, type(None)))
+
+
+_NOT_REPEATABLE = object()
+_EMPTY_REPEATABLE = object()
+
+
+def _join(path, key):
+    return path + '.' + key if path else key
+
+
+def _unproxied(item):
+    if issubclass(type(item), _mc._ItemParentProxy):
+        return item._mc_proxied_item
+    return item
+
+
+class _DictExporter():
+    def __init__(self, start_item, env, property_methods):
+        self.start_item = start_item
+        self.env = env
+        self.env_mask = env.mask
+        self.property_methods = property_methods
+        self.paths = None  # id(item) -> path, created on first item reference
+
+    def _ref(self, item):
+        if self.paths is None:
+            self.paths = {}
+            todo = [(self.start_item, '')]
+            while todo:
+                parent, path = todo.pop()
+                self.paths[id(_unproxied(parent))] = path
+                for key, mc_key, child in self._children(parent):
+                    if mc_key is _NOT_REPEATABLE:
+                        todo.append((child, _join(path, key)))
+                    elif mc_key is not _EMPTY_REPEATABLE:
+                        todo.append((child, _join(path, key) + '[{!r}]'.format(mc_key)))
+
+        return {'#ref': self.paths.get(id(_unproxied(item)))}
+
+    def _value(self, val):
+        typ = type(val)
+        if typ in _plain_types:
+            return val
+        if issubclass(typ, (_mc._ConfigBase, _mc._ItemParentProxy)):
+            return self._ref(val)
+        if typ is list or typ is tuple:
+            return [self._value(vv) for vv in val]
+        if typ is dict:
+            return {key: self._value(vv) for key, vv in val.items()}
+        return val
+
+    def _children(self, item):
+        """Yield (key, mc_key, item) for the nested items existing in the env, mc_key is _NOT_REPEATABLE for non repeatable items.
+
+        For an empty repeatable (key, _EMPTY_REPEATABLE, None) is yielded.
+        The items nested under a proxied item are also proxied.
+        """
+
+        env_mask = self.env_mask
+        real_item = _unproxied(item)
+        proxy_parent = item if real_item is not item else None
+        for key, kind, val in _mc._mc_child_entries(real_item):
+            if key[0] == '_' or kind is _mc._ChildKind.VALUE:
+                continue
+
+            if kind is _mc._ChildKind.REPEATABLE:
+                yield key, _EMPTY_REPEATABLE, None
+                for mc_key, ritem in val.all_items.items():
+                    real_ritem = _unproxied(ritem)
+                    if real_ritem._mc_handled_env_bits & env_mask and isinstance(real_ritem, _mc._RealConfigItemMixin):
+                        if proxy_parent is not None and real_ritem is ritem:
+                            ritem = _mc._mc_item_parent_proxy_factory(proxy_parent, ritem)
+                        yield key, mc_key, ritem
+                continue
+
+            real_val = _unproxied(val)
+            if issubclass(type(real_val), _mc._RealConfigItemMixin) and real_val._mc_handled_env_bits & env_mask:
+                if proxy_parent is not None and real_val is val:
+                    val = _mc._mc_item_parent_proxy_factory(proxy_parent, val)
+                yield key, _NOT_REPEATABLE, val
+
+    def _property_value(self, item, name):
+        try:
+            return self._value(getattr(item, name))
+        except InvalidUsageException as ex:
+            return {'#invalid usage context': repr(ex)}
+        except Exception as ex:  # pylint: disable=broad-except
+            traceback.print_exception(*sys.exc_info())
+            return {'#error': repr(ex)}
+
+    def export(self, item):
+        env = self.env
+        dd = {}
+        real_item = _unproxied(item)
+        for name, mc_attr in real_item._mc_attributes.items():
+            val = mc_attr.env_values.get(env, MC_NO_VALUE)
+            if val is not MC_NO_VALUE:
+                dd[name] = val if type(val) in _plain_types else self._value(val)
+
+        if self.property_methods:
+            for name in property_names(type(real_item)):
+                if name not in dd:
+                    dd[name] = self._property_value(item, name)
+
+        for key, mc_key, child in self._children(item):
+            if mc_key is _NOT_REPEATABLE:
+                dd[key] = self.export(child)
+            elif mc_key is _EMPTY_REPEATABLE:
+                dd[key] = {}
+            else:
+                dd[key][mc_key] = self.export(child)
+
+        return dd
+
+
+def export_dict(item, env, property_methods=False):
+    """Return (dict): 'item' and the items nested under it for 'env', see module doc."""
+
+    if env is MC_NO_ENV or isinstance(env, _McEnvSet):
+        raise ConfigApiException("Exporting a dict requires a single current env, found {}.".format(env))
+
+    if not property_methods:
+        return _DictExporter(item, env, property_methods).export(item)
+
+    # Disable attribute setting to avoid side effects if @property methods set mc attributes
+    orig_in_json = thread_local.in_json
+    thread_local.in_json = True
+    try:
+        return _DictExporter(item, env, property_methods).export(item)
+    finally:
+        thread_local.in_json = orig_in_json
@@ -25,7 +25,8 @@ class BaseEnv():
         self.members = []
         self.factory = factory
 
-        self.bit = 1 << self.factory._index
+        self.index = self.factory._index
+        self.bit = 1 << self.index
         self.mask = mask | self.bit
         self.factory._index += 1
 
@@ -78,6 +79,9 @@ class Env(BaseEnv):
         self.lookup_order = None
         self.allow_todo = allow_todo
 
+        # Mask of the env and the groups containing it, see EnvFactory._mc_calc_env_group_order
+        self._mc_eg_mask = self.bit
+
 
 class EnvGroup(BaseEnv, Container):
     def __init__(self, name, factory, members):
@@ -117,8 +121,7 @@ class EnvGroup(BaseEnv, Container):
             for member in member.envs:
                 envs[member.name] = member
         self.envs = list(envs.values())
-
-        self.ambiguous = {env.name: [] for env in self.envs}
+        self.ambiguous = _McAmbiguousGroups(self)
 
     def irepr(self, indent_level):
         indent1 = '   ' * indent_level
@@ -136,12 +139,35 @@ class EnvGroup(BaseEnv, Container):
                 yield from member.groups
 
 
+class _McAmbiguousGroups():
+    """Mapping env name -> list of the groups which are ambiguous with 'group' for the env.
+
+    The groups are calculated from the masks on access, see EnvFactory._mc_calc_env_group_order.
+    """
+
+    __slots__ = ('group',)
+
+    def __init__(self, group):
+        self.group = group
+
+    def __getitem__(self, env_name):
+        group = self.group
+        factory = group.factory
+        env = factory.envs[env_name]
+        if not group.mask & env.bit:
+            raise KeyError(env_name)
+        return factory._mc_bits_to_groups(factory._mc_ambiguous_mask(env, group.bit))
+
+
 class EnvFactory():
     def __init__(self):
         self.envs = {}
         self.groups = {}
         self._index = 1  # bit zero reserved to be set for all groups, so that a Group mask will never be equal to an env mask
         self._mc_frozen = False
+        self._mc_eg_by_bit = {}
+        self._mc_containing_masks = {}  # group bit -> mask of the groups containing the group
+        self._mc_names_masks = {}  # tuple of env/group names -> mask of their bits
 
     def Env(self, name, allow_todo=False):
         """ Declare a new Env """
@@ -216,7 +242,12 @@ class EnvFactory():
         Must be called after all user defined envs and groups are defined.
 
         Creates 'default' group which is the superset of all user defined groups and envs.
-        Calculates the group lookup order and ambiguity lists for all envs.
+        Calculates the group lookup order for all envs and the masks used for resolving values and detecting ambiguities. The cost is
+        proportional to the number of groups squared plus the size of the groups, not the number of envs times the number of groups squared.
+
+        The lookup order is the order in which the groups were defined, which is also the order of the group bits, so the most specific
+        group for an env among a set of groups is the lowest bit in the intersection of the bits of the groups and the env mask '_mc_eg_mask'.
+        A group is ambiguous with the groups later in the lookup order which do not contain it, see `_mc_ambiguous_mask`.
         After this is called, no more envs or groups may be created by this factory.
         """
 
@@ -226,50 +257,69 @@ class EnvFactory():
 
         self.default = self._EnvGroup('default', members=list(self.groups.values()) + list(self.envs.values()))
 
-        for env_name, env in self.envs.items():
-            # print("env, name, typ:", env_name, env)
-            env_groups = []
-            for group_name, group in self.groups.items():
-                # print("group name:", group_name)
-                if env in group:
-                    env_groups.append(group)
-
-            max_index = len(env_groups) - 1
-            for index, gg in enumerate(env_groups):
-                if index == max_index:
-                    break
-
-                for amb_group in env_groups[index + 1:]:
-                    if gg in amb_group:
-                        continue
-                    assert amb_group not in gg
-                    gg.ambiguous[env.name].append(amb_group)
-
-            env.lookup_order = env_groups
-
-            # Debug
-            # print()
-            # print("env lookup_order:", )
-            # print("    ", env.name)
-            # for group in env.lookup_order:
-            #     print("    ", group.name, '- amb ->', [gg.name for gg in group.ambiguous[env.name]])
+        groups = list(self.groups.values())
+        eg_by_bit = {eg.bit: eg for eg in itertools.chain(self.envs.values(), groups)}
+
+        containing_masks = self._mc_containing_masks
+        for gg in groups:
+            containing_mask = 0
+            for other in groups:
+                if other.mask & gg.mask == gg.mask and other is not gg:
+                    containing_mask |= other.bit
+            containing_masks[gg.bit] = containing_mask
+
+        for env in self.envs.values():
+            env.lookup_order = []
+        for gg in groups:
+            for env in gg.envs:
+                env.lookup_order.append(gg)
+                env._mc_eg_mask |= gg.bit
 
         self.eg_none = self._EnvGroup('_mc_eg_none', members=[])
+        eg_by_bit[self.eg_none.bit] = self.eg_none
+        self._mc_eg_by_bit = eg_by_bit
+
+    def _mc_ambiguous_mask(self, env, gg_bit):
+        """Return the mask of the groups which are ambiguous with the group with bit 'gg_bit' for 'env'."""
+        return env._mc_eg_mask & ~(2 * gg_bit - 1) & ~self._mc_containing_masks.get(gg_bit, 0) & ~env.bit
+
+    def _mc_bits_to_groups(self, mask):
+        """Return list of envs and groups with bits in mask, in definition order."""
+        egs = []
+        while mask:
+            egs.append(self._mc_eg_by_bit[mask & -mask])
+            mask &= mask - 1
+        return egs
+
+    def _mc_names_mask(self, env_values):
+        """Return the mask of the bits of the envs and groups named in env_values."""
+        names = tuple(env_values)
+        try:
+            return self._mc_names_masks[names]
+        except KeyError:
+            mask = 0
+            for name in names:
+                eg = self.envs.get(name) or self.groups.get(name)
+                if eg is not None:
+                    mask |= eg.bit
+            self._mc_names_masks[names] = mask
+            return mask
 
     def _mc_resolve_env_group_value(self, env, env_values):
-        try:
+        hits = self._mc_names_mask(env_values) & env._mc_eg_mask
+        if not hits:
+            return None, None
+
+        if hits & env.bit:
             return env_values[env.name], env
-        except KeyError:
-            found_ambiguous = []
-            for gg in env.lookup_order:
-                if gg.name in env_values:
-                    for amb_group in gg.ambiguous[env.name]:
-                        if amb_group.name in env_values:
-                            found_ambiguous.append(amb_group)
-                    if found_ambiguous:
-                        raise AmbiguousEnvException("Ambiguous values for: " + str(env), [gg] + found_ambiguous)
-                    return env_values[gg.name], gg
-        return None, None
+
+        gg_bit = hits & -hits
+        gg = self._mc_eg_by_bit[gg_bit]
+        ambiguous = hits & self._mc_ambiguous_mask(env, gg_bit)
+        if ambiguous:
+            raise AmbiguousEnvException("Ambiguous values for: " + str(env), [gg] + self._mc_bits_to_groups(ambiguous))
+
+        return env_values[gg.name], gg
 
     def _mc_select_env_list(self, env, eg_list1, eg_list2):
         """Resolve in which lists env is most specific, if in any.
@@ -309,6 +359,42 @@ class EnvFactory():
         return None
 
 
+class _McEnvSet():
+    """The set of envs which are loaded simultaneously when loading with 'single_pass'.
+
+    This is used as the current env while executing the config function, instead of a single Env.
+    """
+
+    __slots__ = ('envs', 'mask')
+
+    # There are no attribute values stored for an env set, see _McEnvValues
+    bit = 0
+    index = 0
+
+    def __init__(self, envs):
+        self.envs = envs
+        mask = 0
+        for env in envs:
+            mask |= env.mask
+        self.mask = mask
+
+    def narrowed(self, mask):
+        """Return the set of envs in self which are also in 'mask'. Return self if this would give an empty set."""
+        if self.mask & mask == self.mask:
+            return self
+
+        envs = [env for env in self.envs if env.mask & mask]
+        if not envs:
+            return self
+        return _McEnvSet(envs)
+
+    def json_equivalent(self):
+        return [env.name for env in self.envs]
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(' + repr(self.json_equivalent()) + ')'
+
+
 MC_NO_ENV = Env("MC_NO_ENV", type('', (object,), {'_index': 0}), allow_todo=True)
 MC_NO_ENV.mask = 0
 MC_NO_ENV.lookup_order = ()
@@ -3,6 +3,7 @@
 
 import sys, os, threading, traceback
 import types
+from enum import Enum
 from collections.abc import Mapping
 
 from . import envs
@@ -24,6 +25,49 @@ _mc_hidden_if_not_true = ('mc_is_default_value_item',)
 _mc_show_if_names_only = ('mc_is_default_value_item',)
 
 
+class _DirEntryKind(Enum):
+    PROPERTY = 1  # @property or _McPropertyWrapper
+    STATIC = 2
+    TYPE = 3
+
+
+def _dir_entry_kinds(cls, multiconf_property_wrapper_type):
+    """Return (tuple, frozenset): ((name, _DirEntryKind), ...) for the dir entries shown in json, and all dir entry names.
+
+    The classification only depends on the class, so it is done once per class. Methods and private and filtered names are left out.
+    Only the kind is cached, the class attribute values are read when encoding, as they may be reassigned.
+    """
+
+    try:
+        return cls.__dict__['_mc_json_dir_entry_kinds']
+    except KeyError:
+        pass
+
+    entries = []
+    for key in cls._mc_cls_dir_entries:
+        if key.startswith('_') or key in _mc_filter_out_keys:
+            continue
+
+        for base in get_bases(cls):
+            try:
+                real_attr = object.__getattribute__(base, key)
+            except AttributeError:
+                continue
+
+            if isinstance(real_attr, (property, multiconf_property_wrapper_type)):
+                entries.append((key, _DirEntryKind.PROPERTY))
+            elif not (hasattr(real_attr, '__call__') or hasattr(real_attr, '__func__')):
+                entries.append((key, _DirEntryKind.STATIC))
+            elif isinstance(real_attr, type):
+                entries.append((key, _DirEntryKind.TYPE))
+            # else ignore methods
+            break
+
+    kinds = (tuple(entries), frozenset(cls._mc_cls_dir_entries))
+    type.__setattr__(cls, '_mc_json_dir_entry_kinds', kinds)
+    return kinds
+
+
 def _class_tuple(obj, obj_info=""):
     return {'__class__': obj.__class__.__name__ + obj_info}
 
@@ -55,9 +99,14 @@ def _mc_identification_msg_str(objval):
     return cls_msg + additionl_ref_info_msg
 
 
+class _RecursionCheck(threading.local):
+    def __init__(self):
+        super().__init__()
+        self.in_default = None
+
+
 class ConfigItemEncoder():
-    recursion_check = threading.local()
-    recursion_check.in_default = None
+    recursion_check = _RecursionCheck()
 
     def __init__(self, filter_callable, fallback_callable, compact, sort_attributes, property_methods, with_item_types, warn_nesting,
                  multiconf_base_type, multiconf_property_wrapper_type, show_all_envs, depth, persistent_ids):
@@ -232,45 +281,31 @@ class ConfigItemEncoder():
             new_val.append(self._ref_mc_item_str(maybeitem))
         return key, [('', new_val)] + attr_inf
 
-    def _handle_one_dir_entry_one_env(self, obj, key, _val, env, attributes_overriding_property, _dir_entries, names_only):
-        if key.startswith('_') or isinstance(obj.__dict__.get(key, None), (self.multiconf_base_type, RepeatableDict)) or key in _mc_filter_out_keys:
+    def _handle_one_dir_entry_one_env(self, obj, key, kind_attr, env, attributes_overriding_property, _dir_entries, names_only):
+        if isinstance(obj.__dict__.get(key, None), (self.multiconf_base_type, RepeatableDict)):
             return key, ()
 
         overridden_property = ''
         if key in attributes_overriding_property:
             overridden_property = ' #overridden @property'
 
-        # Figure out if the attribute is a @property or a static value
-        try:
-            # If proxy object then get proxied object, the access to __class__ does not work through the proxy
-            real_obj = object.__getattribute__(obj, '_mc_proxied_item')
-        except AttributeError:
-            real_obj = obj
-
-        for cls in get_bases(object.__getattribute__(real_obj, '__class__')):
-            try:
-                real_attr = object.__getattribute__(cls, key)
-            except AttributeError:
-                continue
-
-            if isinstance(real_attr, (property, self.multiconf_property_wrapper_type)):
-                if key in _mc_hidden_if_not_true and not getattr(obj, key):
-                    return key, ()
-
-                calc_or_static = _calculated_value
+        kind, real_attr = kind_attr
+        if kind is _DirEntryKind.PROPERTY:
+            if key in _mc_hidden_if_not_true and not getattr(obj, key):
+                return key, ()
 
-                if names_only and key not in _mc_show_if_names_only:
-                    val = _property_method_value_hidden
-                    break
+            calc_or_static = _calculated_value
 
+            if names_only and key not in _mc_show_if_names_only:
+                val = _property_method_value_hidden
+            else:
                 orig_env = thread_local.env
                 try:
                     thread_local.env = env
                     if isinstance(real_attr, self.multiconf_property_wrapper_type):
                         val = real_attr.prop.__get__(obj, type(obj))
-                        break
-
-                    val = getattr(obj, key)
+                    else:
+                        val = getattr(obj, key)
                 except InvalidUsageException as ex:
                     self.num_invalid_usages += 1
                     return key, [(overridden_property + ' #invalid usage context', self.safe_repr(ex))]
@@ -280,18 +315,12 @@ class ConfigItemEncoder():
                     return key, [(overridden_property + ' #json_error trying to handle property method', self.safe_repr(ex))]
                 finally:
                     thread_local.env = orig_env
-                break
-            elif not (hasattr(real_attr, '__call__') or hasattr(real_attr, '__func__')):
-                calc_or_static = _static_value
-                val = real_attr
-                break
-            elif isinstance(real_attr, type):
-                calc_or_static = ''
-                val = real_attr
-                break
-            else:
-                # Ignore methods
-                return key, ()
+        elif kind is _DirEntryKind.STATIC:
+            calc_or_static = _static_value
+            val = real_attr
+        else:
+            calc_or_static = ''
+            val = real_attr
 
         property_inf = []
         if self.user_filter_callable:
@@ -414,7 +443,13 @@ class ConfigItemEncoder():
                 else:
                     attr_dict = dd
 
-                dir_entries = obj._mc_cls_dir_entries
+                try:
+                    # If proxy object then get proxied object, the access to __class__ does not work through the proxy
+                    real_obj = object.__getattribute__(obj, '_mc_proxied_item')
+                except AttributeError:
+                    real_obj = obj
+                real_cls = type(real_obj)
+                dir_entry_kinds, dir_entries = _dir_entry_kinds(real_cls, self.multiconf_property_wrapper_type)
 
                 for attr_key, mc_attr in obj._mc_attributes.items():
                     self._handle_one_value_multiple_envs(
@@ -460,9 +495,9 @@ class ConfigItemEncoder():
                 else:
                     property_dict = dd
 
-                for attr_key in dir_entries:
+                for attr_key, kind in dir_entry_kinds:
                     self._handle_one_value_multiple_envs(
-                        property_dict, obj, attr_key, None, obj.env, attributes_overriding_property, None, self._handle_one_dir_entry_one_env,
+                        property_dict, obj, attr_key, (kind, getattr(real_cls, attr_key)), obj.env, attributes_overriding_property, None, self._handle_one_dir_entry_one_env,
                         ' #multiconf env specific @property', names_only=self.property_methods is None)
 
                 if self.sort_attributes:
@@ -0,0 +1,162 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Wall time and call counts of the phases of loading a configuration, collected when loading with `load(profile=True)`.
+
+The phases are:
+
+config:              Executing the config function for an env, the time not spent in any of the other phases.
+freeze:              Finishing an item after its 'with' block (or when the next item is created), e.g. validating required attributes and
+                     assigning DefaultItems. Not including 'mc_init' and 'mc_build'.
+mc_init:             The user defined 'mc_init' methods.
+mc_build:            The user defined 'mc_build' methods of builders.
+type_check:          Type checking of attribute values.
+mc_validate:         The user defined 'mc_validate' methods.
+validate_properties: Validating the @property methods, see `load(validate_properties=True)`. Not including the time in the @property methods.
+property:            The @property methods called when validating, also collected per property name.
+mc_post_validate:    The user defined 'mc_post_validate' methods, for the env MC_NO_ENV.
+
+The user callbacks, i.e. the phases in `CALLBACK_PHASES`, are always called for a single item, so `top_classes` gives the item classes with
+the most expensive callbacks.
+
+Times are exclusive, i.e. time spent in a nested phase, e.g. 'mc_init' called while executing the config function, is only counted for the
+nested phase. So the times of all phases add up to the profiled time of the load. The time between the phases, e.g. validating attributes
+after 'mc_validate', is not included.
+Work done in worker processes when loading with 'parallel' or 'validate_properties_parallel' is not included.
+"""
+
+from time import perf_counter
+
+
+PHASES = ('config', 'freeze', 'mc_init', 'mc_build', 'type_check', 'mc_validate', 'validate_properties', 'property', 'mc_post_validate')
+CALLBACK_PHASES = ('mc_init', 'mc_build', 'mc_validate', 'property', 'mc_post_validate')
+
+
+class PhaseStats():
+    """Accumulated wall time (seconds) and number of calls."""
+
+    __slots__ = ('time', 'count')
+
+    def __init__(self, time=0.0, count=0):
+        self.time = time
+        self.count = count
+
+    def __repr__(self):
+        return "{}(time={:.6f}, count={})".format(self.__class__.__name__, self.time, self.count)
+
+
+class LoadProfile():
+    """The profile of loading a configuration.
+
+    The stats are collected per phase, env and item class. The env is MC_NO_ENV for 'mc_post_validate', and the item class is the class of the
+    configuration root for 'config'.
+    """
+
+    def __init__(self):
+        self.stats = {}  # (phase, env, cls) -> PhaseStats
+        self.properties = {}  # (env, cls, property name) -> PhaseStats
+        self._stack = []  # [start time, time in nested phases] of the currently running phases
+
+    def start(self):
+        self._stack.append([perf_counter(), 0.0])
+
+    def stop(self, phase, env, cls, name=None):
+        """Stop the phase started by the matching 'start', 'name' is the property name for the 'property' phase."""
+        start, nested = self._stack.pop()
+        elapsed = perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+        key = (phase, env, cls)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = PhaseStats()
+        stats.time += elapsed - nested
+        stats.count += 1
+
+        if name is not None:
+            key = (env, cls, name)
+            stats = self.properties.get(key)
+            if stats is None:
+                stats = self.properties[key] = PhaseStats()
+            stats.time += elapsed - nested
+            stats.count += 1
+
+    def reset_stack(self):
+        """Discard phases left running by an error."""
+        del self._stack[:]
+
+    def totals(self, *by):
+        """Sum the stats over the keys not in 'by'.
+
+        Arguments:
+            by (str): Zero or more of 'phase', 'env' and 'cls'.
+
+        Return (dict): tuple of the 'by' keys -> PhaseStats, sorted by decreasing time.
+        """
+
+        indexes = []
+        for name in by:
+            try:
+                indexes.append(('phase', 'env', 'cls').index(name))
+            except ValueError:
+                raise ValueError("Can only sum by 'phase', 'env' or 'cls', got: {!r}".format(name)) from None
+
+        totals = {}
+        for key, stats in self.stats.items():
+            total_key = tuple(key[index] for index in indexes)
+            total = totals.get(total_key)
+            if total is None:
+                total = totals[total_key] = PhaseStats()
+            total.time += stats.time
+            total.count += stats.count
+
+        return dict(sorted(totals.items(), key=lambda item: -item[1].time))
+
+    def top_classes(self, num=10, phases=CALLBACK_PHASES):
+        """Return (list): The 'num' (cls, PhaseStats) with the most time in 'phases', summed over all envs."""
+        totals = {}
+        for (phase, _, cls), stats in self.stats.items():
+            if phase in phases:
+                total = totals.get(cls)
+                if total is None:
+                    total = totals[cls] = PhaseStats()
+                total.time += stats.time
+                total.count += stats.count
+
+        return sorted(totals.items(), key=lambda item: -item[1].time)[:num]
+
+    def top_properties(self, num=10):
+        """Return (list): The 'num' ((cls, property name), PhaseStats) with the most time, summed over all envs."""
+        totals = {}
+        for (_, cls, name), stats in self.properties.items():
+            total = totals.get((cls, name))
+            if total is None:
+                total = totals[cls, name] = PhaseStats()
+            total.time += stats.time
+            total.count += stats.count
+
+        return sorted(totals.items(), key=lambda item: -item[1].time)[:num]
+
+    @property
+    def total_time(self):
+        return sum(stats.time for stats in self.stats.values())
+
+    def report(self, top=10):
+        """Return (str): The time per phase, per env and the 'top' item classes and @property methods with the most time in user callbacks."""
+        lines = ["Load profile, total {:.4f}s".format(self.total_time)]
+
+        def section(title, totals):
+            lines.append(title)
+            for key, stats in totals:
+                name = ' '.join(cls.__qualname__ if isinstance(cls, type) else str(cls) for cls in key)
+                lines.append("  {:<40} {:>10.4f}s {:>8}".format(name, stats.time, stats.count))
+
+        section("Phases:", self.totals('phase').items())
+        section("Envs:", self.totals('env').items())
+        section("Top classes:", [((cls,), stats) for cls, stats in self.top_classes(top)])
+        section("Top @properties:", self.top_properties(top))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.report()
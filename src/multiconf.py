@@ -1,20 +1,23 @@
 # Copyright (c) 2012-2016 Lars Hupfeldt Nielsen, Hupfeldt IT
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
-import sys, os, abc, traceback
+import sys, os, abc, traceback, time
 import json
-import threading
+from enum import Enum
+from types import FunctionType
 
 from .thread_state import thread_local
-from .envs import EnvFactory, Env, AmbiguousEnvException, EnvException, MC_NO_ENV
+from .envs import EnvFactory, Env, AmbiguousEnvException, EnvException, MC_NO_ENV, _McEnvSet
 from .values import MC_NO_VALUE, MC_TODO, MC_REQUIRED, McTodoHandling
 from .attribute import _McAttribute, _McAttributeAccessor, Where
-from .property_wrapper import _McPropertyWrapper
+from .property_wrapper import _McPropertyWrapper, property_names
 from .repeatable import RepeatableDict
 from .config_errors import ConfigException, ConfigApiException, InvalidUsageException, ConfigExcludedAttributeError, ConfigExcludedKeyError
 from .config_errors import caller_file_line, find_user_file_line, _line_msg, _error_msg, _warning_msg, not_repeatable_in_parent_msg, repeatable_in_parent_msg
 from .json_output import ConfigItemEncoder, _mc_filter_out_keys, _mc_identification_msg_str
 from . import typecheck
+from . import tree_export, snapshot, config_reload, dict_output, load_profile
+from .warm_up import WarmUp
 
 
 class _McExcludedException(Exception):
@@ -28,20 +31,18 @@ def _mc_debug(*args):
 
 
 class _ConfigBase():
-    _mc_last_item = None
-    _mc_in_build = None
     _mc_built_by = None
-    _mc_hierarchy = []  # type: ignore
     _mc_deco_named_as = None
     _mc_deco_required = ()
     _mc_deco_nested_repeatables = ()
+    _mc_env_attributes_to_check = None
 
     @classmethod
     def _mc_debug_hierarchy(cls, msg):
         _mc_debug(
             msg,
             cls if not isinstance(cls, _ConfigBase) else (type(cls), id(cls)),
-            '_mc_hierarchy: {}'.format([id(item) for item in cls._mc_hierarchy]))
+            'hierarchy: {}'.format([id(item) for item in thread_local.hierarchy]))
 
     def _mc_error_msg(self, message):
         self._mc_num_errors += 1
@@ -114,6 +115,27 @@ class _ConfigBase():
             value = getattr(self, attr_name)
             self._mc_print_value_error_msg(attr_name, value, value_file_name, value_line_num)
 
+    def _mc_validate_attributes_env_set(self, mc_error_info_up_level):
+        """Verify that all attributes got a value for each env in the current env set (loading with 'single_pass')"""
+        if not self._mc_env_attributes_to_check:
+            return
+
+        env_set = thread_local.env
+        try:
+            for env in env_set.envs:
+                thread_local.env = env
+                self._mc_activate_env_state(env)
+                self._mc_validate_attributes(mc_error_info_up_level + 1 if mc_error_info_up_level is not None else None)
+        finally:
+            thread_local.env = env_set
+
+    def _mc_activate_env_state(self, env):
+        """Restore the env specific loading state saved for env when loading with 'single_pass'"""
+        self._mc_num_errors = 0
+        self._mc_attributes_to_check = self._mc_env_attributes_to_check.get(env)
+        for env_attr in self._mc_attributes.values():
+            env_attr.activate_env_state(env)
+
     def _mc_validate_required(self, mc_error_info_up_level):
         """Verify that all @required child items are present"""
         if not self._mc_deco_required:
@@ -171,8 +193,40 @@ class _ConfigBase():
                 NOTE: This will mostly make it impossible to identify the referenced obj, but it makes it possible to compare json across runs.
         """
 
+        return self._mc_json(
+            None,
+            compact=compact, sort_attributes=sort_attributes, property_methods=property_methods, builders=builders, default_items=default_items,
+            skipkeys=skipkeys, warn_nesting=warn_nesting, show_all_envs=show_all_envs, depth=depth, persistent_ids=persistent_ids)
+
+    def json_stream(self, fp, compact=False, sort_attributes=False, property_methods=True, builders=False, default_items=False, skipkeys=True, warn_nesting=None, show_all_envs=False,
+                    depth=None, persistent_ids=False):
+        """Write the json representation of the configuration to the file-like object 'fp'.
+
+        The output is the same as returned by `json`, but it is written incrementally while the items are encoded, so the full json string is never
+        created in memory. The arguments are the same as for `json`.
+        """
+
+        self._mc_json(
+            fp,
+            compact=compact, sort_attributes=sort_attributes, property_methods=property_methods, builders=builders, default_items=default_items,
+            skipkeys=skipkeys, warn_nesting=warn_nesting, show_all_envs=show_all_envs, depth=depth, persistent_ids=persistent_ids)
+
+    def to_dict(self, property_methods=False):
+        """Export the item and the items nested under it for the current env as plain nested dicts, for machine consumption.
+
+        This is much faster than `json` as no meta information is created. See `dict_output` for the format.
+
+        Arguments:
+            property_methods (bool): Call @property methods and include the values.
+        """
+        return dict_output.export_dict(self, thread_local.env, property_methods=property_methods)
+
+    def _mc_json(self, fp, compact, sort_attributes, property_methods, builders, default_items, skipkeys, warn_nesting, show_all_envs, depth, persistent_ids):
         cr = self._mc_root
 
+        # The config is being loaded with 'single_pass', there is no single current env
+        show_all_envs = show_all_envs or isinstance(thread_local.env, _McEnvSet)
+
         filter_callable = cr._mc_json_filter
         fallback_callable = cr._mc_json_fallback
 
@@ -194,10 +248,10 @@ class _ConfigBase():
             depth=depth,
             persistent_ids=persistent_ids)
 
-        cr._mc_in_json = True
-
-        # Disable attribute setting to avoid side effects from calling json if @property methods set mc attributes
-        _ConfigBase._mc_setattr = _ConfigBase._mc_setattr_disabled
+        # Disable attribute setting to avoid side effects from calling json if @property methods set mc attributes.
+        # This is per thread, as other envs may be loaded by another thread (see `warm_up`)
+        orig_in_json = thread_local.in_json
+        thread_local.in_json = True
 
         try:
             orig_env = thread_local.env
@@ -205,13 +259,15 @@ class _ConfigBase():
                 thread_local.env = MC_NO_ENV
 
             # python3 doesn't need  separators=(',', ': ')
-            json_str = json.dumps(self, skipkeys=skipkeys, default=encoder, check_circular=False, sort_keys=False, indent=4, separators=(',', ': '))
+            if fp is None:
+                json_str = json.dumps(self, skipkeys=skipkeys, default=encoder, check_circular=False, sort_keys=False, indent=4, separators=(',', ': '))
+            else:
+                json_str = None
+                json.dump(self, fp, skipkeys=skipkeys, default=encoder, check_circular=False, sort_keys=False, indent=4, separators=(',', ': '))
             cr._mc_json_errors = encoder.num_errors
             return json_str
         finally:
-            _ConfigBase._mc_setattr = _ConfigBase._mc_setattr_real
-            cr._mc_in_json = False
-
+            thread_local.in_json = orig_in_json
             thread_local.env = orig_env
 
     def _mc_excl_repr(self):
@@ -280,7 +336,10 @@ class _ConfigBase():
         return self._mc_handled_env_bits & env_mask or env_mask == 0
 
     def _mc_attributes_to_check_add(self, attr_name, mc_error_info_up_level):
-        mc_caller_file_name, mc_caller_line_num = caller_file_line(up_level=mc_error_info_up_level + 1)
+        if self._mc_root._mc_capture_locations:
+            mc_caller_file_name, mc_caller_line_num = caller_file_line(up_level=mc_error_info_up_level + 1)
+        else:
+            mc_caller_file_name, mc_caller_line_num = None, None
         if self._mc_attributes_to_check is None:
             self._mc_attributes_to_check = {}
 
@@ -335,18 +394,36 @@ class _ConfigBase():
         if self._mc_num_errors:
             self._mc_raise_errors()
 
+        prof = self._mc_root._mc_load_profile
+        if prof is not None:
+            prof.start()
+
+        outer_env_set = None
+        if self._mc_root._mc_single_pass:
+            # Execute 'mc_init' etc. only for the envs in which self exists
+            outer_env_set = thread_local.env
+            thread_local.env = outer_env_set.narrowed(self._mc_handled_env_bits)
+
         self._mc_where = Where.IN_MC_INIT
         must_pop = False
-        if self.__class__._mc_hierarchy[-1] != self:
+        if thread_local.hierarchy[-1] != self:
             must_pop = True
-            self.__class__._mc_hierarchy.append(self)
+            thread_local.hierarchy.append(self)
 
         # Call user 'mc_init' callback
-        self.mc_init()
+        if prof is None:
+            self.mc_init()
+        else:
+            prof.start()
+            self.mc_init()
+            prof.stop('mc_init', thread_local.env, type(self))
 
         if self.mc_validate.__code__ is _ConfigBase.mc_validate.__code__:
             # mc_validate has not been overridden, so we can validate that all attributes have been set now
-            self._mc_validate_attributes(mc_error_info_up_level)
+            if outer_env_set is None:
+                self._mc_validate_attributes(mc_error_info_up_level)
+            else:
+                self._mc_validate_attributes_env_set(mc_error_info_up_level)
 
         if isinstance(self, ConfigBuilder):
             self._mc_builder_freeze()
@@ -355,7 +432,7 @@ class _ConfigBase():
         self._mc_freeze_previous(mc_error_info_up_level)
 
         if must_pop:
-            self.__class__._mc_hierarchy.pop()
+            thread_local.hierarchy.pop()
 
         if not self._mc_is_default_value_item:
             # Any child item not present on self, but found on a corresponding default value item matching self will be assigned to self
@@ -386,11 +463,17 @@ class _ConfigBase():
             self._mc_raise_errors()
         self._mc_where = Where.FROZEN
 
-        if not _ConfigBase._mc_in_build:
+        if not thread_local.in_build:
             self._mc_built_by = None
 
+        if outer_env_set is not None:
+            thread_local.env = outer_env_set
+
+        if prof is not None:
+            prof.stop('freeze', thread_local.env, type(self))
+
     def _mc_freeze_previous(self, mc_error_info_up_level):
-        previous_item = _ConfigBase._mc_last_item
+        previous_item = thread_local.last_item
         if previous_item is not self and previous_item is not self._mc_contained_in and previous_item and previous_item._mc_where != Where.FROZEN:
             previous_item._mc_freeze(mc_error_info_up_level + 1 if mc_error_info_up_level is not None else None)
 
@@ -399,8 +482,19 @@ class _ConfigBase():
         if not self._mc_exists_in_given_env(env):
             return
 
+        if self._mc_env_attributes_to_check is not None:
+            # Loaded with 'single_pass'
+            self._mc_activate_env_state(env)
+
         self._mc_where = Where.NOWHERE
-        self.mc_validate()
+        prof = self._mc_root._mc_load_profile
+        if prof is None:
+            self.mc_validate()
+        else:
+            prof.start()
+            self.mc_validate()
+            prof.stop('mc_validate', env, type(self))
+
         self._mc_validate_attributes(None)
         if self._mc_num_errors:
             self._mc_raise_errors()
@@ -409,21 +503,41 @@ class _ConfigBase():
     def _mc_call_mc_post_validate(self):
         """Call the user defined 'mc_post_validate' method."""
 
+        prof = self._mc_root._mc_load_profile
+        if prof is not None:
+            prof.start()
+
         self._mc_where = Where.NOWHERE
         self.mc_post_validate()
         self._mc_where = Where.FROZEN
 
+        if prof is not None:
+            prof.stop('mc_post_validate', MC_NO_ENV, type(self))
+
     def _mc_validate_properties(self, env):
         """Validate that @property methods can be called without error"""
         if not self._mc_exists_in_given_env(env):
             return
 
+        prof = self._mc_root._mc_load_profile
+        if prof is not None:
+            prof.start()
+            # Only time the user defined @property methods, not the other dir entries
+            prop_names = property_names(self.__class__)
+
         for key in self.__class__._mc_cls_dir_entries:
             if key.startswith('_') or key in self._mc_attributes or key in self.__dict__ or key in _mc_filter_out_keys:
                 continue
 
             try:
-                val = getattr(self, key)
+                if prof is None or key not in prop_names:
+                    val = getattr(self, key)
+                else:
+                    prof.start()
+                    try:
+                        val = getattr(self, key)
+                    finally:
+                        prof.stop('property', env, type(self), key)
             except InvalidUsageException:
                 self._mc_root._mc_num_invalid_property_usage += 1
                 # print(_error_msg("InvalidUsageException trying to validate @property '{prop_name}' in {env}.".format(prop_name=key, env=env)), file=sys.stderr)
@@ -434,6 +548,9 @@ class _ConfigBase():
                     prop_name=key, item=_mc_identification_msg_str(self), env=env)), file=sys.stderr)
                 traceback.print_exception(*sys.exc_info())
 
+        if prof is not None:
+            prof.stop('validate_properties', env, type(self))
+
     @property
     def num_invalid_property_usage(self):
         """Returns number of 'InvalidUsageException' s encountered when validating @property methods
@@ -444,20 +561,32 @@ class _ConfigBase():
 
     def __enter__(self):
         self._mc_where = Where.IN_WITH if self._mc_where != Where.IN_RE_INIT else Where.IN_RE_WITH
-        self.__class__._mc_hierarchy.append(self)
+        thread_local.hierarchy.append(self)
         # self.__class__._mc_debug_hierarchy('_ConfigBase.__enter__')
+
+        cr = self._mc_root
+        if cr._mc_single_pass:
+            # Execute the 'with' block only for the envs in which self exists
+            env_set = thread_local.env
+            cr._mc_env_set_stack.append(env_set)
+            thread_local.env = env_set.narrowed(self._mc_handled_env_bits)
+
         return self
 
     def __exit__(self, exc_type, value, traceback):
+        cr = self._mc_root
+        if cr._mc_single_pass:
+            thread_local.env = cr._mc_env_set_stack.pop()
+
         if not exc_type:
             self._mc_freeze_previous(mc_error_info_up_level=1)
             self._mc_freeze(mc_error_info_up_level=1)
-            self.__class__._mc_hierarchy.pop()
+            thread_local.hierarchy.pop()
             return None
 
         # self.__class__._mc_debug_hierarchy('_ConfigBase.__exit__')
         if exc_type is _McExcludedException:
-            self.__class__._mc_hierarchy.pop()
+            thread_local.hierarchy.pop()
             return True
 
     def _mc_setattr_env_value(self, current_env, attr_name, env_attr, value, old_value, from_eg, mc_force, mc_error_info_up_level):
@@ -472,7 +601,7 @@ class _ConfigBase():
             elif self._mc_where == Where.IN_RE_INIT:
                 if env_attr.where_from != Where.IN_RE_INIT:  # pragma: no branch TODO: test
                     # In RE_INIT we will not overwrite a proper value set previously unless the eg is more specific than the previous one or mc_force is used
-                    if _ConfigBase._mc_in_build:  # pragma: no cover TODO: test
+                    if thread_local.in_build:  # pragma: no cover TODO: test
                         return
 
                     if from_eg not in env_attr.from_eg or from_eg == env_attr.from_eg:
@@ -482,7 +611,7 @@ class _ConfigBase():
                 # In RE_WITH we will not overwrite a proper value set previously
                 if env_attr.where_from == Where.IN_RE_WITH:
                     # In mc_build we ignore this
-                    if not _ConfigBase._mc_in_build:  # pragma: no branch TODO: test
+                    if not thread_local.in_build:  # pragma: no branch TODO: test
                         # Trying to set the same attribute again in with block
                         msg = "The attribute '{attr_name}' is already fully defined.".format(attr_name=attr_name)
                         self._mc_print_error_caller(msg, mc_error_info_up_level)
@@ -494,7 +623,7 @@ class _ConfigBase():
 
             elif self._mc_where == Where.IN_WITH:
                 if env_attr.where_from == Where.IN_WITH:
-                    if not _ConfigBase._mc_in_build:  # pragma: no branch TODO: test
+                    if not thread_local.in_build:  # pragma: no branch TODO: test
                         # Trying to set the same attribute again in with block
                         msg = "The attribute '{attr_name}' is already fully defined.".format(attr_name=attr_name)
                         self._mc_print_error_caller(msg, mc_error_info_up_level)
@@ -516,8 +645,14 @@ class _ConfigBase():
             env_attr.set(current_env, value, self._mc_where, from_eg)
 
             if value not in (MC_TODO, MC_REQUIRED):
-                if self._mc_root._mc_do_type_check:
-                    type_msg = typecheck.type_check(self, attr_name, value)
+                cr = self._mc_root
+                if cr._mc_do_type_check:
+                    if cr._mc_load_profile is None:
+                        type_msg = typecheck.type_check(self, attr_name, value)
+                    else:
+                        cr._mc_load_profile.start()
+                        type_msg = typecheck.type_check(self, attr_name, value)
+                        cr._mc_load_profile.stop('type_check', current_env, type(self))
                     if type_msg:
                         self._mc_print_error_caller(type_msg, mc_error_info_up_level)
                         return
@@ -587,6 +722,10 @@ class _ConfigBase():
             self, current_env, attr_name, value, from_eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level, is_assign=False):
         """Common code for assignment and item.setattr"""
 
+        if thread_local.in_json:
+            self._mc_setattr_disabled(
+                current_env, attr_name, value, from_eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level, is_assign)
+
         #_mc_debug("_mc_setattr:", current_env, attr_name, value)
         try:
             cls_attr = getattr(self.__class__, attr_name)
@@ -680,14 +819,46 @@ class _ConfigBase():
 
     _mc_setattr_real = _mc_setattr  # Keep a reference to the real _mc_setattr
 
+    def _mc_setattr_env_set(
+            self, current_env, attr_name, value, from_eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level, is_assign=False):
+        """Common code for assignment and item.setattr when loading with 'single_pass'.
+
+        The value is assigned separately for each env in the current env set, applying the same rules as when loading a single env.
+        The env specific loading state is saved and restored for each env.
+        """
+
+        env_checks = self._mc_env_attributes_to_check
+        if env_checks is None:
+            env_checks = self._mc_env_attributes_to_check = {}
+
+        envs = current_env.envs if isinstance(current_env, _McEnvSet) else (current_env,)
+        orig_env = thread_local.env
+        try:
+            for env in envs:
+                thread_local.env = env
+                self._mc_attributes_to_check = env_checks.get(env)
+                env_attr = self._mc_attributes.get(attr_name)
+                if env_attr is not None:
+                    env_attr.activate_env_state(env)
+
+                self._mc_setattr_real(
+                    env, attr_name, value, from_eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1, is_assign)
+
+                env_checks[env] = self._mc_attributes_to_check
+                env_attr = self._mc_attributes.get(attr_name)
+                if env_attr is not None:
+                    env_attr.save_env_state(env)
+        finally:
+            thread_local.env = orig_env
+
     def __setattr__(self, attr_name, value):
         if attr_name[0] == '_':
             object.__setattr__(self, attr_name, value)
             return
 
         cr = self._mc_root
-        self._mc_setattr(
-            thread_local.env, attr_name, value, cr.env_factory.default, False, False, False, mc_error_info_up_level=3, is_assign=True)
+        cr._mc_setattr_impl(
+            self, thread_local.env, attr_name, value, cr.env_factory.default, False, False, False, mc_error_info_up_level=3, is_assign=True)
 
     def setattr(self, attr_name, *, mc_overwrite_property=False, mc_set_unknown=False, mc_force=False, mc_error_info_up_level=2, **env_values):
         """Set env specific values for an attribute.
@@ -705,45 +876,115 @@ class _ConfigBase():
                 create the configuration.
         """
 
-        if attr_name[0] == '_':
-            msg = "Trying to set attribute '{}' on a config item. ".format(attr_name)
-            msg += ("Atributes starting with '_mc' are reserved for multiconf internal usage." if attr_name.startswith('_mc') else
-                    "Atributes starting with '_' cannot be set using item.setattr. Use assignment instead.")
-            self._mc_print_error_caller(msg, mc_error_info_up_level)
+        if not self._mc_check_setattr_name(attr_name, mc_error_info_up_level + 1):
             return
 
-        cr = self._mc_root
-        env_factory = cr.env_factory
+        self._mc_validate_env_group_names(env_values, mc_error_info_up_level + 1)
 
+        current_env = thread_local.env
+        if isinstance(current_env, _McEnvSet):
+            for env in current_env.envs:
+                self._mc_setattr_resolved_env_value(
+                    env, attr_name, env_values, self._mc_resolve_env_group(env, env_values),
+                    mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1)
+            return
+
+        self._mc_setattr_resolved_env_value(
+            current_env, attr_name, env_values, self._mc_resolve_env_group(current_env, env_values),
+            mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1)
+
+    def _mc_check_setattr_name(self, attr_name, mc_error_info_up_level):
+        """Return True if attr_name may be set using item.setattr, otherwise report the error and return False"""
+        if attr_name[0] != '_':
+            return True
+
+        msg = "Trying to set attribute '{}' on a config item. ".format(attr_name)
+        msg += ("Atributes starting with '_mc' are reserved for multiconf internal usage." if attr_name.startswith('_mc') else
+                "Atributes starting with '_' cannot be set using item.setattr. Use assignment instead.")
+        self._mc_print_error_caller(msg, mc_error_info_up_level)
+        return False
+
+    def _mc_validate_env_group_names(self, env_group_names, mc_error_info_up_level):
+        """Check that there are no undefined eg names specified"""
+        cr = self._mc_root
         if cr._mc_check_unknown:
-            # Check that there are no undefined eg names specified
             try:
-                env_factory.validate_env_group_names(env_values)
+                cr.env_factory.validate_env_group_names(env_group_names)
             except EnvException as ex:
                 self._mc_print_error_caller(str(ex), mc_error_info_up_level)
 
-        current_env = thread_local.env
+    def _mc_resolve_env_group(self, current_env, env_values):
+        """Return the most specific env or group for current_env in env_values, None if there is none, or the AmbiguousEnvException"""
         try:
-            value, eg = env_factory._mc_resolve_env_group_value(current_env, env_values)
-            if eg is not None:
-                self._mc_setattr(
-                    current_env, attr_name, value, eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1)
-                return
+            return self._mc_root.env_factory._mc_resolve_env_group_value(current_env, env_values)[1]
+        except AmbiguousEnvException as ex:
+            return ex
 
-            if not env_values:
-                msg = "No Env or EnvGroup names specified."
-                self._mc_print_error_caller(msg, mc_error_info_up_level)
-                return
+    def _mc_setattr_resolved_env_value(
+            self, current_env, attr_name, env_values, eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level):
+        """Assign the value for the most specific env or group 'eg' for current_env found by '_mc_resolve_env_group'"""
+        cr = self._mc_root
+        if isinstance(eg, AmbiguousEnvException):
+            msg = "Value for {env} is specified more than once, with no single most specific group or direct env:".format(env=current_env)
+            for ambiguous_eg in eg.ambiguous:
+                value = env_values[ambiguous_eg.name]
+                msg += "\nvalue: " + repr(value) + ", from: " + repr(ambiguous_eg)
+            self._mc_print_error_caller(msg, mc_error_info_up_level)
+            return
 
-            self._mc_setattr(
-                current_env, attr_name, MC_NO_VALUE, env_factory.eg_none, mc_overwrite_property, mc_set_unknown, False, mc_error_info_up_level + 1)
+        if eg is not None:
+            cr._mc_setattr_impl(
+                self, current_env, attr_name, env_values[eg.name], eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1)
             return
-        except AmbiguousEnvException as ex:
-            msg = "Value for {env} is specified more than once, with no single most specific group or direct env:".format(env=current_env)
-            for eg in ex.ambiguous:
-                value = env_values[eg.name]
-                msg += "\nvalue: " + repr(value) + ", from: " + repr(eg)
+
+        if not env_values:
+            msg = "No Env or EnvGroup names specified."
             self._mc_print_error_caller(msg, mc_error_info_up_level)
+            return
+
+        cr._mc_setattr_impl(
+            self, current_env, attr_name, MC_NO_VALUE, cr.env_factory.eg_none, mc_overwrite_property, mc_set_unknown, False, mc_error_info_up_level + 1)
+
+    def setattrs(self, attr_env_values, *, mc_overwrite_property=False, mc_set_unknown=False, mc_force=False, mc_error_info_up_level=2):
+        """Set env specific values for many attributes.
+
+        This is equivalent to calling `setattr` for each attribute, e.g.::
+
+            item.setattrs({'aa': dict(default=1, prod=2), 'bb': dict(default=3, prod=4)})
+
+        but the env/group names are only validated, and the most specific env or group only resolved, once for all attributes which
+        are given values for the same env/group names. If the item class overrides `setattr`, then the override is called for each
+        attribute instead, so that it sees all the values set.
+
+        Arguments:
+            attr_env_values (dict[attr_name]->dict[env-name]->value): The env specific values to assign for each attribute.
+            mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level: See `setattr`. Apply to all the attributes.
+        """
+
+        if type(self).setattr is not _ConfigBase.setattr:
+            for attr_name, env_values in attr_env_values.items():
+                self.setattr(
+                    attr_name, mc_overwrite_property=mc_overwrite_property, mc_set_unknown=mc_set_unknown, mc_force=mc_force,
+                    mc_error_info_up_level=mc_error_info_up_level + 1, **env_values)
+            return
+
+        current_env = thread_local.env
+        envs = current_env.envs if isinstance(current_env, _McEnvSet) else (current_env,)
+
+        resolved = {}  # tuple of env/group names -> list of (env, result of '_mc_resolve_env_group')
+        for attr_name, env_values in attr_env_values.items():
+            if not self._mc_check_setattr_name(attr_name, mc_error_info_up_level + 1):
+                continue
+
+            names = tuple(env_values)
+            env_egs = resolved.get(names)
+            if env_egs is None:
+                self._mc_validate_env_group_names(names, mc_error_info_up_level + 1)
+                env_egs = resolved[names] = [(env, self._mc_resolve_env_group(env, env_values)) for env in envs]
+
+            for env, eg in env_egs:
+                self._mc_setattr_resolved_env_value(
+                    env, attr_name, env_values, eg, mc_overwrite_property, mc_set_unknown, mc_force, mc_error_info_up_level + 1)
 
     def getattr(self, attr_name, env):
         """Get the attribute value for the specified env.
@@ -874,7 +1115,8 @@ class _ConfigBase():
         """
 
         with_types = with_types or (ConfigItem, RepeatableDict)
-        for key, item in self.__dict__.items():
+        # Iterate a copy, items may be added by loading other envs in the background (see `warm_up`)
+        for key, item in list(self.__dict__.items()):
             if not key.startswith('_') and isinstance(item, with_types) and (item or with_excluded) and not key in self._mc_attributes:
                 yield key, item
 
@@ -888,7 +1130,11 @@ class _ConfigBase():
 
     @property
     def env(self):
-        return thread_local.env
+        env = thread_local.env
+        if isinstance(env, _McEnvSet):
+            msg = "Trying to access 'env' while loading with 'single_pass' for {env_set}. The config must not depend on the current env when loading with 'single_pass'."
+            raise ConfigApiException(msg.format(env_set=env))
+        return env
 
     @property
     def env_factory(self):
@@ -1016,19 +1262,19 @@ class AbstractConfigItem(_ConfigBase):  # TODO metaclass=abc.ABCMeta
         return super().__new__(cls)
 
     def __init__(self, mc_key=None, mc_include=None, mc_exclude=None):
-        previous_item = _ConfigBase._mc_last_item
+        previous_item = thread_local.last_item
         try:
             self._mc_freeze_previous(mc_error_info_up_level=None)
         except Exception as ex:
             print("Exception validating previously defined object -", file=sys.stderr)
-            print("  type:", type(_ConfigBase._mc_last_item or previous_item), file=sys.stderr)
+            print("  type:", type(thread_local.last_item or previous_item), file=sys.stderr)
             print("Stack trace will be misleading!", file=sys.stderr)
             print("This happens if there is an error (e.g. attributes with value MC_REQUIRED or missing '@required' ConfigItems) in", file=sys.stderr)
             print("an object that was not directly enclosed in a with statement. Objects that are not arguments to a with", file=sys.stderr)
             print("statement will not be validated until the next ConfigItem is declared or an outer with statement is exited.", file=sys.stderr)
             raise
 
-        _ConfigBase._mc_last_item = self
+        thread_local.last_item = self
 
         if not self._mc_contained_in:
             self._mc_handled_env_bits &= ~thread_local.env.mask
@@ -1039,18 +1285,31 @@ class AbstractConfigItem(_ConfigBase):  # TODO metaclass=abc.ABCMeta
 
     def _mc_select_envs(self, include, exclude):
         """Calculate whether to include or exclude item in env."""
+        current_env = thread_local.env
+        if isinstance(current_env, _McEnvSet):
+            # Loading with 'single_pass', item is excluded if it is excluded from all envs in the set
+            excluded = True
+            try:
+                for env in current_env.envs:
+                    thread_local.env = env
+                    if not self._mc_select_envs(include, exclude):
+                        excluded = False
+            finally:
+                thread_local.env = current_env
+            return excluded
+
         try:
-            selected = self._mc_root._mc_env_factory._mc_select_env_list(self.env, exclude or [], include or [])
+            selected = self._mc_root._mc_env_factory._mc_select_env_list(current_env, exclude or [], include or [])
         except AmbiguousEnvException as ex:
             msg = "{env} is specified in both include and exclude, with no single most specific group or direct env:"
             msg += "\n - from exclude: {egx}"
             msg += "\n - from include: {egi}"
-            ex = ConfigException(msg.format(env=self.env, egx=ex.ambiguous[0], egi=ex.ambiguous[1]))
+            ex = ConfigException(msg.format(env=current_env, egx=ex.ambiguous[0], egi=ex.ambiguous[1]))
             ex.__suppress_context__ = True
             raise ex
 
         if selected == 1 or (selected is None and include):
-            self._mc_handled_env_bits &= ~thread_local.env.mask
+            self._mc_handled_env_bits &= ~current_env.mask
             return True
 
         return False
@@ -1081,6 +1340,10 @@ class AbstractConfigItem(_ConfigBase):  # TODO metaclass=abc.ABCMeta
         except ConfigException as ex:
             self._mc_print_error_caller(str(ex), mc_error_info_up_level)
 
+        if self._mc_root._mc_single_pass and thread_local.hierarchy[-1] is self:
+            # Execute the rest of the 'with' block only for the envs in which self is included
+            thread_local.env = thread_local.env.narrowed(self._mc_handled_env_bits)
+
 
 class _RealConfigItemMixin():
     """Method definitions for non-ConfigBuilder classes"""
@@ -1158,8 +1421,8 @@ class ConfigItem(AbstractConfigItem, _RealConfigItemMixin):
 
     def __new__(cls, *init_args, **init_kwargs):
         # cls._mc_debug_hierarchy('ConfigItem.__new__')
-        contained_in = cls._mc_hierarchy[-1]
-        built_by = _ConfigBase._mc_in_build
+        contained_in = thread_local.hierarchy[-1]
+        built_by = thread_local.in_build
 
         # Find the first parent which is not a builder if we are in the mc_build method of a builder
         if contained_in._mc_where == Where.IN_MC_BUILD:
@@ -1182,7 +1445,7 @@ class ConfigItem(AbstractConfigItem, _RealConfigItemMixin):
                     self._mc_where = Where.IN_RE_INIT
                     return self
 
-                if _ConfigBase._mc_in_build and self._mc_built_by != _ConfigBase._mc_in_build:
+                if thread_local.in_build and self._mc_built_by != thread_local.in_build:
                     # We are trying to replace a non-repeatable in mc_build. In mc_build we ignore this.
                     self._mc_where = Where.IN_RE_INIT
                     return self
@@ -1234,7 +1497,7 @@ class RepeatableConfigItem(AbstractConfigItem, _RealConfigItemMixin):
 
     def __new__(cls, mc_key=None, *init_args, **init_kwargs):
         # cls._mc_debug_hierarchy('RepeatableConfigItem.__new__')
-        contained_in = cls._mc_hierarchy[-1]
+        contained_in = thread_local.hierarchy[-1]
         built_by = None
 
         # Find the first parent which is not a builder if we are in the mc_build method of a builder
@@ -1245,7 +1508,7 @@ class RepeatableConfigItem(AbstractConfigItem, _RealConfigItemMixin):
 
         repeatable = contained_in._mc_get_repeatable(cls.named_as(), cls)
 
-        if repeatable and isinstance(contained_in, DefaultItems):
+        if isinstance(contained_in, DefaultItems) and repeatable:
             msg = f"'{cls.__name__}' cannot be repeated under '{DefaultItems.__name__}'. " \
                 f"The first (and only) occurance of a '{RepeatableConfigItem.__name__}' instance is used to provide the default attribute values."
             raise ConfigException(msg)
@@ -1316,7 +1579,7 @@ class ConfigBuilder(_ConfigBuilderMixin, _UndeclaredRepeatableMixin, AbstractCon
 
     def __new__(cls, mc_key='default-builder', *init_args, **init_kwargs):
         # cls._mc_debug_hierarchy('ConfigBuilder.__new__')
-        contained_in = cls._mc_hierarchy[-1]
+        contained_in = thread_local.hierarchy[-1]
         built_by = None
 
         # Find the first parent which is not a builder if we are in the mc_build method of a builder
@@ -1370,13 +1633,19 @@ class ConfigBuilder(_ConfigBuilderMixin, _UndeclaredRepeatableMixin, AbstractCon
 
     def _mc_builder_freeze(self):
         self._mc_where = Where.IN_MC_BUILD
-        _ConfigBase._mc_last_item = None
-        was_in_build = _ConfigBase._mc_in_build
+        thread_local.last_item = None
+        was_in_build = thread_local.in_build
         try:
-            _ConfigBase._mc_in_build = self
-            self.mc_build()
+            thread_local.in_build = self
+            prof = self._mc_root._mc_load_profile
+            if prof is None:
+                self.mc_build()
+            else:
+                prof.start()
+                self.mc_build()
+                prof.stop('mc_build', thread_local.env, type(self))
         except _McExcludedException:
-            _ConfigBase._mc_in_build = was_in_build
+            thread_local.in_build = was_in_build
 
         # Now set all items created in the 'with' block of the builder on the items created in the 'mc_build' method
         for item_from_with_key, item_from_with in self.items(with_types=(ConfigItem, DefaultItems, RepeatableDict)):
@@ -1469,7 +1738,7 @@ class DefaultItems(_UndeclaredRepeatableMixin, _DefaultItemsMixin, AbstractConfi
 
     def __new__(cls):
         # cls._mc_debug_hierarchy('ConfigItem.__new__')
-        contained_in = cls._mc_hierarchy[-1]
+        contained_in = thread_local.hierarchy[-1]
 
         try:
             self = contained_in.__dict__[DefaultItems.name]
@@ -1516,10 +1785,15 @@ class DefaultItems(_UndeclaredRepeatableMixin, _DefaultItemsMixin, AbstractConfi
         thread_local.is_under_default_item = False
         return res
 
+
+# Methods of the multiconf item classes which must be bound to the proxy, as they use 'contained_in' or export the item through the proxy.
+# Other multiconf methods are called on the proxied item.
+_mc_proxy_bound_methods = frozenset(('find_contained_in', 'find_contained_in_or_none', 'find_attribute', 'find_attribute_or_none', 'to_dict'))
+
+
 class _ItemParentProxy():
     """The purpose of this is to set the current '_mc_contained_in' when accessing an item created by a builder and assigned under multiple parent items"""
     __slots__ = ('_mc_contained_in', '_mc_proxied_item')
-    _mc_lock = threading.RLock()
 
     def __init__(self, ci, item):
         object.__setattr__(self, '_mc_contained_in', ci)
@@ -1530,26 +1804,35 @@ class _ItemParentProxy():
             return object.__getattribute__(self, name)
 
         item = object.__getattribute__(self, '_mc_proxied_item')
-        _ItemParentProxy._mc_lock.acquire()
-        orig_ci = item._mc_contained_in
-        item._mc_contained_in = object.__getattribute__(self, '_mc_contained_in')
-        try:
+        item_cls = type(item)
+        # Find the class attribute without invoking the descriptor protocol, so that staticmethod and classmethod objects are not
+        # mistaken for plain functions
+        cls_attr = None
+        for cls in item_cls.__mro__:
+            cls_attr = cls.__dict__.get(name)
+            if cls_attr is not None:
+                break
+        if isinstance(cls_attr, property) or (isinstance(cls_attr, _McPropertyWrapper) and name not in item.__dict__) or (
+                isinstance(cls_attr, FunctionType) and (cls_attr.__module__ != __name__ or name in _mc_proxy_bound_methods)):
+            # Evaluate @property methods and bind user defined methods with the proxy as 'self', so that they see the proxy parent as
+            # 'contained_in', also in the methods they call. The shared item is not modified, so no locking is needed.
+            attr = cls_attr.__get__(self, item_cls)
+        else:
             attr = getattr(item, name)
-            if isinstance(attr, AbstractConfigItem) and not isinstance(attr, _ItemParentProxy):
-                return _mc_item_parent_proxy_factory(self, attr)
-            return attr
-        finally:
-            item._mc_contained_in = orig_ci
-            _ItemParentProxy._mc_lock.release()
+
+        if isinstance(attr, AbstractConfigItem) and not isinstance(attr, _ItemParentProxy):
+            return _mc_item_parent_proxy_factory(self, attr)
+        return attr
 
     def __setattr__(self, attr_name, value):
         if attr_name[0] == '_':
             object.__setattr__(self._mc_proxied_item, attr_name, value)
             return
 
-        cr = self._mc_proxied_item._mc_root
-        self._mc_proxied_item._mc_setattr(
-            thread_local.env, attr_name, value, cr.env_factory.default, False, False, False, mc_error_info_up_level=3, is_assign=True)
+        item = self._mc_proxied_item
+        cr = item._mc_root
+        cr._mc_setattr_impl(
+            item, thread_local.env, attr_name, value, cr.env_factory.default, False, False, False, mc_error_info_up_level=3, is_assign=True)
 
     def __enter__(self):
         return self._mc_proxied_item.__enter__()
@@ -1565,8 +1848,13 @@ class _ItemParentProxy():
 
 
 def _mc_item_parent_proxy_factory(ci, item):
-    cls_name = 'ItemParentProxy:<' + type(item).__module__ + '.' + type(item).__name__ + '>'
-    ItemParentProxy = type(cls_name, (_ItemParentProxy,), {})
+    item_cls = type(item)
+    try:
+        # Only look in the class itself, a derived class must get its own proxy class
+        ItemParentProxy = object.__getattribute__(item_cls, '_mc_item_parent_proxy_cls')
+    except AttributeError:
+        cls_name = 'ItemParentProxy:<' + item_cls.__module__ + '.' + item_cls.__name__ + '>'
+        ItemParentProxy = item_cls._mc_item_parent_proxy_cls = type(cls_name, (_ItemParentProxy,), {})
     return ItemParentProxy(ci, item)
 
 
@@ -1585,6 +1873,36 @@ def proxy_insert(parent, item_key, item):
     object.__setattr__(parent, item_key, _mc_item_parent_proxy_factory(parent, item))
 
 
+class _ChildKind(Enum):
+    ITEM = 1  # Item, builder or DefaultItems (may be a reference to an item which is not contained in the parent)
+    PROXY = 2  # _ItemParentProxy for an item from the 'with' block of a builder
+    REPEATABLE = 3
+    VALUE = 4  # Private value stored directly in the item __dict__
+
+
+def _mc_child_entries(item):
+    """Yield (key, _ChildKind, val) for the entries in the __dict__ of 'item', leaving out multiconf internals and attributes.
+
+    This is the single place which knows how nested items are stored, for the tree walks in tree_export, config_image, dict_output and
+    config_diff. RepeatableDicts are yielded as they are, use 'all_items' to get the entries for all envs.
+    """
+
+    attributes = item._mc_attributes
+    for key, val in item.__dict__.items():
+        if key.startswith('_mc_') or key in attributes:
+            continue
+
+        typ = type(val)
+        if typ is RepeatableDict:
+            yield key, _ChildKind.REPEATABLE, val
+        elif issubclass(typ, _ItemParentProxy):
+            yield key, _ChildKind.PROXY, val
+        elif issubclass(typ, _ConfigBase):
+            yield key, _ChildKind.ITEM, val
+        else:
+            yield key, _ChildKind.VALUE, val
+
+
 class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
     """Class of root object allocated by the 'mc_config' decorator.
 
@@ -1613,18 +1931,27 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
         self._mc_config_loaded = False
         self._mc_in_post_validate = False
         self._mc_config_post_validated = False
-        self._mc_in_json = False
         self._mc_json_errors = 0
         self._mc_check_unknown = True
         self._mc_lazy_load = False
+        self._mc_single_pass = False
+        self._mc_env_set_stack = []
         self._mc_root_proxies = {}
         self._mc_error_envs = []
 
-        # Make sure _mc_setattr is the real one if decorator is used multiple times
-        _ConfigBase._mc_setattr = _ConfigBase._mc_setattr_real
+        # The _mc_setattr implementation used for items in this config, replaced when attribute setting is not allowed
+        self._mc_setattr_impl = _ConfigBase._mc_setattr_real
+        # The attribute read implementation used for items in this config, replaced while warming up and when sealed
+        self._mc_getattr_impl = _McAttributeAccessor._mc_get
 
         self._mc_do_type_check = True
         self._mc_do_validate_properties = True
+        self._mc_validate_properties_parallel = None
+        self._mc_capture_locations = True
+        self._mc_load_profile = None
+        self._mc_warm_up = None
+        self._mc_load_time_ns = None
+        self._mc_module_stamps = None
 
         if env_factory is None:
             # Single environment config, create a dummy env named 'single'
@@ -1652,6 +1979,11 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
     def mc_config_result(self):
         return self._mc_config_result[self.env]
 
+    @property
+    def mc_load_profile(self):
+        """The `load_profile.LoadProfile` collected when loading with 'profile=True', else None."""
+        return self._mc_load_profile
+
     def __bool__(self):
         return True
 
@@ -1659,16 +1991,16 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
         _mc_debug("\n==== Loading", env, "====")
         rp = _RootEnvProxy(env, self)
         thread_local.env = env
-        del self.__class__._mc_hierarchy[:]
-        _ConfigBase._mc_last_item = None
-        _ConfigBase._mc_in_build = None
+        thread_local.hierarchy = []
+        thread_local.last_item = None
+        thread_local.in_build = None
 
         return rp
 
     def _mc_post_successful_load_one_env(self, env, result, root_proxy):
         self._mc_handled_env_bits |= env.mask
         self._mc_call_mc_validate_recursively(env)
-        if self._mc_do_validate_properties:
+        if self._mc_do_validate_properties and not self._mc_validate_properties_parallel:
             _mc_debug("\n==== Validating @properties", env, "====")
             self._mc_validate_properties_recursively(env)
             if self._mc_num_property_errors:
@@ -1680,27 +2012,69 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
 
     def _mc_load_one_env(self, env):
         rp = self._mc_pre_load_one_env(env)
+        prof = self._mc_load_profile
         try:
+            if prof is not None:
+                prof.reset_stack()
+                prof.start()
             with self:
                 res = self._mc_conf_func(self)
+            if prof is not None:
+                prof.stop('config', env, type(self))
             self._mc_post_successful_load_one_env(env, res, rp)
         except ConfigException as ex:
-            if not self._mc_error_next_env or ex.is_fatal:
-                raise
+            self._mc_handle_env_error(ex, env)
 
-            if not ex.is_summary:
-                traceback.print_exc(file=sys.stderr)
-            else:
-                print(ex.__class__.__name__ + ':', ex, file=sys.stderr)
-            print("Error in config for {} above.\n".format(env), file=sys.stderr)
+    def _mc_handle_env_error(self, ex, env):
+        """Must be called from an 'except' clause handling ex"""
+        if not self._mc_error_next_env or ex.is_fatal:
+            raise  # pylint: disable=misplaced-bare-raise
 
-            self._mc_error_envs.append(env)
+        if not ex.is_summary:
+            traceback.print_exc(file=sys.stderr)
+        else:
+            print(ex.__class__.__name__ + ':', ex, file=sys.stderr)
+        print("Error in config for {} above.\n".format(env), file=sys.stderr)
+
+        self._mc_error_envs.append(env)
+
+    def _mc_load_envs_single_pass(self, envs):
+        """Execute the config function once for all envs, then validate each env."""
+        env_set = _McEnvSet(envs)
+        _mc_debug("\n==== Loading", env_set, "====")
+        thread_local.env = env_set
+        thread_local.hierarchy = []
+        thread_local.last_item = None
+        thread_local.in_build = None
+
+        self._mc_single_pass = True
+        self._mc_setattr_impl = _ConfigBase._mc_setattr_env_set
+        prof = self._mc_load_profile
+        try:
+            if prof is not None:
+                prof.start()
+            with self:
+                res = self._mc_conf_func(self)
+            if prof is not None:
+                prof.stop('config', env_set, type(self))
+        finally:
+            self._mc_setattr_impl = _ConfigBase._mc_setattr_real
+            self._mc_single_pass = False
+            del self._mc_env_set_stack[:]
+
+        for env in envs:
+            rp = _RootEnvProxy(env, self)
+            try:
+                self._mc_post_successful_load_one_env(env, res, rp)
+            except ConfigException as ex:
+                self._mc_handle_env_error(ex, env)
 
     def load(
             self,
             error_next_env=False, validate_properties=True,
             todo_handling_other=McTodoHandling.ERROR, todo_handling_allowed=McTodoHandling.WARNING,
-            do_type_check=True, do_post_validate=True, lazy_load=False):
+            do_type_check=True, do_post_validate=True, lazy_load=False, single_pass=False, parallel=None, snapshot_file=None,
+            capture_locations=True, validate_properties_parallel=None, profile=False, warm_up=None):
 
         """Load configuration (execute the function which was decorated using `mc_config` for each env defined in the env_factory).
 
@@ -1732,6 +2106,45 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
                 pre-instantiated for all envs in order to validate correctness of the configuration for all envs. Enabling lazy_load also disables
                 `mc_post_validate` calls and other checking which cannot be done with lazy loading.
 
+            single_pass (bool): Execute the config function only once, loading all envs simultaneously, instead of executing it once for each env.
+                Assignments and `setattr` calls assign the value resolved for each env, and `mc_include`, `mc_exclude` and `mc_select_envs` limit
+                the envs for which the 'with' block of an item is executed. Since there is no single current env, the config function and the
+                `mc_init` and `mc_build` methods may not depend on the current env, i.e. they may not use `item.env`, read attributes which
+                have env specific values or access repeatable items which are excluded in some envs; a ConfigApiException is raised if they do.
+                `mc_validate`, validation of @property methods and `mc_post_validate` are called exactly as without `single_pass`.
+                Errors found while executing the config function apply to all envs, so they are raised regardless of `error_next_env`.
+                Cannot be combined with `lazy_load`.
+
+            parallel (int): Load envs in 'parallel' worker processes, each executing the config function, `mc_validate` and validation of
+                @property methods for a subset of the envs. The loaded envs are merged back into this config in env order, and output and errors
+                are reported in env order, as if the envs were loaded sequentially. `mc_post_validate` is called in this process after merging.
+                Requires the 'fork' multiprocessing start method. Item classes must be defined before `load` is called and attribute values,
+                private attributes and the config function result must be picklable (references to items and envs are handled).
+                Cannot be combined with `lazy_load` or `single_pass`.
+
+            snapshot_file (str): Restore the configuration from this snapshot file, without executing the config function, if the snapshot is
+                valid for the current sources of the config function and item class modules and the current env factory. Otherwise load the
+                configuration and save a new snapshot to the file. `mc_post_validate` is not called when restoring a snapshot.
+                See `snapshot.save_snapshot` for the requirements for saving a snapshot. If the snapshot can not be saved, e.g. because a value
+                is not picklable, a warning is printed and the file is not written.
+                Cannot be combined with `lazy_load`.
+
+            capture_locations (bool): Remember where attributes which did not yet receive a final value (e.g. set to MC_REQUIRED in __init__)
+                were set, so that the error message for a value which is never provided points to that line. Setting this to False saves the
+                stack inspection for trusted, already validated configurations; such errors are then reported for the line defining the item.
+
+            validate_properties_parallel (int): Defer validation of @property methods until all envs are loaded, then validate the envs in
+                'validate_properties_parallel' worker processes. Output, error counts and errors are reported in env order, as if the envs were
+                validated sequentially, but after `mc_validate` has been called for all envs. Requires the 'fork' multiprocessing start method.
+                Ignored if 'validate_properties' is False. Cannot be combined with `lazy_load`.
+
+            profile (bool): Collect wall time and call counts per load phase, env and item class, available as `mc_load_profile` after loading.
+                See `load_profile.LoadProfile`. When lazy loading, envs loaded later are added to the profile.
+
+            warm_up (bool or list of Env or EnvGroup): Requires `lazy_load`. When the first env is instantiated, it is loaded as with `lazy_load`,
+                and the remaining envs are then loaded in a background thread, the envs in 'warm_up' (if it is a list) first, in the order given.
+                `mc_post_validate` is called when all envs are loaded. Use `loaded_future` to wait for envs to be loaded. See `warm_up`.
+
         Returns self: This makes it possible to load and get an instantion in a one liner, e.g.::
 
             config.load()(prod)
@@ -1740,8 +2153,24 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
         if self._mc_config_loaded:
             raise ConfigApiException("Configuration can only be loaded once.")
 
+        if single_pass and (lazy_load or self._mc_lazy_load):
+            raise ConfigApiException("'single_pass' cannot be used with 'lazy_load'.")
+
+        if parallel and (lazy_load or self._mc_lazy_load or single_pass):
+            raise ConfigApiException("'parallel' cannot be used with 'lazy_load' or 'single_pass'.")
+
+        if snapshot_file and (lazy_load or self._mc_lazy_load):
+            raise ConfigApiException("'snapshot_file' cannot be used with 'lazy_load'.")
+
+        if validate_properties_parallel and (lazy_load or self._mc_lazy_load):
+            raise ConfigApiException("'validate_properties_parallel' cannot be used with 'lazy_load'.")
+
+        if warm_up and not (lazy_load or self._mc_lazy_load):
+            raise ConfigApiException("'warm_up' requires 'lazy_load'.")
+
         self._mc_error_next_env = error_next_env
         self._mc_do_validate_properties = validate_properties
+        self._mc_validate_properties_parallel = validate_properties_parallel if validate_properties_parallel and validate_properties_parallel > 1 else None
 
         if not isinstance(todo_handling_other, McTodoHandling):
             msg = "'todo_handling_other' arg must be instance of {th_typ!r}; found type {got_typ!r}: {val!r}"
@@ -1755,34 +2184,175 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
         self._mc_todo_handling_allowed = todo_handling_allowed
 
         self._mc_do_type_check = do_type_check
+        self._mc_capture_locations = capture_locations
+        self._mc_load_profile = load_profile.LoadProfile() if profile else None
+
+        self._mc_load_args = dict(
+            error_next_env=error_next_env, validate_properties=validate_properties,
+            todo_handling_other=todo_handling_other, todo_handling_allowed=todo_handling_allowed,
+            do_type_check=do_type_check, do_post_validate=do_post_validate, lazy_load=lazy_load, single_pass=single_pass, parallel=parallel,
+            snapshot_file=snapshot_file, capture_locations=capture_locations, validate_properties_parallel=validate_properties_parallel,
+            profile=profile, warm_up=warm_up)
+        # The modules are stamped when first checking for changes, modules modified after this are changed, see `changed_modules`
+        self._mc_load_time_ns = time.time_ns()
+        self._mc_module_stamps = None
 
         self._mc_lazy_load |= lazy_load
+        if warm_up:
+            self._mc_warm_up = WarmUp(self, () if warm_up is True else warm_up)
+            self._mc_getattr_impl = _McAttributeAccessor._mc_get_warming_up
+
         # Load envs
         if not self._mc_lazy_load:
+            if snapshot_file and snapshot.restore_snapshot(self, snapshot_file):
+                thread_local.env = MC_NO_ENV
+                self._mc_config_loaded = True
+                self._mc_setattr_impl = _ConfigBase._mc_setattr_disabled
+                self._mc_config_post_validated = True
+                return self
+
             self._mc_root_proxies[MC_NO_ENV] = self
-            for env in self._mc_env_factory.envs.values():
-                self._mc_load_one_env(env)
+            if single_pass:
+                self._mc_load_envs_single_pass(list(self._mc_env_factory.envs.values()))
+            elif parallel and parallel > 1:
+                tree_export.load_envs_parallel(self, list(self._mc_env_factory.envs.values()), parallel)
+            else:
+                for env in self._mc_env_factory.envs.values():
+                    self._mc_load_one_env(env)
+
+            if self._mc_do_validate_properties and self._mc_validate_properties_parallel:
+                _mc_debug("\n==== Validating @properties in parallel ====")
+                envs = [env for env in self._mc_env_factory.envs.values() if env not in self._mc_error_envs]
+                tree_export.validate_properties_parallel(self, envs, self._mc_validate_properties_parallel)
+                thread_local.env = MC_NO_ENV
 
             if self._mc_error_envs:
                 raise ConfigException("The following envs had errors {}".format(self._mc_error_envs))
 
-            # No modifications are allowed after this
-            self._mc_config_loaded = True
-            _ConfigBase._mc_setattr = _ConfigBase._mc_setattr_disabled
+            self._mc_post_load_all_envs(do_post_validate)
 
-            if do_post_validate:
-                self._mc_in_post_validate = True
-                # Call mc_post_validate
-                thread_local.env = MC_NO_ENV
-                _mc_debug("\n==== Calling 'mc_post_validate' ====")
-                self._mc_call_mc_post_validate_recursively()
-                self._mc_in_post_validate = False
+            if snapshot_file:
+                try:
+                    snapshot.save_snapshot(self, snapshot_file)
+                except ConfigApiException as ex:
+                    # The configuration is loaded, only the snapshot is missing
+                    print(_warning_msg("{} The snapshot file '{}' was not written.".format(ex, snapshot_file)), file=sys.stderr)
 
-            self._mc_config_post_validated = True
+        self._mc_config_loaded = True
+        return self
 
+    def _mc_post_load_all_envs(self, do_post_validate):
+        # No modifications are allowed after this
         self._mc_config_loaded = True
+        self._mc_setattr_impl = _ConfigBase._mc_setattr_disabled
+
+        if do_post_validate:
+            self._mc_in_post_validate = True
+            # Call mc_post_validate
+            thread_local.env = MC_NO_ENV
+            _mc_debug("\n==== Calling 'mc_post_validate' ====")
+            if self._mc_load_profile is not None:
+                self._mc_load_profile.reset_stack()
+            self._mc_call_mc_post_validate_recursively()
+            self._mc_in_post_validate = False
+
+        self._mc_config_post_validated = True
+
+    def _mc_post_warm_up(self):
+        """Called in the warm up thread when all envs have been loaded."""
+        self._mc_post_load_all_envs(self._mc_load_args['do_post_validate'])
+        self._mc_root_proxies[MC_NO_ENV] = self
+        self._mc_lazy_load = False
+        self._mc_getattr_impl = _McAttributeAccessor._mc_get
+
+    def loaded_future(self, env=None):
+        """Return (concurrent.futures.Future): The future for 'env' being loaded, or all envs if 'env' is None, when loading with 'warm_up'.
+
+        The result is the configuration instantiated for 'env', or the configuration itself when all envs are loaded and `mc_post_validate`
+        has been called. If loading fails, the future holds the exception.
+        """
+        if self._mc_warm_up is None:
+            raise ConfigApiException("'loaded_future' requires loading with 'warm_up'.")
+        if env is None:
+            return self._mc_warm_up.all_loaded
+        if env.factory != self._mc_env_factory:
+            raise ConfigApiException("The env {} must be from the 'env_factory' specified for 'mc_config'.".format(env))
+        return self._mc_warm_up.futures[env]
+
+    def seal(self):
+        """Make reading attributes of the loaded configuration faster.
+
+        Reading an attribute of a sealed configuration only looks up the value for the current env. The value is not marked as used and not
+        checked for `MC_TODO`, this is only needed while loading, so a configuration with `MC_TODO` values can not be sealed.
+        The configuration must be loaded for all envs, i.e. not loaded with 'lazy_load', or loaded with 'warm_up' and all envs loaded.
+
+        Return (McConfigRoot): self
+        """
+
+        if not self._mc_config_loaded or self._mc_lazy_load:
+            raise ConfigApiException("Only a configuration which is loaded for all envs can be sealed.")
+
+        todo_envs = [env for env, msgs in self._mc_todo_msgs.items() if msgs]
+        if todo_envs:
+            raise ConfigApiException("A configuration with {} values can not be sealed, found in {}.".format(MC_TODO.name, todo_envs))
+
+        self._mc_getattr_impl = _McAttributeAccessor._mc_get_sealed
         return self
 
+    def changed_modules(self):
+        """Return list of names of the modules the configuration was loaded from, which were modified after it was loaded.
+
+        See `config_reload` for which modules are tracked. The modules are found and stamped when this is first called, not when loading.
+        """
+        if not self._mc_config_loaded or self._mc_load_time_ns is None:
+            raise ConfigApiException("Configuration must be loaded before checking for changed modules.")
+        if self._mc_module_stamps is None:
+            self._mc_module_stamps = config_reload.module_stamps(self._mc_conf_func.__module__, self._mc_load_time_ns)
+        return config_reload.changed_modules(self._mc_module_stamps)
+
+    def reimport_and_load(self):
+        """Re-import the modules the configuration was loaded from and load a new configuration, if any of them were modified after loading.
+
+        This is not a reload of the changed parts of the configuration, nothing is reused from this configuration (see `config_reload`).
+        The changed modules and the modules depending on them are re-imported (using `importlib.reload`), and a new configuration is created from
+        the re-imported config function and loaded for all envs with the same arguments as this configuration. If a configuration for the
+        re-imported config function is created when re-importing the module, e.g. with `mc_config(..., load_now=True)`, that configuration is used.
+        The config function must be defined at module level, so that it can be found in the re-imported module.
+
+        This configuration is not modified, so it can still be used if loading the new configuration fails. Its items are instances of the
+        classes from before the re-import, so e.g. `isinstance` checks against the re-imported classes fail for them. Only the returned
+        configuration should be used with the re-imported modules.
+
+        Return (McConfigRoot): This configuration if no modules were changed, otherwise the new configuration.
+        """
+
+        changed = self.changed_modules()
+        if not changed:
+            return self
+
+        conf_func = self._mc_conf_func
+        if not isinstance(config_reload.reloaded_function(conf_func), (FunctionType, McConfigRoot)):
+            msg = "The config function '{}' is not defined at module level in '{}', it can not be re-imported."
+            raise ConfigApiException(msg.format(conf_func.__qualname__, conf_func.__module__))
+
+        deps = config_reload.module_dependencies(conf_func.__module__)
+        config_reload.reload_modules(config_reload.reload_order(changed, deps))
+
+        # Use the configuration created for the re-imported config function when re-importing the module, or create a new configuration
+        conf = config_reload.reloaded_function(conf_func)
+        if isinstance(conf, FunctionType):
+            func = conf
+            module_vars = vars(sys.modules[conf_func.__module__]).values()
+            conf = next((val for val in module_vars if isinstance(val, McConfigRoot) and val._mc_conf_func is func), None)
+            if conf is None:
+                env_factory = None if self._mc_is_single_env else self._mc_env_factory
+                conf = McConfigRoot(self._mc_json_filter, self._mc_json_fallback, env_factory, func)
+
+        if not conf._mc_config_loaded:
+            conf.load(**self._mc_load_args)
+        conf._mc_module_stamps = config_reload.module_stamps(conf._mc_conf_func.__module__)
+        return conf
+
     def __call__(self, env, allow_todo=False):
         """Get the configuration instantiated for the specified env.
 
@@ -1806,12 +2376,10 @@ class McConfigRoot(_ConfigBase, _RealConfigItemMixin):
             if env.factory != self._mc_env_factory:
                 raise ConfigException("The selected env {} must be from the 'env_factory' specified for 'mc_config'.".format(env))
 
-            if self._mc_lazy_load:
+            if self._mc_warm_up is not None:
+                rp = self._mc_warm_up.load_env(env)
+            elif self._mc_lazy_load:
                 self._mc_check_unknown = True
-
-                # Make sure _mc_setattr is the real one if decorator is used multiple times
-                _ConfigBase._mc_setattr = _ConfigBase._mc_setattr_real
-
                 self._mc_load_one_env(env)
                 rp = _RootEnvProxy(env, self)
             else:
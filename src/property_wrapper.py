@@ -1,9 +1,16 @@
 # Copyright (c) 2016 Lars Hupfeldt Nielsen, Hupfeldt IT
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
+from typing import Dict, Tuple
 
 from .thread_state import thread_local
-from .config_errors import ConfigAttributeError, failed_property_call_msg
+from .envs import _McEnvSet
+from .config_errors import ConfigAttributeError, ConfigApiException, failed_property_call_msg
+from .json_output import _mc_filter_out_keys
+
+
+# cls -> tuple of names of user defined @property methods
+_cls_property_names: Dict[type, Tuple[str, ...]] = {}
 
 
 class _McPropertyWrapper():
@@ -26,6 +33,9 @@ class _McPropertyWrapper():
             current_env = thread_local.env
             if current_env in env_values:
                 return env_values[current_env]
+            if isinstance(current_env, _McEnvSet) and env_values:
+                msg = "Trying to access @property '{prop_name}' which is overwritten with env specific values while loading with 'single_pass' for {env_set}."
+                raise ConfigApiException(msg.format(prop_name=self.prop_name, env_set=current_env))
 
         try:
             return self.prop.__get__(obj, objtype)
@@ -35,3 +45,24 @@ class _McPropertyWrapper():
             except:
                 msg = failed_property_call_msg.format(attr=self.prop_name, env=current_env, ex=repr(type(ex)))
             raise ConfigAttributeError(obj, self.prop_name, msg=msg)
+
+
+def property_names(cls):
+    """Names of the user defined @property methods of 'cls' (including inherited), cached per class."""
+    try:
+        return _cls_property_names[cls]
+    except KeyError:
+        pass
+
+    names = []
+    seen = set()
+    for base in cls.__mro__:
+        for name, val in base.__dict__.items():
+            if name in seen:
+                continue
+            seen.add(name)
+            if not name.startswith(('_', 'mc_')) and name not in _mc_filter_out_keys and isinstance(val, (property, _McPropertyWrapper)):
+                names.append(name)
+
+    names = _cls_property_names[cls] = tuple(names)
+    return names
@@ -1,7 +1,26 @@
 # Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
-from .config_errors import ConfigExcludedKeyError
+from .thread_state import thread_local
+from .envs import _McEnvSet
+from .config_errors import ConfigExcludedKeyError, ConfigApiException
+
+
+def _mc_exists_in_env_set(val, key, env_set):
+    """Check if item exists in all envs in env_set (loading with 'single_pass').
+
+    Raises ConfigApiException if the item exists in some, but not all of the envs, as the result would be env specific.
+    """
+
+    bits = val._mc_handled_env_bits & env_set.mask
+    if bits == env_set.mask:
+        return True
+    if not bits:
+        return False
+
+    msg = "Trying to access repeatable item '{key}' which is excluded from some envs while loading with 'single_pass' for {env_set}. " \
+        "The config must not depend on env specific items when loading with 'single_pass'."
+    raise ConfigApiException(msg.format(key=key, env_set=env_set))
 
 
 class AndTrue():
@@ -18,27 +37,59 @@ class RepeatableDict():
 
     _mc_handled_env_bits = AndTrue()
 
-    __slots__ = ('_all_items',)  # Referenced in multiconf.py
+    __slots__ = ('_all_items', '_mc_env_index')  # Referenced in multiconf.py
     __class__ = dict  # type: ignore
 
     def __init__(self):
         self._all_items = {}
+        # env mask -> list of (key, item) existing in env. Only used for envs which are completely loaded, as the membership is then fixed.
+        self._mc_env_index = {}
+
+    def _mc_exists(self, key, val):
+        env = thread_local.env
+        if isinstance(env, _McEnvSet):
+            return _mc_exists_in_env_set(val, key, env)
+        return val._mc_exists_in_env()
+
+    def _mc_items(self):
+        """Return list of (key, item) for items existing in the current env."""
+        env = thread_local.env
+        env_mask = env.mask
+        try:
+            return self._mc_env_index[env_mask]
+        except KeyError:
+            pass
+
+        if isinstance(env, _McEnvSet):
+            return [(key, val) for key, val in self._all_items.items() if _mc_exists_in_env_set(val, key, env)]
+
+        if env_mask == 0:
+            return list(self._all_items.items())
+
+        items = [(key, val) for key, val in self._all_items.items() if val._mc_handled_env_bits & env_mask]
+        for val in self._all_items.values():
+            if val._mc_root._mc_handled_env_bits & env_mask:
+                # The env is loaded
+                self._mc_env_index[env_mask] = items
+            break
+
+        return items
 
     def __getitem__(self, key):
         val = self._all_items[key]
-        if val._mc_exists_in_env():
+        if self._mc_exists(key, val):
             return val
         raise ConfigExcludedKeyError(val, key)
 
     def __contains__(self, key):
         val = self._all_items.get(key)
-        if val is not None and val._mc_exists_in_env():
+        if val is not None and self._mc_exists(key, val):
             return True
         return False
 
     def get(self, key, default=None):
         val = self._all_items.get(key)
-        if val is not None and val._mc_exists_in_env():
+        if val is not None and self._mc_exists(key, val):
             return val
         return default
 
@@ -52,33 +103,21 @@ class RepeatableDict():
         yield from self.keys()
 
     def items(self):
-        for key, val in self._all_items.items():
-            if val._mc_exists_in_env():
-                yield key, val
+        yield from self._mc_items()
 
     def keys(self):
-        for key, val in self._all_items.items():
-            if val._mc_exists_in_env():
-                yield key
+        for key, _ in self._mc_items():
+            yield key
 
     def values(self):
-        for _, val in self._all_items.items():
-            if val._mc_exists_in_env():
-                yield val
+        for _, val in self._mc_items():
+            yield val
 
     def __len__(self):
-        count = 0
-        for _, val in self._all_items.items():
-            if val._mc_exists_in_env():
-                count += 1
-        return count
+        return len(self._mc_items())
 
     def __bool__(self):
-        for _, val in self._all_items.items():
-            if val._mc_exists_in_env():
-                return True
-
-        return False
+        return bool(self._mc_items())
 
     def __repr__(self):
         return repr(dict(((key, val) for (key, val) in self._all_items.items() if val._mc_exists_in_env())))
@@ -0,0 +1,174 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Save a loaded configuration to a binary snapshot file and restore it without executing the config function.
+
+The snapshot file consists of a header with a magic string, the snapshot format version, the snapshot key and the length of the item class
+module names, followed by the names of the modules defining the classes of the items in the saved configuration and the zlib compressed
+exported envs (see `tree_export`).
+The key is a hash of the multiconf version, the source files of the module defining the config function and the user modules it references,
+directly or indirectly, through module globals (see `config_reload.module_dependencies`), the source files of the item class modules, and of
+the env factory definition. The item class modules are stored in the snapshot, as the items are not known before the snapshot is restored.
+A snapshot is only restored if the key matches, so changing the config sources, item classes or the envs invalidates the snapshot.
+"""
+
+import os
+import sys
+import importlib.util
+import struct
+import hashlib
+import pickle
+import zlib
+
+from .envs import MC_NO_ENV
+from .config_errors import ConfigApiException
+from . import tree_export
+from . import config_reload
+from . import multiconf as _mc
+
+
+_MAGIC = b'MCSNAP\n'
+_VERSION = 2
+_HEADER = struct.Struct('<7sI32sI')
+
+
+def item_class_modules(config):
+    """Return (list): Sorted names of the modules defining the classes of the items in the loaded 'config'."""
+    modules = set()
+    todo = [config]
+    while todo:
+        item = todo.pop()
+        modules.add(type(item).__module__)
+        for _, kind, val in _mc._mc_child_entries(item):
+            if kind is _mc._ChildKind.REPEATABLE:
+                # Proxied items are contained in the builder
+                todo.extend(ritem for ritem in val.all_items.values() if not issubclass(type(ritem), _mc._ItemParentProxy))
+            elif kind is _mc._ChildKind.ITEM and val._mc_contained_in is item:
+                todo.append(val)
+    return sorted(modules)
+
+
+def _module_file(mod_name):
+    mod = sys.modules.get(mod_name)
+    if mod is not None:
+        return getattr(mod, '__file__', None)
+
+    try:
+        spec = importlib.util.find_spec(mod_name)
+    except (ImportError, ValueError):
+        return None
+    return spec.origin if spec is not None and spec.has_location else None
+
+
+def _module_files(config, class_modules):
+    conf_func_module_name = config._mc_conf_func.__module__
+    modules = {tree_export.__name__, __name__, conf_func_module_name}
+    modules.update(config_reload.module_dependencies(conf_func_module_name))
+    modules.update(class_modules)
+
+    files = set()
+    for mod_name in modules:
+        mod_file = _module_file(mod_name)
+        if mod_file:
+            files.add(mod_file)
+    return sorted(files)
+
+
+def snapshot_key(config, class_modules=None):
+    """Return (bytes): The key for snapshots of 'config' with the current sources and env factory.
+
+    Arguments:
+        class_modules (list): Names of the modules defining the item classes, default `item_class_modules` of the loaded 'config'.
+    """
+    if class_modules is None:
+        class_modules = item_class_modules(config)
+
+    hh = hashlib.sha256()
+    hh.update(repr((_VERSION, sys.version_info[:2], sys.modules[__package__].__version__)).encode())
+
+    ef = config._mc_env_factory
+    hh.update(repr([(env.name, env.allow_todo) for env in ef.envs.values()]).encode())
+    hh.update(repr([(group.name, [member.name for member in group.members]) for group in ef.groups.values()]).encode())
+
+    for mod_file in _module_files(config, class_modules):
+        hh.update(mod_file.encode())
+        with open(mod_file, 'rb') as ff:
+            hh.update(ff.read())
+
+    return hh.digest()
+
+
+def save_snapshot(config, file_name):
+    """Save the loaded 'config' to 'file_name'.
+
+    The file is written to a temporary file which is then renamed, so that concurrent readers never see a partial snapshot.
+    Attribute values, private attributes, the config function result and the item classes must be picklable.
+    """
+
+    if not config._mc_config_loaded or config._mc_lazy_load:
+        raise ConfigApiException("Only a configuration which is loaded for all envs (without 'lazy_load') can be saved as a snapshot.")
+
+    try:
+        envs = [(env.name,) + tree_export.export_env(config, env) for env in config._mc_env_factory.envs.values()]
+    except (pickle.PicklingError, TypeError, AttributeError) as ex:
+        raise ConfigApiException("Cannot save snapshot of configuration: {}".format(ex)) from ex
+
+    class_modules = item_class_modules(config)
+    class_modules_data = '\n'.join(class_modules).encode()
+    data = _HEADER.pack(_MAGIC, _VERSION, snapshot_key(config, class_modules), len(class_modules_data)) + class_modules_data \
+        + zlib.compress(pickle.dumps(envs, protocol=pickle.HIGHEST_PROTOCOL))
+
+    tmp_file_name = '{}.{}.tmp'.format(file_name, os.getpid())
+    with open(tmp_file_name, 'wb') as ff:
+        ff.write(data)
+    os.replace(tmp_file_name, file_name)
+
+
+def _read_snapshot(config, file_name):
+    """Return list of (env name, structure, values) or None if the snapshot does not exist or is not valid for the current config."""
+    try:
+        with open(file_name, 'rb') as ff:
+            data = ff.read()
+    except FileNotFoundError:
+        return None
+
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, key, class_modules_size = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        return None
+
+    envs_offset = _HEADER.size + class_modules_size
+    try:
+        class_modules = data[_HEADER.size:envs_offset].decode().split('\n')
+    except UnicodeDecodeError:
+        return None
+    if key != snapshot_key(config, class_modules):
+        return None
+
+    try:
+        envs = pickle.loads(zlib.decompress(data[envs_offset:]))
+    except (zlib.error, pickle.UnpicklingError, EOFError):
+        return None
+
+    if [env_name for env_name, _, _ in envs] != list(config._mc_env_factory.envs):
+        return None
+    return envs
+
+
+def restore_snapshot(config, file_name):
+    """Restore the item tree of the not yet loaded 'config' from 'file_name', without executing the config function.
+
+    Return (bool): True if the snapshot was restored, False if it does not exist or is stale.
+    """
+
+    envs = _read_snapshot(config, file_name)
+    if envs is None:
+        return False
+
+    env_factory = config._mc_env_factory
+    for env_name, structure, values in envs:
+        tree_export.merge_env(config, env_factory.envs[env_name], structure, values, classes={})
+
+    config._mc_root_proxies[MC_NO_ENV] = config
+    return True
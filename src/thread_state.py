@@ -11,5 +11,13 @@ class ThreadState(threading.local):
         self.env = MC_NO_ENV
         self.is_under_default_item = False
 
+        # Set while creating json or dict output, attribute values are then not marked as used and setting attributes is not allowed
+        self.in_json = False
+
+        # Loading state. Configurations may be loaded concurrently in different threads.
+        self.hierarchy = []
+        self.last_item = None
+        self.in_build = None
+
 
 thread_local = ThreadState()
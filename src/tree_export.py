@@ -0,0 +1,488 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Export the env specific state of a loaded item tree and merge it into another tree with the same config.
+
+An export consists of two pickles:
+
+The structure:
+    The items existing in the env, with the env bits and the attribute names, as nested item records (see `_Exporter._item_record`).
+
+The values:
+    The attribute values for the env and the private (non '_mc') attributes, a flat list with one entry per item in walk order,
+    followed by the config function result and the TODO messages for the env.
+
+Items, item parent proxies, RepeatableDicts, envs and item classes are pickled as references, resolved when merging.
+
+The worker process handling is also used for validating @property methods of a loaded config in parallel.
+"""
+
+import io
+import sys
+import traceback
+import pickle
+import multiprocessing
+import multiprocessing.connection
+
+from .thread_state import thread_local
+from .envs import BaseEnv, MC_NO_ENV
+from .attribute import _McAttribute, _McAttributeAccessor, Where
+from .property_wrapper import _McPropertyWrapper
+from .repeatable import RepeatableDict
+from .config_errors import ConfigBaseException, ConfigException, ConfigApiException
+from . import multiconf as _mc
+
+
+def _config_classes():
+    """Return dict: id(cls) -> cls for all item classes. Classes are sent by id to worker processes, so that local classes can be used."""
+    classes = {}
+    todo = [_mc._ConfigBase]
+    while todo:
+        cls = todo.pop()
+        for sub in type.__subclasses__(cls):
+            if id(sub) not in classes:
+                classes[id(sub)] = sub
+                todo.append(sub)
+    return classes
+
+
+class _Pickler(pickle.Pickler):
+    def __init__(self, file, exporter):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.exporter = exporter
+        self.classes = exporter.classes or {}
+
+    def persistent_id(self, obj):
+        typ = type(obj)
+        if issubclass(typ, (_mc._ConfigBase, _mc._ItemParentProxy)):
+            return self.exporter.ref(obj)
+        if typ is RepeatableDict:
+            return ('repeatable',) + self.exporter.repeatable_refs[id(obj)]
+        if issubclass(typ, BaseEnv) and (obj is MC_NO_ENV or obj.factory is self.exporter.env_factory):
+            return ('env', obj.name)
+        if id(obj) in self.classes and self.classes[id(obj)] is obj:
+            return ('class', id(obj))
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, merger):
+        super().__init__(file)
+        self.merger = merger
+
+    def persistent_load(self, pid):
+        return self.merger.resolve(pid)
+
+
+class _Exporter():
+    def __init__(self, root, env, classes):
+        self.root = root
+        self.env = env
+        self.classes = classes
+        self.env_factory = root._mc_env_factory
+        self.paths = {}  # id(item) -> path
+        self.repeatable_refs = {}  # id(RepeatableDict) -> (owner ref, key)
+        self.items = []
+
+    def _assign_paths(self, item, path):
+        self.paths[id(item)] = path
+        self.items.append(item)
+        for key, kind, val in _mc._mc_child_entries(item):
+            if kind is _mc._ChildKind.REPEATABLE:
+                self.repeatable_refs[id(val)] = (path, key)
+                for mc_key, ritem in val.all_items.items():
+                    if not issubclass(type(ritem), _mc._ItemParentProxy):
+                        self._assign_paths(ritem, path + (('r', key, mc_key),))
+            elif kind is _mc._ChildKind.ITEM and val._mc_contained_in is item:
+                self._assign_paths(val, path + (('d', key),))
+
+    def ref(self, obj):
+        if issubclass(type(obj), _mc._ItemParentProxy):
+            return ('proxy', self.ref(obj._mc_contained_in), self.ref(obj._mc_proxied_item))
+
+        try:
+            return ('item', self.paths[id(obj)])
+        except KeyError:
+            msg = "Cannot export reference to item {item} which is not part of the configuration for env {env}."
+            raise ConfigApiException(msg.format(item=obj._mc_excl_repr(), env=self.env)) from None
+
+    def _item_record(self, item):
+        """Return (cls, env bits, where, built_by ref, is_default_value_item, attributes, entries)"""
+        attributes = []
+        for name, mc_attr in item._mc_attributes.items():
+            if self.env in mc_attr.env_values:
+                attributes.append((name, mc_attr.where_from, getattr(mc_attr, 'from_eg', None)))
+
+        entries = []
+        for key, kind, val in _mc._mc_child_entries(item):
+            if kind is _mc._ChildKind.REPEATABLE:
+                rentries = []
+                for mc_key, ritem in val.all_items.items():
+                    if issubclass(type(ritem), _mc._ItemParentProxy):
+                        rentries.append((mc_key, 'proxy', self.ref(ritem)))
+                    else:
+                        rentries.append((mc_key, 'item', self._item_record(ritem)))
+                entries.append((key, 'repeatable', rentries))
+            elif kind is _mc._ChildKind.PROXY:
+                entries.append((key, 'proxy', self.ref(val)))
+            elif kind is _mc._ChildKind.VALUE:
+                entries.append((key, 'value', None))
+            elif val._mc_contained_in is item:
+                entries.append((key, 'item', self._item_record(val)))
+
+        built_by = item._mc_built_by
+        return (
+            type(item), item._mc_handled_env_bits & self.env.mask, item._mc_where, self.ref(built_by) if built_by else None,
+            item._mc_is_default_value_item, attributes, entries)
+
+    def _values(self):
+        values = []
+        env = self.env
+        for item in self.items:
+            attr_values = {name: mc_attr.env_values[env] for name, mc_attr in item._mc_attributes.items() if env in mc_attr.env_values}
+            private_values = {key: val for key, kind, val in _mc._mc_child_entries(item) if kind is _mc._ChildKind.VALUE}
+            values.append((attr_values or None, private_values or None))
+        return values, self.root._mc_config_result.get(env), self.root._mc_todo_msgs[env]
+
+    def _dumps(self, obj):
+        ff = io.BytesIO()
+        _Pickler(ff, self).dump(obj)
+        return ff.getvalue()
+
+    def export(self):
+        self._assign_paths(self.root, ())
+        structure = self._item_record(self.root)
+        return self._dumps(structure), self._dumps(self._values())
+
+
+def export_env(root, env, classes=None):
+    """Export the state of the loaded env 'env' of config 'root'.
+
+    Arguments:
+        classes (dict): id(cls) -> cls. Classes in this dict are exported by id instead of by name, see `_config_classes`.
+
+    Return (bytes, bytes): The pickled structure and values.
+    """
+
+    return _Exporter(root, env, classes).export()
+
+
+class _Merger():
+    def __init__(self, root, env, classes):
+        self.root = root
+        self.env = env
+        self.env_factory = root._mc_env_factory
+        self.classes = classes
+        self.items = []
+        self.fixups = []
+
+    def _lookup(self, path):
+        item = self.root
+        for step in path:
+            if step[0] == 'd':
+                item = item.__dict__[step[1]]
+            else:
+                item = item.__dict__[step[1]]._all_items[step[2]]
+        return item
+
+    def resolve(self, pid):
+        kind = pid[0]
+        if kind == 'item':
+            return self._lookup(pid[1])
+        if kind == 'proxy':
+            return _mc._mc_item_parent_proxy_factory(self.resolve(pid[1]), self.resolve(pid[2]))
+        if kind == 'repeatable':
+            return self._lookup(pid[1]).__dict__[pid[2]]
+        if kind == 'env':
+            name = pid[1]
+            if name == MC_NO_ENV.name:
+                return MC_NO_ENV
+            env = self.env_factory.envs.get(name) or self.env_factory.groups.get(name)
+            if env is None:
+                env = {'default': self.env_factory.default, '_mc_eg_none': self.env_factory.eg_none}[name]
+            return env
+        if kind == 'class':
+            return self.classes[pid[1]]
+        raise pickle.UnpicklingError("Unsupported persistent id: {}".format(pid))
+
+    def _loads(self, data):
+        return _Unpickler(io.BytesIO(data), self).load()
+
+    def _new_item(self, cls, contained_in, is_default_value_item):
+        try:
+            object.__getattribute__(cls, '_mc_cls_dir_entries')
+        except AttributeError:
+            cls._mc_cls_dir_entries = [dd for dd in dir(cls) if not isinstance(getattr(cls, dd), _McAttributeAccessor)]
+
+        item = object.__new__(cls)
+        item._mc_where = Where.NOWHERE
+        item._mc_num_errors = 0
+        item._mc_attributes = {}
+        item._mc_attributes_to_check = None
+        item._mc_contained_in = contained_in
+        item._mc_root = self.root
+        item._mc_built_by = None
+        item._mc_handled_env_bits = 0
+        item._mc_is_default_value_item = is_default_value_item
+        return item
+
+    def _merge_item(self, item, record):
+        cls, bits, where, built_by_ref, _, attributes, entries = record
+        self.items.append(item)
+        item._mc_handled_env_bits |= bits
+        item._mc_where = where
+        if built_by_ref:
+            self.fixups.append((item, '_mc_built_by', built_by_ref))
+
+        for name, where_from, from_eg in attributes:
+            mc_attr = item._mc_attributes.get(name)
+            if mc_attr is None:
+                cls_attr = getattr(cls, name, None)
+                if cls_attr is None:
+                    setattr(cls, name, _McAttributeAccessor(name))
+                elif isinstance(cls_attr, property):
+                    setattr(cls, name, _McPropertyWrapper(name, cls_attr))
+                mc_attr = item._mc_attributes[name] = _McAttribute()
+            mc_attr.where_from = where_from
+            if from_eg is not None:
+                mc_attr.from_eg = from_eg
+
+        for key, kind, payload in entries:
+            if kind == 'repeatable':
+                repeatable = item.__dict__.get(key)
+                if repeatable is None:
+                    repeatable = RepeatableDict()
+                    object.__setattr__(item, key, repeatable)
+                for mc_key, rkind, rpayload in payload:
+                    if rkind == 'proxy':
+                        repeatable._all_items.setdefault(mc_key, None)
+                        self.fixups.append((repeatable._all_items, mc_key, rpayload))
+                        continue
+                    ritem = repeatable._all_items.get(mc_key)
+                    if ritem is None:
+                        ritem = repeatable._all_items[mc_key] = self._new_item(rpayload[0], item, rpayload[4])
+                    self._merge_item(ritem, rpayload)
+            elif kind == 'item':
+                child = item.__dict__.get(key)
+                if child is None:
+                    child = self._new_item(payload[0], item, payload[4])
+                    object.__setattr__(item, key, child)
+                self._merge_item(child, payload)
+            elif kind == 'proxy':
+                item.__dict__.setdefault(key, None)
+                self.fixups.append((item.__dict__, key, payload))
+            elif key not in item.__dict__:
+                # Private value, keep the position, the value is set by _merge_values
+                object.__setattr__(item, key, None)
+
+    def _fixup(self):
+        for target, key, ref in self.fixups:
+            obj = self.resolve(ref)
+            if isinstance(target, dict):
+                target[key] = obj
+            else:
+                object.__setattr__(target, key, obj)
+
+    def _merge_values(self, values):
+        env = self.env
+        items_values, result, todo_msgs = values
+        for item, (attr_values, private_values) in zip(self.items, items_values):
+            if attr_values:
+                mc_attributes = item._mc_attributes
+                for name, val in attr_values.items():
+                    mc_attributes[name].env_values[env] = val
+            if private_values:
+                for key, val in private_values.items():
+                    object.__setattr__(item, key, val)
+
+        root = self.root
+        root._mc_handled_env_bits |= env.mask
+        root._mc_config_result[env] = result
+        root._mc_todo_msgs[env] = todo_msgs
+        root._mc_root_proxies[env] = _mc._RootEnvProxy(env, root)
+        root._mc_check_unknown = False
+
+    def merge(self, structure, values):
+        self._merge_item(self.root, self._loads(structure))
+        self._fixup()
+        self._merge_values(self._loads(values))
+
+
+def merge_env(root, env, structure, values, classes):
+    """Merge the state of env exported by `export_env` into the item tree of 'root'.
+
+    The exported tree must be created by the same config (function) as 'root'.
+    Envs must be merged in env factory order, so that items and attributes get the same order as when loading sequentially.
+
+    Arguments:
+        classes (dict): id(cls) -> cls for the item classes referenced in the export, see `_config_classes`.
+    """
+
+    _Merger(root, env, classes).merge(structure, values)
+
+
+def _transferable_exception(ex):
+    try:
+        pickle.loads(pickle.dumps(ex))
+        return ex
+    except Exception:  # pylint: disable=broad-except
+        if isinstance(ex, ConfigBaseException):
+            return ConfigException(str(ex), is_summary=ex.is_summary, is_fatal=ex.is_fatal)
+        return ConfigException("{}: {}".format(type(ex).__name__, ex))
+
+
+def _load_envs_worker(root, envs, classes, conn):
+    """Load envs in a worker process and send the exported envs, or the error, for each env."""
+    for env in envs:
+        sout, serr = io.StringIO(), io.StringIO()
+        orig_sout, orig_serr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = sout, serr
+        exported = error = None
+        try:
+            root._mc_load_one_env(env)
+            if env not in root._mc_error_envs:
+                exported = export_env(root, env, classes)
+        except BaseException as ex:  # pylint: disable=broad-except
+            error = (_transferable_exception(ex), traceback.format_exc())
+        finally:
+            sys.stdout, sys.stderr = orig_sout, orig_serr
+
+        conn.send((env.name, sout.getvalue(), serr.getvalue(), exported, error))
+        if error:
+            break
+
+    conn.send(None)
+    conn.close()
+
+
+def fork_context(option_name):
+    """Return the 'fork' multiprocessing context used for worker processes, or raise ConfigApiException if not available."""
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        raise ConfigApiException("'{}' requires the 'fork' start method, which is not available on this platform.".format(option_name)) from None
+
+
+def run_env_workers(ctx, worker, root, envs, num_processes, *args):
+    """Start 'num_processes' worker processes, each calling 'worker(root, envs_subset, *args, conn)' and sending messages on 'conn'.
+
+    Each message is a tuple with the env name first, the worker sends None when done.
+
+    Return dict: env name -> rest of the message for the env.
+    """
+
+    num_processes = min(num_processes, len(envs))
+    processes = []
+    conns = []
+    for index in range(num_processes):
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=worker, args=(root, envs[index::num_processes]) + args + (send_conn,), daemon=True)
+        process.start()
+        send_conn.close()
+        processes.append(process)
+        conns.append(recv_conn)
+
+    results = {}
+    try:
+        while conns:
+            for conn in multiprocessing.connection.wait(conns):
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    msg = None
+                if msg is None:
+                    conns.remove(conn)
+                    conn.close()
+                    continue
+                results[msg[0]] = msg[1:]
+    finally:
+        for process in processes:
+            process.join()
+
+    return results
+
+
+def load_envs_parallel(root, envs, num_processes):
+    """Load 'envs' of 'root' in 'num_processes' worker processes and merge the result into 'root'.
+
+    Output and errors from each env are reported in env order, as if the envs were loaded sequentially.
+    """
+
+    ctx = fork_context('parallel')
+    classes = _config_classes()
+    results = run_env_workers(ctx, _load_envs_worker, root, envs, num_processes, classes)
+
+    for env in envs:
+        try:
+            sout, serr, exported, error = results[env.name]
+        except KeyError:
+            raise ConfigException("Worker process loading env {} terminated without result.".format(env)) from None
+
+        print(sout, end='')
+        print(serr, end='', file=sys.stderr)
+
+        if error:
+            ex, tb = error
+            raise ex from ConfigException("Error loading env {} in worker process:\n{}".format(env, tb))
+
+        if exported is None:
+            root._mc_error_envs.append(env)
+            continue
+
+        merge_env(root, env, *exported, classes=classes)
+
+
+def _validate_properties_worker(root, envs, conn):
+    """Validate @property methods for envs in a worker process and send the output, error counts, or the error, for each env."""
+    for env in envs:
+        sout, serr = io.StringIO(), io.StringIO()
+        orig_sout, orig_serr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = sout, serr
+        root._mc_num_property_errors = 0
+        root._mc_num_invalid_property_usage = 0
+        error = None
+        try:
+            thread_local.env = env
+            root._mc_validate_properties_recursively(env)
+        except BaseException as ex:  # pylint: disable=broad-except
+            error = (_transferable_exception(ex), traceback.format_exc())
+        finally:
+            sys.stdout, sys.stderr = orig_sout, orig_serr
+
+        conn.send((env.name, sout.getvalue(), serr.getvalue(), root._mc_num_property_errors, root._mc_num_invalid_property_usage, error))
+        if error:
+            break
+
+    conn.send(None)
+    conn.close()
+
+
+def validate_properties_parallel(root, envs, num_processes):
+    """Validate @property methods of the loaded 'envs' of 'root' in 'num_processes' worker processes.
+
+    The error counts are added to 'root' and output and errors are reported in env order, as if the envs were validated sequentially.
+    """
+
+    ctx = fork_context('validate_properties_parallel')
+    results = run_env_workers(ctx, _validate_properties_worker, root, envs, num_processes)
+
+    for env in envs:
+        try:
+            sout, serr, num_property_errors, num_invalid_property_usage, error = results[env.name]
+        except KeyError:
+            raise ConfigException("Worker process validating @property methods for env {} terminated without result.".format(env)) from None
+
+        print(sout, end='')
+        print(serr, end='', file=sys.stderr)
+
+        if error:
+            ex, tb = error
+            raise ex from ConfigException("Error validating @property methods for env {} in worker process:\n{}".format(env, tb))
+
+        root._mc_num_property_errors += num_property_errors
+        root._mc_num_invalid_property_usage += num_invalid_property_usage
+        if num_property_errors:
+            try:
+                raise ConfigException("Error validating @property methods for {}".format(env))
+            except ConfigException as ex:
+                root._mc_handle_env_error(ex, env)
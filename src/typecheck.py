@@ -3,7 +3,29 @@ import typing
 import typing_inspect  # type: ignore
 
 
-def type_check(item, attr_name, value):
+# Compiled checkers, shared between classes: type hint -> (allowed types, int accepted as float)
+_checkers: typing.Dict[typing.Any, typing.Tuple[typing.Any, bool]] = {}
+
+
+def _compile_checker(tt):
+    allowed = typing_inspect.get_args(tt) or tt
+    if isinstance(allowed, tuple):
+        return allowed, float in allowed
+    return allowed, isinstance(allowed, type) and issubclass(allowed, float)
+
+
+def _checker(tt):
+    try:
+        return _checkers[tt]
+    except KeyError:
+        checker = _checkers[tt] = _compile_checker(tt)
+        return checker
+    except TypeError:
+        # Unhashable type hint
+        return _compile_checker(tt)
+
+
+def _resolve_checker(item, attr_name):
     th_cls = typing.get_type_hints(item) if hasattr(item, '__annotations__') else {}
     try:
         tt = th_cls[attr_name]
@@ -12,10 +34,36 @@ def type_check(item, attr_name, value):
         try:
             tt = th_init[attr_name]
         except KeyError:
-            return
+            return None
 
-    allowed = typing_inspect.get_args(tt) or tt
-    if not isinstance(value, allowed) and not (isinstance(value, int) and issubclass(allowed, float)):
+    return _checker(tt)
+
+
+def _class_checkers(cls):
+    """Get the attribute name -> checker table for cls.
+
+    The table is stored on the class itself (not inherited), so a redefined class (a new class object) gets a new table.
+    """
+
+    try:
+        return object.__getattribute__(cls, '_mc_type_checkers')
+    except AttributeError:
+        checkers = cls._mc_type_checkers = {}
+        return checkers
+
+
+def type_check(item, attr_name, value):
+    checkers = _class_checkers(item.__class__)
+    try:
+        checker = checkers[attr_name]
+    except KeyError:
+        checker = checkers[attr_name] = _resolve_checker(item, attr_name)
+
+    if checker is None:
+        return None
+
+    allowed, int_as_float = checker
+    if not isinstance(value, allowed) and not (int_as_float and isinstance(value, int)):
         one_of = "with one of following types" if isinstance(allowed, tuple) else "of type"
         return "Expected value {one_of}: {exp}, got {got} for {cls}.{member}".format(
             one_of=one_of, exp=allowed, got=type(value), cls=item.__class__.__name__, member=attr_name)
@@ -0,0 +1,115 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Load the envs of a lazy loaded configuration in a background thread, see `McConfigRoot.load(lazy_load=True, warm_up=...)`.
+
+The first env instantiated is loaded in the calling thread, then a background thread loads the remaining envs in priority order.
+An env which is instantiated before the background thread has loaded it is loaded by the instantiating thread, waiting for at most the env
+currently being loaded by the background thread. When all envs are loaded, `mc_post_validate` is called and the configuration is then
+complete, as if it had been loaded without 'lazy_load'. If the background thread fails to load an env, the envs not yet loaded are not
+loaded, and their futures hold a ConfigException naming the failed env.
+
+The loading of envs is serialized by a lock. Reading attributes, and creating json or dict output, of envs which are loaded, from other
+threads, while the background thread loads other envs is supported.
+"""
+
+import threading
+from concurrent.futures import Future
+
+from .thread_state import thread_local
+from .envs import EnvGroup, MC_NO_ENV
+from .config_errors import ConfigException, ConfigApiException
+
+
+class WarmUp():
+    """Keep track of the envs to load and the futures reporting when they are loaded.
+
+    Arguments:
+        root (McConfigRoot): The configuration.
+        priority (list of Env or EnvGroup): These envs are loaded first, in the order given. Then the remaining envs in env factory order.
+    """
+
+    def __init__(self, root, priority):
+        self.root = root
+        self.lock = threading.RLock()
+        self.thread = None
+
+        envs = {}
+        for eg in priority:
+            if eg.factory != root._mc_env_factory:
+                raise ConfigApiException("The 'warm_up' env {} must be from the 'env_factory' specified for 'mc_config'.".format(eg))
+            for env in eg.envs if isinstance(eg, EnvGroup) else (eg,):
+                envs[env] = None
+        for env in root._mc_env_factory.envs.values():
+            envs[env] = None
+
+        self.envs = list(envs)
+        self.futures = {env: Future() for env in self.envs}
+        self.all_loaded = Future()
+
+    def load_env(self, env):
+        """Load 'env' in the calling thread if it is not already loaded and start the background thread if this is the first env.
+
+        Return (_RootEnvProxy): The configuration instantiated for 'env'.
+        """
+
+        future = self.futures[env]
+        with self.lock:
+            if not future.done():
+                self._load_env(env)
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='multiconf-warm-up', daemon=True)
+                self.thread.start()
+
+        rp = future.result()
+        thread_local.env = env
+        return rp
+
+    def _load_env(self, env):
+        """Must be called with the lock held. Exceptions are raised after being set on the future."""
+        root = self.root
+        future = self.futures[env]
+        root._mc_check_unknown = True
+        try:
+            root._mc_load_one_env(env)
+        except BaseException as ex:
+            if not future.done():
+                future.set_exception(ex)
+            raise
+
+        if env in root._mc_error_envs:
+            future.set_exception(ConfigException("Error in config for {}.".format(env)))
+        else:
+            future.set_result(root._mc_root_proxies[env])
+
+    def _run(self):
+        root = self.root
+        try:
+            for env in self.envs:
+                with self.lock:
+                    if not self.futures[env].done():
+                        try:
+                            self._load_env(env)
+                        except BaseException as ex:
+                            self._fail_pending(env, ex)
+                            raise
+
+            with self.lock:
+                if root._mc_error_envs:
+                    raise ConfigException("The following envs had errors {}".format(root._mc_error_envs))
+                root._mc_post_warm_up()
+        except BaseException as ex:  # pylint: disable=broad-except
+            self.all_loaded.set_exception(ex)
+        else:
+            self.all_loaded.set_result(root)
+        finally:
+            thread_local.env = MC_NO_ENV
+
+    def _fail_pending(self, failed_env, ex):
+        """Must be called with the lock held. Set an exception on the futures of the envs which will now not be loaded."""
+        for env, future in self.futures.items():
+            if not future.done():
+                pending_ex = ConfigException("The env {} was not loaded, because loading {} failed.".format(env, failed_env))
+                pending_ex.__cause__ = ex
+                future.set_exception(pending_ex)
@@ -2,6 +2,7 @@
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pytest import xfail, raises
 
 from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, MC_REQUIRED, ConfigApiException
@@ -970,6 +971,132 @@ def test_item_parent_proxy_get_env():
     assert cr.OuterItem.inners['innermost'].ConfigItem.env == prod1
 
 
+def test_item_parent_proxy_property_contained_in_threads():
+    @named_as('inners')
+    class InnerItem(RepeatableConfigItem):
+        def __init__(self, mc_key):
+            super().__init__(mc_key=mc_key)
+            self.name = mc_key
+
+    class Builder(ConfigBuilder):
+        def mc_build(self):
+            for num in range(4):
+                InnerItem('inner' + str(num))
+
+    class Shared(ConfigItem):
+        @property
+        def parent_name(self):
+            return getattr(self.contained_in, 'name', None)
+
+    @nested_repeatables('inners')
+    class OuterItem(ConfigItem):
+        pass
+
+    @mc_config(ef1_prod, load_now=True)
+    def config(_):
+        with OuterItem():
+            with Builder():
+                Shared()
+
+    shared = config(prod1).OuterItem.inners['inner0'].Shared
+    proxied_item = object.__getattribute__(shared, '_mc_proxied_item')
+    orig_contained_in = proxied_item._mc_contained_in
+
+    def read(_):
+        for _ in range(200):
+            for name, inner in config(prod1).OuterItem.inners.items():
+                assert inner.Shared.parent_name == name
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(read, range(4)))
+
+    # The shared item is not modified by access through a proxy
+    assert proxied_item._mc_contained_in is orig_contained_in
+
+
+def test_item_parent_proxy_property_calls_methods():
+    @named_as('inners')
+    class InnerItem(RepeatableConfigItem):
+        def __init__(self, mc_key):
+            super().__init__(mc_key=mc_key)
+            self.name = mc_key
+
+    class Builder(ConfigBuilder):
+        def mc_build(self):
+            for num in range(2):
+                InnerItem('inner' + str(num))
+
+    class Shared(ConfigItem):
+        @property
+        def inner_name(self):
+            return self.find_contained_in('inners').name
+
+        @property
+        def parent_name(self):
+            return self._parent_name()
+
+        def _parent_name(self):
+            return self.contained_in.name
+
+        def parent_name_method(self):
+            return self.contained_in.name
+
+    @nested_repeatables('inners')
+    class OuterItem(ConfigItem):
+        pass
+
+    @mc_config(ef1_prod)
+    def config(_):
+        with OuterItem():
+            with Builder():
+                Shared()
+
+    # The properties can only be evaluated through the proxy
+    config.load(validate_properties=False)
+
+    for name, inner in config(prod1).OuterItem.inners.items():
+        assert inner.Shared.inner_name == name
+        assert inner.Shared.parent_name == name
+        assert inner.Shared.parent_name_method() == name
+        assert inner.Shared.find_contained_in_or_none('inners').name == name
+
+
+def test_item_parent_proxy_static_and_class_methods():
+    @named_as('inners')
+    class InnerItem(RepeatableConfigItem):
+        pass
+
+    class Builder(ConfigBuilder):
+        def mc_build(self):
+            for num in range(2):
+                InnerItem('inner' + str(num))
+
+    class Shared(ConfigItem):
+        factor = 2
+
+        @staticmethod
+        def helper(num):
+            return num * 2
+
+        @classmethod
+        def cls_helper(cls, num):
+            return num * cls.factor
+
+    @nested_repeatables('inners')
+    class OuterItem(ConfigItem):
+        pass
+
+    @mc_config(ef1_prod, load_now=True)
+    def config(_):
+        with OuterItem():
+            with Builder():
+                Shared()
+
+    for inner in config(prod1).OuterItem.inners.values():
+        assert inner.Shared.helper(3) == 6
+        assert inner.Shared.cls_helper(3) == 6
+
+
 def test_assign_underscore_on_proxied_built_item_child_after_freeze():
     """This will go through the proxy object"""
     class YBuilder(ConfigBuilder):
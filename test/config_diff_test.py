@@ -0,0 +1,202 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, MC_REQUIRED, ConfigApiException
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+from multiconf.values import MC_NO_VALUE
+from multiconf.config_diff import diff_configs, diff_envs, Change
+
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+g_prod = ef.EnvGroup('g_prod', pp, prod)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+        self.ref = None
+
+
+def _config(prod_aa=3, keys=('a', 'b'), ref_key='a', include_b=None):
+    @mc_config(ef, load_now=True)
+    def config(_):
+        with Root(aa=1) as rt:
+            rt.setattr('aa', prod=prod_aa)
+            for key in keys:
+                RItem(key, aa=[key, 1], mc_include=include_b if key == 'b' else None)
+            rt.ref = rt.ritems[ref_key] if ref_key in keys else None
+
+    return config
+
+
+def _strs(changes):
+    return [str(change) for change in changes]
+
+
+def test_diff_configs_equal():
+    assert list(diff_configs(_config(), _config())) == []
+
+
+def test_diff_configs_changed_values():
+    changes = list(diff_configs(_config(), _config(prod_aa=4)))
+    assert _strs(changes) == ["changed Root.aa for Env('prod'): 3 -> 4"]
+    assert changes[0].kind is Change.CHANGED
+    assert changes[0].path == 'Root'
+    assert changes[0].attr_name == 'aa'
+    assert (changes[0].old, changes[0].new) == (3, 4)
+
+
+def test_diff_configs_repeatable_keys_and_refs():
+    changes = diff_configs(_config(), _config(keys=('a', 'c'), ref_key='c'))
+    assert _strs(changes) == [
+        "changed Root.ref for Env('dev'): <RItem> -> <RItem>",
+        "changed Root.ref for Env('pp'): <RItem> -> <RItem>",
+        "changed Root.ref for Env('prod'): <RItem> -> <RItem>",
+        "removed Root.ritems['b'] for Env('dev')",
+        "removed Root.ritems['b'] for Env('pp')",
+        "removed Root.ritems['b'] for Env('prod')",
+        "added Root.ritems['c'] for Env('dev')",
+        "added Root.ritems['c'] for Env('pp')",
+        "added Root.ritems['c'] for Env('prod')",
+    ]
+
+
+def test_diff_configs_included_envs():
+    changes = diff_configs(_config(), _config(include_b=[g_prod]))
+    assert _strs(changes) == ["removed Root.ritems['b'] for Env('dev')"]
+
+
+def test_diff_configs_envs():
+    ef2 = EnvFactory()
+    ef2.Env('dev')
+    test2 = ef2.Env('test')
+
+    @mc_config(ef, load_now=True)
+    def config1(_):
+        ItemWithAA(1)
+
+    @mc_config(ef2, load_now=True)
+    def config2(_):
+        with ItemWithAA(1) as it:
+            it.setattr('aa', test=2)
+
+    changes = list(diff_configs(config1, config2))
+    assert _strs(changes) == ["removed <root> for Env('pp')", "removed <root> for Env('prod')", "added <root> for Env('test')"]
+    assert changes[2].env is test2
+
+
+def test_diff_configs_class_and_attributes():
+    class Item(ConfigItem):
+        def __init__(self):
+            super().__init__()
+            self.aa = 1
+
+    @named_as('Item')
+    class Item2(ConfigItem):
+        def __init__(self):
+            super().__init__()
+            self.bb = 1
+
+    @mc_config(ef, load_now=True)
+    def config1(_):
+        Item()
+
+    @mc_config(ef, load_now=True)
+    def config2(_):
+        with Item2() as it:
+            it.mc_select_envs(include=[dev])
+
+    changes = list(diff_configs(config1, config2))
+    assert [(ch.kind, ch.path, ch.attr_name, ch.env) for ch in changes] == [
+        (Change.CHANGED, 'Item', None, None),
+        (Change.REMOVED, 'Item', 'aa', dev),
+        (Change.ADDED, 'Item', 'bb', dev),
+        (Change.REMOVED, 'Item', None, pp),
+        (Change.REMOVED, 'Item', None, prod),
+    ]
+    assert changes[1].new is MC_NO_VALUE
+
+
+def test_diff_configs_builder():
+    class Builder(ConfigBuilder):
+        def __init__(self, num, aa):
+            super().__init__()
+            self.num = num
+            self.aa = aa
+
+        def mc_build(self):
+            for key in range(self.num):
+                RItem('b' + str(key), aa=self.aa)
+
+    def config(built_aa, shared_aa, num=2):
+        @mc_config(ef, load_now=True)
+        def config(_):
+            with Root():
+                with Builder(num, aa=0) as bld:
+                    bld.setattr('aa', prod=built_aa)
+                    with ItemWithAA(1) as it:
+                        it.setattr('aa', prod=shared_aa)
+
+        return config
+
+    assert list(diff_configs(config(1, 2), config(1, 2))) == []
+    assert _strs(diff_configs(config(1, 2), config(5, 3))) == [
+        "changed Root.ritems['b0'].aa for Env('prod'): 1 -> 5",
+        "changed Root.ritems['b0'].ItemWithAA.aa for Env('prod'): 2 -> 3",
+        "changed Root.ritems['b1'].aa for Env('prod'): 1 -> 5",
+        "changed Root.ritems['b1'].ItemWithAA.aa for Env('prod'): 2 -> 3",
+    ]
+    assert _strs(diff_configs(config(1, 2), config(1, 2, num=1))) == [
+        "removed Root.ritems['b1'] for Env('dev')",
+        "removed Root.ritems['b1'] for Env('pp')",
+        "removed Root.ritems['b1'] for Env('prod')",
+    ]
+
+    cfg = config(1, 2)
+    assert _strs(diff_envs(cfg, dev, prod)) == [
+        "changed Root.ritems['b0'].aa: 0 -> 1",
+        "changed Root.ritems['b0'].ItemWithAA.aa: 1 -> 2",
+        "changed Root.ritems['b1'].aa: 0 -> 1",
+        "changed Root.ritems['b1'].ItemWithAA.aa: 1 -> 2",
+    ]
+
+
+def test_diff_envs():
+    config = _config(include_b=[g_prod])
+    assert _strs(diff_envs(config, pp, prod)) == ["changed Root.aa: 1 -> 3"]
+    assert _strs(diff_envs(config, dev, pp)) == ["added Root.ritems['b']"]
+    assert _strs(diff_envs(config, prod, dev)) == ["changed Root.aa: 3 -> 1", "removed Root.ritems['b']"]
+    assert list(diff_envs(config, dev, dev)) == []
+
+
+def test_diff_errors():
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(1)
+
+    with raises(ConfigApiException) as exinfo:
+        diff_configs(config, _config())
+    assert str(exinfo.value) == "Only a configuration which is loaded for all envs (without 'lazy_load') can be compared."
+
+    ef2 = EnvFactory()
+    dev2 = ef2.Env('dev')
+    with raises(ConfigApiException) as exinfo:
+        diff_envs(_config(), dev, dev2)
+    assert str(exinfo.value) == "The env Env('dev') must be from the 'env_factory' specified for 'mc_config'."
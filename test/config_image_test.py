@@ -0,0 +1,262 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import multiprocessing
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, DefaultItems, MC_REQUIRED, MC_TODO
+from multiconf import ConfigException, ConfigApiException, ConfigAttributeError, ConfigExcludedAttributeError, ConfigExcludedKeyError
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.repeatable import RepeatableDict
+from multiconf.envs import EnvFactory
+from multiconf.config_image import save_image, ConfigImage
+
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+tst = ef.Env('tst', allow_todo=True)
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+g_prod = ef.EnvGroup('g_prod', pp, prod)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None, mc_exclude=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include, mc_exclude=mc_exclude)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+        self.big = None
+        self._private = None
+
+    @property
+    def cc(self):
+        return 'cc' + str(self.aa)
+
+    def aa_plus(self, num):
+        return self.aa + num
+
+
+class Shared(ConfigItem):
+    def __init__(self, xx=None):
+        super().__init__()
+        self.xx = xx
+
+    @property
+    def parent_aa(self):
+        return self.contained_in.aa
+
+
+class ItemWithRef(ConfigItem):
+    def __init__(self, aa=MC_REQUIRED, bb=MC_REQUIRED, ref=None):
+        super().__init__()
+        self.aa = aa
+        self.bb = bb
+        self.ref = ref
+
+
+class Builder(ConfigBuilder):
+    def __init__(self, num, mc_include=None):
+        super().__init__(mc_include=mc_include)
+        self.num = num
+
+    def mc_build(self):
+        for num in range(self.num):
+            RItem(mc_key='x' + str(num), aa=num)
+
+
+@mc_config(ef, load_now=True)
+def config(root):
+    with DefaultItems():
+        with ItemWithRef() as it:
+            it.bb = 'default_bb'
+
+    with Root(aa=1) as rt:
+        rt.setattr('aa', pp=2, prod=3)
+        rt.setattr('cc', pp='pp_cc', mc_overwrite_property=True)
+        rt.big = [1.5, 'x' * 1000, {'k': (None, True)}, 2**70]
+        rt._private = {'private': 17}
+        RItem('a', aa=1)
+        with RItem('b', mc_exclude=[dev, pp]) as ri:
+            ri.setattr('aa', default=2, prod=3)
+        RItem('c', aa=rt, mc_include=[g_prod])
+        with Builder(2, mc_include=[prod]):
+            Shared(xx=7)
+
+    with ItemWithRef(aa=1) as it:
+        it.setattr('aa', tst=MC_TODO)
+        it.ref = [rt.ritems['a']]
+
+    return root.env.name
+
+
+def _image(tmp_path):
+    image_file = str(tmp_path / 'config.image')
+    save_image(config, image_file)
+    return ConfigImage(image_file, ef)
+
+
+def test_image_attributes(tmp_path):
+    image = _image(tmp_path)
+    assert image.envs == [dev, tst, pp, prod]
+
+    for env in dev, pp, prod:
+        cr = image(env)
+        loaded = config(env)
+        assert cr.env is env
+        assert cr.mc_config_result == env.name
+        assert cr.Root.aa == loaded.Root.aa
+        assert cr.Root.cc == loaded.Root.cc
+        assert cr.Root.big == loaded.Root.big
+        assert cr.Root._private == {'private': 17}
+        assert cr.ItemWithRef.bb == 'default_bb'
+        assert list(cr.Root.ritems) == list(loaded.Root.ritems)
+        assert [key for key, _ in cr.Root.items()] == ['ritems']
+        assert [key for key, _ in cr.items()] == [key for key, _ in loaded.items()]
+
+    cr = image(prod)
+    assert cr.Root.cc == 'cc3'
+    assert cr.Root.aa_plus(2) == 5
+    assert cr.Root.getattr('aa', pp) == 2
+    assert image(pp).Root.cc == 'pp_cc'
+    assert cr.Root.named_as() == 'Root'
+    assert cr.Root.contained_in == cr
+
+
+def test_image_items_and_repeatables(tmp_path):
+    image = _image(tmp_path)
+
+    cr = image(prod)
+    assert list(cr.Root.ritems) == ['a', 'b', 'c', 'x0', 'x1']
+    assert [item.aa for item in cr.Root.ritems.values()][3:] == [0, 1]
+    assert cr.Root.ritems['c'].aa == cr.Root
+    assert cr.Root.ritems['x1'].Shared.parent_aa == 1
+    assert cr.Root.ritems['x1'].Shared.contained_in == cr.Root.ritems['x1']
+    assert cr.ItemWithRef.ref == [cr.Root.ritems['a']]
+    assert cr.ItemWithRef.ref[0].contained_in == cr.Root
+    assert isinstance(cr.Root.ritems, dict)
+    assert 'c' in cr.Root.ritems
+    assert cr.Root.ritems.get('c') == cr.Root.ritems['c']
+
+    cr = image(dev)
+    assert list(cr.Root.ritems) == ['a']
+    assert len(cr.Root.ritems) == 1
+    assert 'b' not in cr.Root.ritems
+    assert cr.Root.ritems.get('b') is None
+    assert list(cr.Root.ritems.all_items) == ['a', 'b', 'c', 'x0', 'x1']
+    assert len(cr.Root.ritems.all_items) == 5
+    assert not cr.Root.ritems.all_items['b']
+    assert isinstance(cr.Root.ritems, RepeatableDict)
+    assert repr(cr.Root.ritems) == "{'a': <image item 'ritems' of class 'test.config_image_test.RItem' for Env('dev')>}"
+
+    with raises(ConfigExcludedKeyError):
+        cr.Root.ritems['b']  # pylint: disable=pointless-statement
+
+    with raises(ConfigExcludedAttributeError) as exinfo:
+        cr.Root.ritems.all_items['b'].aa  # pylint: disable=pointless-statement
+    assert exinfo.value.value == 2
+    assert str(exinfo.value) == "Accessing attribute 'aa' for Env('dev') on an excluded config item: Excluded: <class 'test.config_image_test.RItem'>"
+
+
+def test_image_todo(tmp_path):
+    image = _image(tmp_path)
+
+    with raises(ConfigException) as exinfo:
+        image(tst)
+    assert str(exinfo.value) == "Trying to get invalid configuration containing MC_TODO"
+
+    with raises(ConfigAttributeError):
+        image(tst, allow_todo=True).ItemWithRef.aa  # pylint: disable=pointless-statement
+
+
+def test_image_read_only(tmp_path):
+    image = _image(tmp_path)
+
+    with raises(ConfigApiException) as exinfo:
+        image(prod).Root.aa = 7
+    assert str(exinfo.value) == "Cannot set attribute 'aa' on read-only configuration image item test.config_image_test.Root."
+
+    with raises(AttributeError):
+        image(prod).Root.setattr('aa', prod=7)
+
+
+def test_image_env_names(tmp_path):
+    image_file = str(tmp_path / 'config.image')
+    save_image(config, image_file)
+    image = ConfigImage(image_file)
+
+    assert image.envs == ['dev', 'tst', 'pp', 'prod']
+    assert image('prod').Root.aa == 3
+    assert image('prod').env == 'prod'
+
+    with raises(ConfigException) as exinfo:
+        image(prod)
+    assert str(exinfo.value) == "The selected env Env('prod') is not in the configuration image."
+
+
+def test_image_save_replaces_file(tmp_path):
+    image_file = str(tmp_path / 'config.image')
+    save_image(config, image_file)
+    image = ConfigImage(image_file, ef)
+
+    @mc_config(ef, load_now=True)
+    def config2(_):
+        with Root(aa=7) as rt:
+            rt.big = 'x' * 100000
+
+    save_image(config2, image_file)
+    assert image(prod).Root.aa == 3
+    assert image(prod).Root.ritems['x1'].Shared.parent_aa == 1
+    assert ConfigImage(image_file, ef)(prod).Root.aa == 7
+    assert [ff.name for ff in tmp_path.iterdir()] == ['config.image']
+
+
+def _read_in_worker(image_file, conn):
+    conn.send(ConfigImage(image_file, ef)(prod).Root.ritems['x1'].Shared.parent_aa)
+    conn.close()
+
+
+def test_image_shared_by_processes(tmp_path):
+    image_file = str(tmp_path / 'config.image')
+    save_image(config, image_file)
+
+    ctx = multiprocessing.get_context('fork')
+    recv_conn, send_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_read_in_worker, args=(image_file, send_conn))
+    process.start()
+    assert recv_conn.recv() == 1
+    process.join()
+
+
+def test_image_errors(tmp_path):
+    @mc_config(ef)
+    def config2(_):
+        ItemWithAA(1)
+
+    image_file = tmp_path / 'config.image'
+    with raises(ConfigApiException) as exinfo:
+        save_image(config2, str(image_file))
+    assert str(exinfo.value) == "Only a configuration which is loaded for all envs (without 'lazy_load') can be saved as an image."
+
+    @mc_config(ef, load_now=True)
+    def config3(_):
+        with ItemWithAA() as it:
+            it.aa = lambda: 1
+
+    with raises(ConfigApiException) as exinfo:
+        save_image(config3, str(image_file))
+    assert str(exinfo.value).startswith("Cannot save image of configuration:")
+
+    image_file.write_bytes(b'not an image' * 10)
+    with raises(ConfigApiException) as exinfo:
+        ConfigImage(str(image_file))
+    assert str(exinfo.value).startswith("Not a configuration image")
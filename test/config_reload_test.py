@@ -0,0 +1,259 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import os
+import sys
+import textwrap
+import importlib
+
+from pytest import raises, fixture
+
+from multiconf import mc_config, ConfigApiException
+from multiconf.envs import EnvFactory
+from multiconf.config_reload import reload_order
+
+from .utils.tstclasses import ItemWithAA
+
+
+_ENVS = """
+from multiconf.envs import EnvFactory
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+prod = ef.Env('prod')
+"""
+
+_ITEMS = """
+from multiconf import ConfigItem
+
+class Item(ConfigItem):
+    def __init__(self, aa={aa}):
+        super().__init__()
+        self.aa = aa
+        self.bb = None
+"""
+
+_CONF = """
+from multiconf import mc_config
+
+from {prefix}_envs import ef
+from {prefix}_items import Item
+import {prefix}_helper as helper
+
+@mc_config(ef, load_now=True)
+def config(_):
+    with Item() as it:
+        it.setattr('aa', prod={prod_aa})
+        it.bb = helper.bb()
+"""
+
+_HELPER = """
+def bb():
+    return {bb}
+"""
+
+_FUNC_CONF = """
+from multiconf import mc_config
+
+from {prefix}_envs import ef
+from {prefix}_items import Item
+
+def conf_func(_):
+    with Item() as it:
+        it.setattr('aa', prod={prod_aa})
+
+config = mc_config(ef, load_now=True)(conf_func)
+"""
+
+_LOCAL_CONF = """
+from multiconf import mc_config
+
+from {prefix}_envs import ef
+from {prefix}_items import Item
+
+def make_config():
+    @mc_config(ef, load_now=True)
+    def config(_):
+        Item()
+
+    return config
+"""
+
+
+class _Modules():
+    def __init__(self, tmp_path, prefix):
+        self.tmp_path = tmp_path
+        self.prefix = prefix
+
+    def write(self, name, source, **kwargs):
+        path = self.tmp_path / '{}_{}.py'.format(self.prefix, name)
+        mtime = path.stat().st_mtime_ns + 10**10 if path.exists() else None
+        path.write_text(textwrap.dedent(source.format(prefix=self.prefix, **kwargs)))
+        if mtime:
+            os.utime(path, ns=(mtime, mtime))
+
+    def name(self, name):
+        return '{}_{}'.format(self.prefix, name)
+
+    def module(self, name):
+        return sys.modules[self.name(name)]
+
+
+@fixture(name='modules')
+def _modules(tmp_path, request):
+    prefix = 'mc_reload_' + request.node.name
+    mods = _Modules(tmp_path, prefix)
+    mods.write('envs', _ENVS)
+    mods.write('items', _ITEMS, aa=1)
+    mods.write('helper', _HELPER, bb=5)
+    mods.write('conf', _CONF, prod_aa=2)
+
+    sys.path.insert(0, str(tmp_path))
+    importlib.invalidate_caches()
+    yield mods
+    sys.path.remove(str(tmp_path))
+    for name in list(sys.modules):
+        if name.startswith(prefix):
+            del sys.modules[name]
+
+
+def test_reimport_and_load_unchanged(modules):
+    conf_mod = importlib.import_module(modules.name('conf'))
+    config = conf_mod.config
+    prod = modules.module('envs').prod
+
+    assert config(prod).Item.aa == 2
+    assert config.changed_modules() == []
+    assert config.reimport_and_load() is config
+
+
+def test_reimport_and_load_changed_item_module(modules):
+    conf_mod = importlib.import_module(modules.name('conf'))
+    config = conf_mod.config
+    envs = modules.module('envs')
+
+    modules.write('items', _ITEMS, aa=7)
+    assert config.changed_modules() == [modules.name('items')]
+
+    new_config = config.reimport_and_load()
+    assert new_config is not config
+    assert new_config is conf_mod.config
+    assert new_config.changed_modules() == []
+    assert new_config(envs.dev).Item.aa == 7
+    assert new_config(envs.prod).Item.aa == 2
+
+    # The old config is unchanged, and its items keep the classes from before the re-import
+    assert config(envs.dev).Item.aa == 1
+    items = modules.module('items')
+    assert isinstance(new_config(envs.dev).Item, items.Item)
+    assert not isinstance(config(envs.dev).Item, items.Item)
+
+
+def test_reimport_and_load_changed_conf_module(modules):
+    conf_mod = importlib.import_module(modules.name('conf'))
+    config = conf_mod.config
+    envs = modules.module('envs')
+    items = modules.module('items')
+
+    modules.write('conf', _CONF, prod_aa=3)
+    assert config.changed_modules() == [modules.name('conf')]
+
+    new_config = config.reimport_and_load()
+    assert new_config(envs.prod).Item.aa == 3
+
+    # Only the conf module was re-imported
+    assert modules.module('items') is items
+    assert type(new_config(envs.prod).Item) is items.Item
+
+
+def test_reimport_and_load_changed_helper_module(modules):
+    conf_mod = importlib.import_module(modules.name('conf'))
+    config = conf_mod.config
+    envs = modules.module('envs')
+    items = modules.module('items')
+
+    modules.write('helper', _HELPER, bb=6)
+    assert config.changed_modules() == [modules.name('helper')]
+
+    new_config = config.reimport_and_load()
+    assert new_config(envs.prod).Item.bb == 6
+    assert new_config.changed_modules() == []
+    assert modules.module('items') is items
+
+
+def test_reimport_and_load_module_level_function(modules):
+    modules.write('func_conf', _FUNC_CONF, prod_aa=2)
+    config = importlib.import_module(modules.name('func_conf')).config
+    envs = modules.module('envs')
+
+    modules.write('func_conf', _FUNC_CONF, prod_aa=3)
+    new_config = config.reimport_and_load()
+
+    # The re-imported config function is used, and the configuration created when re-importing the module
+    assert new_config._mc_conf_func is modules.module('func_conf').conf_func
+    assert new_config is modules.module('func_conf').config
+    assert new_config(envs.prod).Item.aa == 3
+    assert new_config.changed_modules() == []
+
+
+def test_reimport_and_load_local_config_function(modules):
+    items = importlib.import_module(modules.name('items'))
+    envs = importlib.import_module(modules.name('envs'))
+
+    @mc_config(envs.ef, load_now=True)
+    def config(_):
+        items.Item()
+
+    # The modules are not stamped when loading
+    assert config._mc_module_stamps is None
+
+    # This test module is tracked, the 'items' module is only referenced from a local variable
+    assert config.reimport_and_load() is config
+    assert modules.name('items') not in config._mc_module_stamps
+    assert __name__ in config._mc_module_stamps
+
+
+def test_reimport_and_load_local_config_function_changed(modules):
+    modules.write('local_conf', _LOCAL_CONF)
+    config = importlib.import_module(modules.name('local_conf')).make_config()
+    item_cls = modules.module('items').Item
+
+    modules.write('items', _ITEMS, aa=7)
+    assert config.changed_modules() == [modules.name('items')]
+
+    with raises(ConfigApiException) as exinfo:
+        config.reimport_and_load()
+    exp = "The config function 'make_config.<locals>.config' is not defined at module level in '{}', it can not be re-imported.".format(
+        modules.name('local_conf'))
+    assert str(exinfo.value) == exp
+
+    # Nothing was re-imported
+    assert modules.module('items').Item is item_cls
+
+
+def test_reimport_and_load_not_loaded():
+    ef = EnvFactory()
+    ef.Env('dev')
+
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(1)
+
+    with raises(ConfigApiException) as exinfo:
+        config.reimport_and_load()
+    assert str(exinfo.value) == "Configuration must be loaded before checking for changed modules."
+
+
+def test_reload_order():
+    deps = {
+        'conf': {'helper', 'items', 'envs'},
+        'helper': {'items'},
+        'items': set(),
+        'envs': set(),
+        'other': {'envs'},
+    }
+
+    assert reload_order(['items'], deps) == ['items', 'helper', 'conf']
+    assert reload_order(['envs'], deps) == ['envs', 'conf', 'other']
+    assert reload_order(['helper', 'items'], deps) == ['items', 'helper', 'conf']
+    assert reload_order([], deps) == []
@@ -7,6 +7,7 @@ from pytest import raises, xfail
 from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigException, MC_REQUIRED
 from multiconf.decorators import nested_repeatables, required
 from multiconf.envs import EnvFactory
+from multiconf.thread_state import thread_local
 
 from .utils.utils import config_error, next_line_num, replace_ids, lines_in, local_func, start_file_line, file_line
 from .utils.tstclasses import ItemWithAA, RepeatableItemWithAA
@@ -594,8 +595,8 @@ def test_assigning_owerwrites_attribute(capsys):
 def test_configitem_outside_of_mc_config():
     # TODO: Explicitly check for this?
 
-    # Need to make sure that the static _mc_hierarchy is set corectly
-    del ConfigItem._mc_hierarchy[:]
+    # Need to make sure that the loading hierarchy is set corectly
+    del thread_local.hierarchy[:]
 
     with raises(Exception) as exinfo:
         ConfigItem()
@@ -0,0 +1,154 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, DefaultItems, MC_REQUIRED, ConfigApiException
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory, MC_NO_ENV
+from multiconf.dict_output import export_dict
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+prod = ef.Env('prod')
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+        self.ref = None
+        self._private = 7
+
+    @property
+    def bb(self):
+        return self.aa * 2
+
+
+class Nested(ConfigItem):
+    def __init__(self, xx=None):
+        super().__init__()
+        self.xx = xx
+
+
+class Builder(ConfigBuilder):
+    def mc_build(self):
+        Nested(xx=self.contained_in.aa)
+
+
+@mc_config(ef, load_now=True)
+def config(_):
+    with DefaultItems():
+        Nested(xx=0)
+
+    with Root(aa=1) as rt:
+        rt.setattr('aa', prod=2)
+        RItem('a', aa=[1, (2, 3)])
+        RItem('b', aa={'x': None}, mc_include=[prod])
+        rt.ref = [rt.ritems['a'], rt]
+        Builder()
+
+    with ConfigItem() as it:
+        it.setattr('root', default=rt, mc_set_unknown=True)
+
+
+def test_to_dict():
+    assert config(dev).to_dict() == {
+        'Root': {
+            'aa': 1,
+            'ref': [{'#ref': "Root.ritems['a']"}, {'#ref': 'Root'}],
+            'ritems': {
+                'a': {'aa': [1, [2, 3]]},
+            },
+            'Nested': {'xx': 1},
+        },
+        'ConfigItem': {'root': {'#ref': 'Root'}},
+    }
+
+    assert config(prod).Root.to_dict(property_methods=True) == {
+        'aa': 2,
+        'bb': 4,
+        'ref': [{'#ref': "ritems['a']"}, {'#ref': ''}],
+        'ritems': {
+            'a': {'aa': [1, [2, 3]]},
+            'b': {'aa': {'x': None}},
+        },
+        'Nested': {'xx': 2},
+    }
+
+
+def test_to_dict_ref_outside():
+    assert config(prod).ConfigItem.to_dict() == {'root': {'#ref': None}}
+
+
+def test_to_dict_no_env():
+    with raises(ConfigApiException) as exinfo:
+        export_dict(config(prod).Root, MC_NO_ENV)
+    assert str(exinfo.value) == "Exporting a dict requires a single current env, found Env('MC_NO_ENV')."
+
+
+def test_to_dict_builder_proxied_property():
+    @named_as('inners')
+    class Inner(RepeatableConfigItem):
+        def __init__(self, mc_key):
+            super().__init__(mc_key=mc_key)
+            self.name = mc_key
+
+    class InnerBuilder(ConfigBuilder):
+        def mc_build(self):
+            for key in 'xy':
+                Inner(key)
+
+    class Shared(ConfigItem):
+        @property
+        def parent_name(self):
+            return self.contained_in.name
+
+    class SharedChild(ConfigItem):
+        @property
+        def inner_name(self):
+            return self.find_contained_in('inners').name
+
+    @nested_repeatables('inners')
+    class Outer(ConfigItem):
+        pass
+
+    @mc_config(ef)
+    def config(_):
+        with Outer():
+            with InnerBuilder():
+                with Shared():
+                    SharedChild()
+
+    config.load(validate_properties=False)
+    expected = {
+        'inners': {
+            key: {'name': key, 'Shared': {'parent_name': key, 'SharedChild': {'inner_name': key}}} for key in 'xy'
+        },
+    }
+    assert config(prod).Outer.to_dict(property_methods=True) == expected
+    assert config(prod).Outer.inners['y'].Shared.to_dict(property_methods=True) == expected['inners']['y']['Shared']
+
+
+def test_to_dict_property_exception(capsys):
+    class Item(ConfigItem):
+        @property
+        def bad(self):
+            raise ValueError("bad value")
+
+    @mc_config(ef)
+    def config(_):
+        Item()
+
+    config.load(validate_properties=False)
+    assert config(prod).Item.to_dict(property_methods=True) == {'bad': {'#error': "ValueError('bad value')"}}
+    assert "ValueError: bad value" in capsys.readouterr()[1]
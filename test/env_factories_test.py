@@ -315,3 +315,37 @@ def test_mc_resolve_env_group_value_ambiguous():
     with raises(AmbiguousEnvException) as exinfo:
         ef._mc_resolve_env_group_value(d1a, dict(g_d1ab_d2a_d1cd2c=3, d0=1, g_d1ab_d2a=1, g_d1_overlap1=1, g_d1_overlap2=1, g_d13_overlap1=1, g_d13_overlap3=1, pp=9))
     assert exinfo.value.ambiguous == [g_d1ab_d2a, g_d1_overlap1, g_d1_overlap2, g_d13_overlap1, g_d13_overlap3]
+
+
+def test_mc_calc_env_group_order_masks():
+    ef = EnvFactory()
+
+    d1a = ef.Env('d1a')
+    d1b = ef.Env('d1b')
+    d2a = ef.Env('d2a')
+
+    g_d1ab_d2a = ef.EnvGroup('g_d1ab_d2a', d1a, d1b, d2a)
+    g_d1a = ef.EnvGroup('g_d1a', d1a)
+    g_d2a = ef.EnvGroup('g_d2a', d2a)
+    g_all = ef.EnvGroup('g_all', g_d1ab_d2a, g_d2a)
+
+    ef._mc_calc_env_group_order()
+
+    for env in ef.envs.values():
+        # The lookup order is the group bit order
+        assert [gg.bit for gg in env.lookup_order] == sorted(gg.bit for gg in env.lookup_order)
+        mask = env.bit
+        for gg in env.lookup_order:
+            mask |= gg.bit
+        assert env._mc_eg_mask == mask
+
+    assert ef._mc_containing_masks[g_d1ab_d2a.bit] == g_all.bit | ef.default.bit
+    assert ef._mc_ambiguous_mask(d1a, g_d1ab_d2a.bit) == g_d1a.bit
+    assert ef._mc_ambiguous_mask(d1a, g_d1a.bit) == g_all.bit
+    assert ef._mc_ambiguous_mask(d2a, g_d1ab_d2a.bit) == g_d2a.bit
+    assert ef._mc_ambiguous_mask(d2a, g_d2a.bit) == 0
+
+    assert ef._mc_resolve_env_group_value(d2a, dict(g_all=1, default=2, g_d2a=3)) == (3, g_d2a)
+    assert ef._mc_resolve_env_group_value(d1b, dict(g_all=1, default=2, g_d2a=3)) == (1, g_all)
+    assert ef._mc_resolve_env_group_value(d1b, dict(g_d2a=3)) == (None, None)
+    assert ef._mc_names_masks[('g_all', 'default', 'g_d2a')] == g_all.bit | ef.default.bit | g_d2a.bit
@@ -26,3 +26,16 @@ def test_type_repr():
     root = MockConfigItem()
     ipp = _mc_item_parent_proxy_factory(root, MockConfigItem())
     assert repr(type(ipp)) == "<class 'multiconf.multiconf.ItemParentProxy:<test.item_parent_proxy_test.MockConfigItem>'>"
+
+
+def test_type_reused():
+    class MockConfigItem2(MockConfigItem):
+        pass
+
+    root = MockConfigItem()
+    ipp1 = _mc_item_parent_proxy_factory(root, MockConfigItem())
+    ipp2 = _mc_item_parent_proxy_factory(root, MockConfigItem())
+    ipp3 = _mc_item_parent_proxy_factory(root, MockConfigItem2())
+    assert object.__getattribute__(ipp1, '__class__') is object.__getattribute__(ipp2, '__class__')
+    assert object.__getattribute__(ipp3, '__class__') is not object.__getattribute__(ipp1, '__class__')
+    assert isinstance(ipp3, MockConfigItem2)
@@ -1942,3 +1942,69 @@ def test_exception_in_property_exception():
     print("--- exc ---")
     print(replace_ids(str(exinfo.value).strip()))
     assert replace_ids(str(exinfo.value).strip()) == _exception_in_property_exception_exc_ex.strip()
+
+
+def test_json_dir_entries_classified_once_per_class():
+    class Base(ConfigItem):
+        static_val = 1
+
+        @property
+        def prop(self):
+            return 2
+
+    class Xx(Base):
+        cls_val = ItemWithAA
+
+        def method(self):
+            return 3
+
+    @mc_config(ef, load_now=True)
+    def config(_):
+        Xx()
+
+    cr = config(prod)
+    cr.Xx.json()
+    kinds, names = Xx.__dict__['_mc_json_dir_entry_kinds']
+    assert [(name, kind.name) for name, kind in kinds if name in ('static_val', 'prop', 'cls_val', 'method')] == [
+        ('cls_val', 'TYPE'), ('prop', 'PROPERTY'), ('static_val', 'STATIC')]
+    assert 'method' in names
+    assert '_mc_json_dir_entry_kinds' not in Base.__dict__
+
+    cr.Xx.json(show_all_envs=True)
+    assert Xx.__dict__['_mc_json_dir_entry_kinds'][0] is kinds
+
+
+def test_json_dir_entries_property_overwritten_by_later_config():
+    class Xx(ConfigItem):
+        @property
+        def prop(self):
+            return "calc"
+
+    @mc_config(ef, load_now=True)
+    def config1(_):
+        Xx()
+
+    assert '"prop": "calc"' in config1(prod).Xx.json()
+
+    @mc_config(ef, load_now=True)
+    def config2(_):
+        with Xx() as xx:
+            xx.setattr('prop', prod="attr", mc_overwrite_property=True)
+
+    assert '"prop #overridden @property #calculated value was": "calc"' in config2(prod).Xx.json()
+    assert '"prop": "calc"' in config1(prod).Xx.json()
+
+
+def test_json_dir_entries_class_attribute_reassigned():
+    class Xx(ConfigItem):
+        xx = 1
+
+    @mc_config(ef, load_now=True)
+    def config(_):
+        Xx()
+
+    cr = config(prod)
+    assert '"xx": 1,' in cr.Xx.json()
+
+    Xx.xx = 2
+    assert '"xx": 2,' in cr.Xx.json()
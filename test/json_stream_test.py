@@ -0,0 +1,103 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import io
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, MC_REQUIRED
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+
+
+class Chunks(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.num_writes = 0
+
+    def write(self, s):
+        self.num_writes += 1
+        return super().write(s)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, ref=None):
+        super().__init__(mc_key=mc_key)
+        self.aa = aa
+        self.ref = ref
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+
+    @property
+    def bb(self):
+        return self.aa * 2
+
+
+class NonItem():
+    def __init__(self, aa):
+        self.aa = aa
+
+
+def json_filter(_obj, key, value):
+    return (False, None) if key == 'hide_me' else (key, value)
+
+
+def json_fallback(obj):
+    if isinstance(obj, NonItem):
+        return {'non_item': obj.aa}, True
+    return obj, False
+
+
+@mc_config(ef, mc_json_filter=json_filter, mc_json_fallback=json_fallback, load_now=True)
+def config(_):
+    with Root(aa=1) as rt:
+        rt.setattr('aa', prod=2)
+        ra = RItem('a', aa=NonItem(7))
+        with RItem('b', aa=[1, 2], ref=ra) as rb:
+            rb.setattr('hide_me', default=1, mc_set_unknown=True)
+            ItemWithAA(aa=rt)
+        RItem('c', aa={'x': rb}, ref=rt)
+
+
+def test_json_stream_same_as_json():
+    for env in pp, prod:
+        cr = config(env)
+        for kwargs in {}, dict(compact=True), dict(show_all_envs=True), dict(sort_attributes=True, property_methods=None), dict(depth=2):
+            ff = Chunks()
+            cr.Root.json_stream(ff, **kwargs)
+            assert ff.getvalue() == cr.Root.json(**kwargs)
+            assert ff.num_writes > 1
+
+            ff = io.StringIO()
+            cr.Root.ritems['b'].json_stream(ff, **kwargs)
+            assert ff.getvalue() == cr.Root.ritems['b'].json(**kwargs)
+
+    assert '#ref' in config(prod).Root.json()
+    assert '"non_item": 7' in config(prod).Root.json()
+    assert 'hide_me' not in config(prod).Root.json()
+
+
+def test_json_stream_num_errors():
+    class Failing(ConfigItem):
+        @property
+        def fail(self):
+            raise Exception("Failing")
+
+    @mc_config(ef)
+    def config2(_):
+        Failing()
+
+    cr = config2.load(validate_properties=False)(prod)
+    cr.json_stream(io.StringIO())
+    assert cr.num_json_errors() == 1
@@ -0,0 +1,134 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import time
+
+from multiconf import mc_config, ConfigItem, ConfigBuilder
+from multiconf.envs import EnvFactory, MC_NO_ENV
+from multiconf.load_profile import PHASES, CALLBACK_PHASES
+
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+
+
+class Item(ConfigItem):
+    def __init__(self, aa: int = 1):
+        super().__init__()
+        self.aa = aa
+
+    def mc_init(self):
+        self.setattr('aa', default=2)
+
+    def mc_validate(self):
+        pass
+
+    def mc_post_validate(self):
+        pass
+
+    @property
+    def bb(self):
+        return self.aa
+
+
+class Builder(ConfigBuilder):
+    def mc_build(self):
+        Item()
+
+
+def _conf(_):
+    with ItemWithAA(aa=1):
+        with Item():
+            Item()
+        with ConfigItem():
+            Builder()
+
+
+def test_load_profile_phases_envs_classes():
+    @mc_config(ef)
+    def config(root):
+        _conf(root)
+
+    cr = config.load(profile=True)
+    prof = cr.mc_load_profile
+    stats = prof.stats
+
+    assert set(key[0] for key in stats) == set(PHASES)
+    assert stats['mc_init', pp, Item].count == 3
+    assert stats['mc_build', prod, Builder].count == 1
+    assert stats['mc_validate', prod, Item].count == 3
+    assert stats['validate_properties', pp, Item].count == 3
+    assert stats['mc_post_validate', MC_NO_ENV, Item].count == 3
+    assert stats['type_check', pp, Item].count == 3
+    assert stats['config', pp, type(cr)].count == 1
+
+    phases = prof.totals('phase')
+    assert phases['freeze',].count == 2 * 7  # Including the root
+    assert sum(stats.time for stats in phases.values()) == prof.total_time
+
+    assert set(prof.totals('env')) == {(pp,), (prod,), (MC_NO_ENV,)}
+    assert prof.totals()[()].count == sum(stats.count for stats in stats.values())
+
+    report = prof.report(top=2)
+    assert report.startswith("Load profile, total ")
+    assert report.split("Top classes:\n")[1].split("Top @properties:\n")[0].count('\n') == 2
+
+
+def test_load_profile_disabled():
+    @mc_config(ef, load_now=True)
+    def config(root):
+        _conf(root)
+
+    assert config.mc_load_profile is None
+
+
+def test_load_profile_lazy_load():
+    @mc_config(ef)
+    def config(root):
+        _conf(root)
+
+    cr = config.load(lazy_load=True, profile=True)
+    assert cr.mc_load_profile.stats == {}
+    cr(pp)
+    assert set(cr.mc_load_profile.totals('env')) == {(pp,)}
+
+
+def test_load_profile_top_classes_and_properties():
+    class Slow(ConfigItem):
+        def mc_validate(self):
+            time.sleep(0.002)
+
+        @property
+        def slow(self):
+            time.sleep(0.001)
+            return 1
+
+        @property
+        def fast(self):
+            return 1
+
+    @mc_config(ef)
+    def config(root):
+        _conf(root)
+        Slow()
+
+    prof = config.load(profile=True).mc_load_profile
+    assert set(prof.totals('phase')) == set((phase,) for phase in PHASES)
+
+    (cls, stats), _ = prof.top_classes(2)
+    assert cls is Slow
+    assert stats.count == 2 * (1 + 1 + 2) + 1  # mc_init, mc_validate and @property calls for two envs, and mc_post_validate
+    assert stats.time >= 0.006
+
+    assert [cls for cls, _ in prof.top_classes(phases=('mc_build',))] == [Builder]
+
+    top_props = prof.top_properties()
+    assert top_props[0][0] == (Slow, 'slow')
+    assert top_props[0][1].count == 2
+    assert set(key for key, _ in top_props) == {(Slow, 'slow'), (Slow, 'fast'), (Item, 'bb')}
+    assert prof.properties[pp, Slow, 'slow'].count == 1
+    assert ('property', pp, Item) in prof.stats
+    assert 'property' in CALLBACK_PHASES
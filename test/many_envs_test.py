@@ -69,3 +69,24 @@ def test_many_groups():
     assert conf.aa == 0
     assert conf.b is None
     assert conf.i == 10
+
+
+def test_many_envs_shared_values():
+    @mc_config(ef, load_now=True)
+    def config(_):
+        with ItemWithManyAttributes() as conf:
+            conf.setattr('aa', default=None, g0=0, e1_7=1)
+            conf.setattr('b', default=None)
+            conf.setattr('i', default=None, **{env.name: ii for ii, env in enumerate(envs[:20])})
+
+    conf = config(envs[0]).ItemWithManyAttributes
+
+    # The values are stored in a list indexed by env
+    assert len(conf._mc_attributes['aa'].env_values.indexed) == envs[-1].index + 1
+    assert [conf._mc_attributes['b'].env_values.indexed[env.index] for env in envs] == [None] * len(envs)
+
+    for ii, env in enumerate(envs):
+        item = config(env).ItemWithManyAttributes
+        assert item.aa == (0 if env in groups[0] else 1 if env.name == 'e1_7' else None)
+        assert item.b is None
+        assert item.i == (ii if ii < 20 else None)
@@ -138,3 +138,55 @@ def test_error_freezing_previous_sibling__validation(capsys):
     # This error is generated before the MC_REQUIRED check, ok as long as we get en error
     exp = "Repeated non repeatable conf item: 'inner': <class 'test.mc_required_attributes_test.{}inner'>"
     assert str(exinfo.value) == exp.format(local_func())
+
+
+def test_required_attributes_missing_location_in_init(capsys):
+    errorline = [None]
+
+    class root(ConfigItem):
+        def __init__(self):
+            super().__init__()
+            self.anattr = 1
+            errorline[0] = next_line_num()
+            self.anotherattr = MC_REQUIRED
+
+    @mc_config(ef)
+    def config(_):
+        root()
+
+    with raises(ConfigException):
+        config.load()
+
+    _sout, serr = capsys.readouterr()
+    assert lines_in(
+        serr,
+        start_file_line(__file__, errorline[0]),
+        config_error_mc_required_expected.format(attr='anotherattr', env=pp),
+    )
+
+
+def test_required_attributes_missing_no_capture_locations(capsys):
+    errorline = [None]
+
+    class root(ConfigItem):
+        def __init__(self):
+            super().__init__()
+            self.anattr = MC_REQUIRED
+            self.anotherattr = MC_REQUIRED
+
+    @mc_config(ef)
+    def config(_):
+        errorline[0] = next_line_num()
+        with root() as cr:
+            cr.anattr = 1
+
+    with raises(ConfigException):
+        config.load(capture_locations=False)
+
+    # The error is reported for the line defining the item, not the assignment in __init__
+    _sout, serr = capsys.readouterr()
+    assert lines_in(
+        serr,
+        start_file_line(__file__, errorline[0]),
+        config_error_mc_required_expected.format(attr='anotherattr', env=pp),
+    )
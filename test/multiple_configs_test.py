@@ -1,6 +1,9 @@
 # Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from multiconf import mc_config, ConfigItem, RepeatableConfigItem
 from multiconf.decorators import nested_repeatables, named_as, required
 from multiconf.envs import EnvFactory
@@ -81,3 +84,47 @@ def test_multiple_configs_different_env_factory():
     cr1 = aa()(pp)
     assert cr1.ItemWithAABB.aa == 1
     assert cr2.ItemWithAABB.aa == 3
+
+
+@named_as('tenant_items')
+class TenantItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=None):
+        super().__init__(mc_key=mc_key)
+        self.aa = aa
+
+
+@nested_repeatables('tenant_items')
+class Tenant(ConfigItem):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+
+def test_multiple_configs_load_concurrently():
+    num_tenants = 8
+    barrier = threading.Barrier(num_tenants, timeout=10)
+
+    def load_tenant(tenant_num):
+        @mc_config(ef)
+        def config(_):
+            with Tenant('tenant' + str(tenant_num)):
+                TenantItem('a', aa=tenant_num)
+                # Make sure all configs are in the middle of loading at the same time
+                barrier.wait()
+                with TenantItem('b') as ti:
+                    ti.setattr('aa', default=tenant_num, prod=tenant_num * 10)
+                    with ItemWithAABB(aa=tenant_num) as ci:
+                        ci.setattr('bb', pp=tenant_num + 1, default=0)
+
+        return config.load()
+
+    with ThreadPoolExecutor(max_workers=num_tenants) as pool:
+        configs = list(pool.map(load_tenant, range(num_tenants)))
+
+    for tenant_num, config in enumerate(configs):
+        tenant = config(prod).Tenant
+        assert tenant.name == 'tenant' + str(tenant_num)
+        assert tenant.tenant_items['a'].aa == tenant_num
+        assert tenant.tenant_items['b'].aa == tenant_num * 10
+        assert tenant.tenant_items['b'].ItemWithAABB.bb == 0
+        assert config(pp).Tenant.tenant_items['b'].ItemWithAABB.bb == tenant_num + 1
@@ -0,0 +1,220 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, DefaultItems, ConfigException, ConfigApiException, MC_REQUIRED, MC_TODO
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+
+from .utils.utils import replace_ids
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev1 = ef.Env('dev1')
+dev2 = ef.Env('dev2')
+g_dev = ef.EnvGroup('g_dev', dev1, dev2)
+tst = ef.Env('tst', allow_todo=True)
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+g_prod = ef.EnvGroup('g_prod', pp, prod)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None, mc_exclude=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include, mc_exclude=mc_exclude)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+        self.bb = None
+        self._private = None
+
+    def mc_validate(self):
+        self.bb = len(self.ritems)
+
+    @property
+    def cc(self):
+        return 'cc' + str(self.aa)
+
+
+class Shared(ConfigItem):
+    def __init__(self, xx=None):
+        super().__init__()
+        self.xx = xx
+
+    @property
+    def parent_aa(self):
+        return self.contained_in.aa
+
+
+class ItemWithRef(ConfigItem):
+    def __init__(self, aa=MC_REQUIRED, bb=MC_REQUIRED, ref=None):
+        super().__init__()
+        self.aa = aa
+        self.bb = bb
+        self.ref = ref
+
+
+class Builder(ConfigBuilder):
+    def __init__(self, prefix, num, mc_include=None):
+        super().__init__(mc_include=mc_include)
+        self.prefix = prefix
+        self.num = num
+
+    def mc_build(self):
+        for num in range(self.num):
+            RItem(mc_key=self.prefix + str(num), aa=num)
+
+
+def _conf(root):
+    with DefaultItems():
+        with ItemWithRef() as it:
+            it.bb = 'default_bb'
+
+    with Root(aa=1) as rt:
+        rt.setattr('aa', g_dev=2, prod=3)
+        rt.setattr('cc', pp='pp_cc', mc_overwrite_property=True)
+        rt._private = {'env': root.env}
+        RItem('a', aa=1)
+        with RItem('b', mc_exclude=[dev1, pp]) as ri:
+            ri.setattr('aa', default=2, prod=3)
+        if root.env in g_prod:
+            RItem('c', aa=rt)
+        with Builder('x', 2, mc_include=[g_dev, prod]):
+            Shared(xx=7)
+
+    with ItemWithRef(aa=1) as it:
+        it.setattr('aa', tst=MC_TODO)
+        it.ref = rt.ritems['a']
+
+    return root.env.name
+
+
+def _load(conf_func, **kwargs):
+    @mc_config(ef)
+    def config(root):
+        return conf_func(root)
+
+    return config.load(**kwargs)
+
+
+def test_parallel_load_same_as_sequential(capsys):
+    seq = _load(_conf)
+    seq_sout, seq_serr = capsys.readouterr()
+    par = _load(_conf, parallel=3)
+    par_sout, par_serr = capsys.readouterr()
+
+    assert par_sout == seq_sout
+    assert par_serr == seq_serr
+    assert "MC_TODO did not receive a value for env Env('tst')" in par_serr
+
+    for env in ef.envs.values():
+        par_json = par(env, allow_todo=True).json(builders=True, default_items=True)
+        assert replace_ids(par_json, named_as=False) == replace_ids(seq(env, allow_todo=True).json(builders=True, default_items=True), named_as=False)
+        assert par(env, allow_todo=True).mc_config_result == env.name
+
+    assert replace_ids(par.json(show_all_envs=True)) == replace_ids(seq.json(show_all_envs=True))
+
+
+def test_parallel_load_access():
+    par = _load(_conf, parallel=3)
+
+    cr = par(prod)
+    assert cr.Root.aa == 3
+    assert cr.Root.bb == 5
+    assert cr.Root.cc == 'cc3'
+    assert cr.Root._private['env'] is prod
+    assert cr.Root.ritems['c'].aa is cr.Root
+    assert cr.Root.ritems['x1'].Shared.parent_aa == 1
+    assert cr.ItemWithRef.ref is cr.Root.ritems['a']
+    assert cr.ItemWithRef.bb == 'default_bb'
+    assert list(cr.Root.ritems) == ['a', 'b', 'x0', 'x1', 'c']
+
+    cr = par(pp)
+    assert cr.Root.cc == 'pp_cc'
+    assert list(cr.Root.ritems) == ['a', 'c']
+    assert not cr.Root.ritems.all_items['x0']
+
+    cr = par(dev1)
+    assert list(cr.Root.ritems) == ['a', 'x0', 'x1']
+
+    with raises(ConfigException) as exinfo:
+        par(tst)
+    assert str(exinfo.value) == "Trying to get invalid configuration containing MC_TODO"
+
+    with raises(ConfigApiException):
+        par(prod).Root.aa = 7
+
+
+def test_parallel_load_error_reported_in_env_order(capsys):
+    def conf(root):
+        with ItemWithAA() as it:
+            it.setattr('aa', default=1, dev2=MC_REQUIRED, pp=MC_REQUIRED)
+            print("loading", root.env.name)
+
+    with raises(ConfigException) as exinfo:
+        _load(conf)
+    seq_ex = exinfo.value
+    seq_sout, seq_serr = capsys.readouterr()
+
+    with raises(ConfigException) as exinfo:
+        _load(conf, parallel=4)
+    par_ex = exinfo.value
+    par_sout, par_serr = capsys.readouterr()
+
+    assert replace_ids(str(par_ex)) == replace_ids(str(seq_ex))
+    assert par_sout == seq_sout == "loading dev1\nloading dev2\n"
+    assert replace_ids(par_serr) == replace_ids(seq_serr)
+    assert "Error loading env Env('dev2') in worker process" in str(par_ex.__cause__)
+
+
+def test_parallel_load_error_next_env(capsys):
+    def conf(_):
+        with ItemWithAA() as it:
+            it.setattr('aa', default=1, dev2=MC_REQUIRED, pp=MC_REQUIRED)
+
+    with raises(ConfigException) as exinfo:
+        _load(conf, error_next_env=True)
+    seq_ex = exinfo.value
+    seq_sout, seq_serr = capsys.readouterr()
+
+    with raises(ConfigException) as exinfo:
+        _load(conf, parallel=2, error_next_env=True)
+    par_sout, par_serr = capsys.readouterr()
+
+    assert str(exinfo.value) == str(seq_ex) == "The following envs had errors [Env('dev2'), Env('pp')]"
+    assert par_sout == seq_sout
+    assert replace_ids(par_serr) == replace_ids(seq_serr)
+
+
+def test_parallel_load_unpicklable_value():
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAA() as it:
+            it.aa = lambda: 1
+
+    with raises(Exception) as exinfo:
+        config.load(parallel=2)
+
+    assert "Error loading env Env('dev1') in worker process" in str(exinfo.value.__cause__)
+
+
+def test_parallel_lazy_load_single_pass():
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(1)
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(lazy_load=True, parallel=2)
+    assert str(exinfo.value) == "'parallel' cannot be used with 'lazy_load' or 'single_pass'."
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(single_pass=True, parallel=2)
+    assert str(exinfo.value) == "'parallel' cannot be used with 'lazy_load' or 'single_pass'."
@@ -0,0 +1,319 @@
+#!/usr/bin/python3
+
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Benchmark suite for loading, accessing and exporting synthetic configurations.
+
+Each scenario generates an env factory and a config tree from a set of parameters (see `BASE_PARAMS`) and measures the phases:
+
+envs:   Creating and freezing the env factory.
+load:   Loading the configuration (`load`).
+access: Instantiating the configuration for each env and reading all attributes.
+read:   Reading all attributes again, of the items found in the access phase (attribute reads only).
+json:   Creating the json output for one env (only if the 'json' parameter is set).
+
+The time of a phase is the minimum over the repeats. The peak memory (tracemalloc) of each phase is measured in a separate, untimed run.
+The results can be written as json with --output, and compared against a previous result with --baseline, which gives exit code 1 if any
+phase is slower or uses more memory than the baseline by more than the tolerance.
+
+Examples:
+    bench.py --list
+    bench.py -s base -s deep --output new.json
+    bench.py --baseline old.json --tolerance 0.2 -p envs=20
+"""
+
+import sys
+import gc
+import json
+import time
+import tracemalloc
+import cProfile
+
+import click
+
+import os.path
+from os.path import join as jp
+here = os.path.dirname(__file__)
+sys.path.insert(0, jp(here, '..', '..'))
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, DefaultItems, MC_REQUIRED
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+
+
+BASE_PARAMS = dict(
+    envs=6,  # Number of envs
+    groups=2,  # Number of env groups, envs are distributed round robin
+    depth=3,  # Levels of nested repeatable items
+    width=8,  # Number of repeatable items nested under each item
+    attributes=4,  # Number of env specific attributes per item
+    builders=0,  # Number of builders under each top level item, each building 'width' items
+    default_items=False,  # Define a DefaultItems with default values for the nested items
+    properties=0,  # Number of @property methods per item, validated when loading
+    lazy_load=False,  # Load with lazy_load, instantiating envs when accessed
+    json=False,  # Measure json output for one env
+)
+
+SCENARIOS = {
+    'base': {},
+    'many_envs': dict(envs=30, groups=8),
+    'many_groups': dict(envs=30, groups=60),
+    'deep': dict(depth=6, width=3),
+    'wide': dict(depth=1, width=1000),
+    'repeatables': dict(depth=2, width=25),
+    'builders': dict(builders=4),
+    'default_items': dict(default_items=True),
+    'properties': dict(properties=10),
+    'lazy_load': dict(lazy_load=True),
+    'json': dict(json=True),
+}
+
+PHASES = ('envs', 'load', 'access', 'read', 'json')
+
+
+@named_as('nodes')
+@nested_repeatables('nodes')
+class Node(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, bb=None):
+        super().__init__(mc_key=mc_key)
+        self.aa = aa
+        self.bb = bb
+
+
+@nested_repeatables('nodes')
+class Root(ConfigItem):
+    pass
+
+
+class NodeBuilder(ConfigBuilder):
+    def __init__(self, prefix, num):
+        super().__init__(mc_key=prefix)
+        self.prefix = prefix
+        self.num = num
+
+    def mc_build(self):
+        for ii in range(self.num):
+            Node(mc_key=self.prefix + '_' + str(ii), aa=ii)
+
+
+def _node_class(num_properties):
+    if not num_properties:
+        return Node
+
+    def prop(num):
+        return property(lambda self: self.aa + num)
+
+    return type('PropNode', (Node,), {'p' + str(ii): prop(ii) for ii in range(num_properties)})
+
+
+def _make_envs(params):
+    ef = EnvFactory()
+    envs = [ef.Env('e' + str(ii)) for ii in range(params['envs'])]
+    groups = [ef.EnvGroup('g' + str(ii), *envs[ii % len(envs)::max(params['groups'], 1)]) for ii in range(params['groups'])]
+    ef._mc_calc_env_group_order()
+    return ef, envs, groups
+
+
+def _make_config(params, ef, envs, groups):
+    node_cls = _node_class(params['properties'])
+    env_names = [env.name for env in envs]
+    group_names = [group.name for group in groups]
+
+    def add_nodes(level, prefix):
+        for ii in range(params['width']):
+            key = prefix + str(ii)
+            with node_cls(key, aa=ii) as node:
+                for jj in range(params['attributes']):
+                    values = {env_names[(ii + jj) % len(env_names)]: jj}
+                    if group_names:
+                        values[group_names[jj % len(group_names)]] = -jj
+                    node.setattr('x' + str(jj), default=key, mc_set_unknown=True, **values)
+                if level > 1:
+                    add_nodes(level - 1, key + '_')
+
+    @mc_config(ef)
+    def config(_):
+        if params['default_items']:
+            with DefaultItems():
+                node_cls('default', aa=0, bb='default')
+
+        with Root():
+            for ii in range(params['builders']):
+                NodeBuilder('b' + str(ii), num=params['width'])
+            if params['depth']:
+                add_nodes(params['depth'], '')
+
+    return config
+
+
+def _access(config, envs):
+    """Return list of (env, items): The items of the configuration for each env."""
+    env_items = []
+    for env in envs:
+        items = []
+        todo = [config(env).Root]
+        while todo:
+            item = todo.pop()
+            items.append(item)
+            todo.extend(item.nodes.values())
+            for name in item._mc_attributes:
+                getattr(item, name)
+        env_items.append((env, items))
+    return env_items
+
+
+def _read(config, env_items):
+    for env, items in env_items:
+        config(env)
+        for item in items:
+            for name in item._mc_attributes:
+                getattr(item, name)
+
+
+class _Run():
+    """Run the phases of one scenario once, keeping the state needed by the next phase."""
+
+    def __init__(self, params):
+        self.params = params
+        self.ef = self.envs = self.groups = self.config = self.env_items = None
+
+    def phase(self, name):
+        params = self.params
+        if name == 'envs':
+            self.ef, self.envs, self.groups = _make_envs(params)
+        elif name == 'load':
+            self.config = _make_config(params, self.ef, self.envs, self.groups)
+            self.config.load(validate_properties=bool(params['properties']), lazy_load=params['lazy_load'])
+        elif name == 'access':
+            self.env_items = _access(self.config, self.envs)
+        elif name == 'read':
+            _read(self.config, self.env_items)
+        elif name == 'json':
+            self.config(self.envs[-1]).json()
+
+    def phases(self):
+        return [phase for phase in PHASES if phase != 'json' or self.params['json']]
+
+
+def _run_scenario(params, repeat, profile_prefix=None):
+    """Return dict: phase -> dict(time=seconds, peak_mem=bytes)"""
+    phases = _Run(params).phases()
+    times = {phase: [] for phase in phases}
+    for _ in range(repeat):
+        run = _Run(params)
+        for phase in phases:
+            gc.collect()
+            start = time.perf_counter()
+            run.phase(phase)
+            times[phase].append(time.perf_counter() - start)
+
+    peak_mem = {}
+    run = _Run(params)
+    tracemalloc.start()
+    try:
+        for phase in phases:
+            gc.collect()
+            tracemalloc.reset_peak()
+            start_mem = tracemalloc.get_traced_memory()[0]
+            run.phase(phase)
+            peak_mem[phase] = tracemalloc.get_traced_memory()[1] - start_mem
+    finally:
+        tracemalloc.stop()
+
+    if profile_prefix:
+        run = _Run(params)
+        for phase in phases:
+            prof = cProfile.Profile()
+            prof.runcall(run.phase, phase)
+            prof.dump_stats(profile_prefix + phase + '.profile')
+
+    return {phase: dict(time=min(times[phase]), peak_mem=peak_mem[phase]) for phase in phases}
+
+
+def compare(results, baseline, tolerance, min_time=0.005, min_mem=100000):
+    """Compare 'results' with 'baseline' for scenarios which were run with the same parameters.
+
+    A phase is a regression if it is worse than in 'baseline' by more than 'tolerance' (fraction) and by more than 'min_time' seconds or
+    'min_mem' bytes, so that noise in very short phases is ignored.
+
+    Return (regressions, skipped): Lists of messages.
+    """
+
+    regressions = []
+    skipped = []
+    for scenario, result in results.items():
+        base = baseline.get(scenario)
+        if base is None or base['params'] != result['params']:
+            skipped.append("{}: {}".format(scenario, "not in baseline" if base is None else "parameters differ from baseline"))
+            continue
+
+        for phase, measured in result['phases'].items():
+            base_measured = base['phases'].get(phase)
+            if base_measured is None:
+                continue
+            for metric, min_diff in ('time', min_time), ('peak_mem', min_mem):
+                new, old = measured[metric], base_measured[metric]
+                if new > old * (1 + tolerance) and new - old > min_diff:
+                    regressions.append("{scenario}/{phase} {metric}: {new:.4g} > {old:.4g} (+{pct:.0f}%)".format(
+                        scenario=scenario, phase=phase, metric=metric, new=new, old=old, pct=(new / old - 1) * 100 if old else float('inf')))
+
+    return regressions, skipped
+
+
+def _parse_param(param):
+    name, _, value = param.partition('=')
+    if name not in BASE_PARAMS:
+        raise click.BadParameter("Unknown parameter '{}', must be one of {}".format(name, list(BASE_PARAMS)))
+    if isinstance(BASE_PARAMS[name], bool):
+        return name, value.lower() in ('1', 'true', 'yes')
+    return name, int(value)
+
+
+@click.command()
+@click.option("-s", "--scenario", "scenarios", multiple=True, help="Scenario to run, may be repeated. Default is all scenarios.")
+@click.option("-p", "--param", "params", multiple=True, help="Override a scenario parameter, e.g. envs=20. May be repeated.")
+@click.option("--repeat", default=3, help="Number of timed runs of each scenario.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results as json to this file.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Compare results with this previous output file.")
+@click.option("--tolerance", default=0.25, help="Allowed fraction of increase compared to the baseline, before it is a regression.")
+@click.option("--profile/--no-profile", default=False, help="Write a cProfile file per scenario and phase.")
+@click.option("--list", "list_scenarios", is_flag=True, help="List scenarios and parameters and exit.")
+def cli(scenarios, params, repeat, output, baseline, tolerance, profile, list_scenarios):
+    if list_scenarios:
+        print("parameters:", json.dumps(BASE_PARAMS))
+        for name, overrides in SCENARIOS.items():
+            print(name, json.dumps(overrides))
+        return
+
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise click.BadParameter("Unknown scenarios {}, must be in {}".format(unknown, list(SCENARIOS)))
+
+    overrides = dict(_parse_param(param) for param in params)
+    results = {}
+    for name in scenarios or SCENARIOS:
+        scenario_params = dict(BASE_PARAMS, **SCENARIOS[name], **overrides)
+        phases = _run_scenario(scenario_params, repeat, profile_prefix=jp(here, name + '_') if profile else None)
+        results[name] = dict(params=scenario_params, phases=phases)
+        print(name, ' '.join("{}: {:.4f}s {:.1f}MB".format(phase, mm['time'], mm['peak_mem'] / 1e6) for phase, mm in phases.items()))
+
+    if output:
+        with open(output, 'w') as ff:
+            json.dump(results, ff, indent=2)
+
+    if baseline:
+        with open(baseline) as ff:
+            regressions, skipped = compare(results, json.load(ff), tolerance)
+        for msg in skipped:
+            print("Not compared:", msg)
+        if regressions:
+            print("Regressions compared to {}:".format(baseline), file=sys.stderr)
+            for msg in regressions:
+                print("  " + msg, file=sys.stderr)
+            sys.exit(1)
+        print("No regressions compared to", baseline)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Benchmark for freezing large synthetic env factories (EnvFactory._mc_calc_env_group_order) and resolving values.
+
+Envs are generated per customer and region. Each customer and each region has a group, regions are grouped in continents, and a number
+of overlapping 'rollout' groups contain envs from different customers, creating ambiguities.
+"""
+
+import sys
+import timeit
+import random
+
+import click
+
+import os.path
+from os.path import join as jp
+here = os.path.dirname(__file__)
+sys.path.insert(0, jp(here, '..', '..'))
+
+from multiconf.envs import EnvFactory
+
+
+def make_factory(num_customers, num_regions, num_continents, num_rollouts, rollout_percent, seed=17):
+    rnd = random.Random(seed)
+    ef = EnvFactory()
+
+    envs = {}
+    for cc in range(num_customers):
+        for rr in range(num_regions):
+            envs[cc, rr] = ef.Env('e_c{}_r{}'.format(cc, rr))
+
+    for cc in range(num_customers):
+        ef.EnvGroup('g_c{}'.format(cc), *[envs[cc, rr] for rr in range(num_regions)])
+
+    regions = []
+    for rr in range(num_regions):
+        regions.append(ef.EnvGroup('g_r{}'.format(rr), *[envs[cc, rr] for cc in range(num_customers)]))
+
+    for co in range(num_continents):
+        ef.EnvGroup('g_co{}'.format(co), *regions[co::num_continents])
+
+    all_envs = list(envs.values())
+    for ro in range(num_rollouts):
+        ef.EnvGroup('g_ro{}'.format(ro), *rnd.sample(all_envs, len(all_envs) * rollout_percent // 100))
+
+    return ef
+
+
+def resolve_all(ef):
+    env_values = dict(default=1, g_co0=2, g_r1=3, g_c2=4, e_c3_r3=5)
+    for env in ef.envs.values():
+        try:
+            ef._mc_resolve_env_group_value(env, env_values)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+
+@click.command()
+@click.option("--customers", default=200)
+@click.option("--regions", default=10)
+@click.option("--continents", default=3)
+@click.option("--rollouts", default=80)
+@click.option("--rollout-percent", default=25, help="Percentage of all envs in each rollout group.")
+@click.option("--repeat", default=3)
+def cli(customers, regions, continents, rollouts, rollout_percent, repeat):
+    print("envs: {}, groups: {}".format(customers * regions, customers + regions + continents + rollouts))
+
+    def create():
+        return make_factory(customers, regions, continents, rollouts, rollout_percent)
+
+    times = sorted(timeit.repeat(create, repeat=repeat, number=1))
+    print("create", ["{:.4f}".format(tt) for tt in times])
+
+    factories = [create() for _ in range(repeat)]
+    times = sorted(timeit.repeat(lambda: factories.pop()._mc_calc_env_group_order(), repeat=repeat, number=1))
+    print("freeze", ["{:.4f}".format(tt) for tt in times])
+
+    ef = create()
+    ef._mc_calc_env_group_order()
+    times = sorted(timeit.repeat(lambda: resolve_all(ef), repeat=repeat, number=10))
+    print("resolve x 10", ["{:.4f}".format(tt) for tt in times])
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Memory benchmark for item parent proxies, based on the demo weblogic config, scaled up.
+
+Items defined in the 'with' block of a builder are inserted (proxied) under each item created by the builder, so every managed server
+gets proxies for the shared items.
+Run with --uncached to get numbers for creating a new proxy class for each proxied item.
+"""
+
+import sys
+import gc
+import tracemalloc
+
+import click
+
+import os.path
+from os.path import join as jp
+here = os.path.dirname(__file__)
+sys.path.insert(0, jp(here, '..', '..'))
+sys.path.insert(0, jp(here, '..', '..', 'demo'))
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem
+from multiconf import multiconf as mc_module
+from multiconf.decorators import named_as, nested_repeatables
+from multiconf.envs import EnvFactory
+
+from framework import weblogic_config, admin_server, managed_servers, datasource  # pylint: disable=wrong-import-order
+
+
+@nested_repeatables('domains')
+class domains_config(ConfigItem):
+    pass
+
+
+@named_as('domains')
+class domain(RepeatableConfigItem):
+    pass
+
+
+class server_start(ConfigItem):
+    def __init__(self, arguments):
+        super().__init__()
+        self.arguments = arguments
+
+
+class log_config(ConfigItem):
+    def __init__(self, file_count):
+        super().__init__()
+        self.file_count = file_count
+
+
+def _uncached_item_parent_proxy_factory(ci, item):
+    cls_name = 'ItemParentProxy:<' + type(item).__module__ + '.' + type(item).__name__ + '>'
+    ItemParentProxy = type(cls_name, (mc_module._ItemParentProxy,), {})
+    return ItemParentProxy(ci, item)
+
+
+def weblogic(num_domains, num_servers):
+    ef = EnvFactory()
+    devlocal = ef.Env('devlocal')
+    devi = ef.Env('devi')
+    devs = ef.Env('devs')
+    preprod = ef.Env('preprod')
+    prod = ef.Env('prod')
+    g_dev = ef.EnvGroup('g_dev', devlocal, devi, devs)
+    g_prod = ef.EnvGroup('g_prod', preprod, prod)
+
+    @mc_config(ef)
+    def config(_):
+        with domains_config():
+            for domain_num in range(num_domains):
+                with domain(mc_key=domain_num), weblogic_config() as dc:
+                    dc.setattr('base_port', g_prod=7000, devi=7100, devs=7200, devlocal=7300)
+                    admin_server(host='admin.mydomain', port=dc.base_port + 1)
+
+                    with managed_servers(num_servers=num_servers, host_pattern='ms%(n)d.mydomain', base_port=dc.base_port) as ms:
+                        ms.setattr('num_servers', g_dev=1)
+                        server_start(arguments='-Xmx1024m')
+                        with log_config(file_count=10) as lc:
+                            lc.setattr('file_count', g_dev=2)
+
+                    datasource('SampleDS_one', database_type="OracleRAC")
+
+    return config
+
+
+@click.command()
+@click.option("--domains", default=20)
+@click.option("--servers", default=100)
+@click.option("--uncached/--cached", default=False, help="Create a new proxy class for every proxied item (the old behaviour).")
+def cli(domains, servers, uncached):
+    if uncached:
+        mc_module._mc_item_parent_proxy_factory = _uncached_item_parent_proxy_factory
+
+    gc.collect()
+    tracemalloc.start()
+    config = weblogic(domains, servers)
+    config.load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_proxy_classes = len({type(obj) for obj in gc.get_objects() if isinstance(obj, mc_module._ItemParentProxy)})
+    print("proxy factory:", "uncached" if uncached else "cached")
+    print("proxy classes:", num_proxy_classes)
+    print("memory current: {:.1f} MiB, peak: {:.1f} MiB".format(current / 1024 / 1024, peak / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    cli()
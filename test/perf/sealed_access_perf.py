@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+"""Micro benchmark of reading attributes through the env proxy, `config(env).item.attr`, before and after `McConfigRoot.seal`."""
+
+import sys
+import timeit
+
+import click
+
+import os.path
+from os.path import join as jp
+here = os.path.dirname(__file__)
+sys.path.insert(0, jp(here, '..', '..'))
+
+from multiconf import mc_config, ConfigItem
+from multiconf.envs import EnvFactory
+
+
+class Item(ConfigItem):
+    def __init__(self, aa=None, bb=None):
+        super().__init__()
+        self.aa = aa
+        self.bb = bb
+
+
+def _config(num_envs):
+    ef = EnvFactory()
+    envs = [ef.Env('e' + str(ii)) for ii in range(num_envs)]
+    group = ef.EnvGroup('g', *envs[::2])
+
+    @mc_config(ef)
+    def config(_):
+        with Item(aa=0) as it:
+            it.setattr('aa', **{group.name: 1, envs[-1].name: 2})
+            it.setattr('bb', default=[1, 2])
+
+    return config.load(), envs
+
+
+@click.command()
+@click.option("--envs", default=10, help="Number of envs.")
+@click.option("--number", default=200000, help="Number of reads per measurement.")
+@click.option("--repeat", default=5, help="Number of measurements, the minimum is reported.")
+def cli(envs, number, repeat):
+    config, env_list = _config(envs)
+    cr = config(env_list[0])
+
+    def read():
+        return cr.Item.aa
+
+    def measure():
+        return min(timeit.repeat(read, number=number, repeat=repeat)) / number * 1e9
+
+    unsealed = measure()
+    config.seal()
+    sealed = measure()
+    print("unsealed: {:.0f} ns/read, sealed: {:.0f} ns/read, speedup: {:.2f}x".format(unsealed, sealed, unsealed / sealed))
+
+
+if __name__ == "__main__":
+    cli()
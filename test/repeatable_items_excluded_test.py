@@ -188,3 +188,23 @@ def test_repeatable_items_bool():
     assert not rep.Xs
     assert rep.Ys
     assert not rep.Zs
+
+
+def test_repeatable_items_env_index():
+    @mc_config(ef, load_now=True)
+    def config(root):
+        with nc_aa_root(1):
+            with rchild("first", aa=1) as ci:
+                ci.mc_select_envs(exclude=[prod])
+            rchild("second", aa=2)
+
+    cr = config(prod).nc_aa_root
+    assert len(cr.children) == 1
+    assert list(cr.children.keys()) == ["second"]
+    assert [ci.aa for ci in cr.children.values()] == [2]
+    assert [ci.aa for _, ci in cr.children._mc_env_index[prod.mask]] == [2]
+
+    cr = config(pp).nc_aa_root
+    assert len(cr.children) == 2
+    assert list(cr.children) == ["first", "second"]
+    assert [key for key, _ in cr.children._mc_env_index[pp.mask]] == ["first", "second"]
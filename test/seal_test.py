@@ -0,0 +1,102 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, MC_TODO, McTodoHandling, ConfigApiException, ConfigExcludedAttributeError
+from multiconf.envs import EnvFactory
+from multiconf.attribute import Where
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+prod = ef.Env('prod')
+
+
+class Item(ConfigItem):
+    def __init__(self, aa=None, mc_include=None):
+        super().__init__(mc_include=mc_include)
+        self.aa = aa
+
+
+def _config():
+    @mc_config(ef)
+    def config(_):
+        with Item(aa=1) as it:
+            it.setattr('aa', prod=2)
+            it.setattr('bb', default=[1], mc_set_unknown=True)
+        with ConfigItem() as it:
+            Item(aa=3, mc_include=[prod])
+
+    return config
+
+
+def test_seal_attribute_values():
+    config = _config()
+    config.load()
+    assert config.seal() is config
+
+    cr = config(dev)
+    assert cr.Item.aa == 1
+    assert cr.Item.bb == [1]
+    assert config(prod).Item.aa == 2
+    assert config(prod).ConfigItem.Item.aa == 3
+    assert '"aa": 2' in config(prod).Item.json()
+
+
+def test_seal_value_not_marked_as_used():
+    config = _config()
+    config.load()
+    config.seal()
+
+    cr = config(dev)
+    assert cr.Item.aa == 1
+    assert cr.Item._mc_attributes['aa'].where_from != Where.FROZEN
+
+
+def test_seal_excluded():
+    config = _config()
+    config.load()
+    config.seal()
+
+    with raises(ConfigExcludedAttributeError):
+        print(config(dev).ConfigItem.Item.aa)
+
+
+def test_seal_not_loaded():
+    config = _config()
+    with raises(ConfigApiException) as exinfo:
+        config.seal()
+    assert str(exinfo.value) == "Only a configuration which is loaded for all envs can be sealed."
+
+    config.load(lazy_load=True)
+    config(dev)
+    with raises(ConfigApiException) as exinfo:
+        config.seal()
+    assert str(exinfo.value) == "Only a configuration which is loaded for all envs can be sealed."
+
+
+def test_seal_warm_up():
+    config = _config()
+    config.load(lazy_load=True, warm_up=True)
+    config(dev)
+    config.loaded_future().result(timeout=10)
+
+    config.seal()
+    assert config(prod).Item.aa == 2
+
+
+def test_seal_todo():
+    ef_todo = EnvFactory()
+    ef_todo.Env('dev')
+    ef_todo.Env('pp', allow_todo=True)
+
+    @mc_config(ef_todo)
+    def config(_):
+        with Item() as it:
+            it.setattr('aa', default=1, pp=MC_TODO)
+
+    config.load(todo_handling_allowed=McTodoHandling.SILENT)
+    with raises(ConfigApiException) as exinfo:
+        config.seal()
+    assert str(exinfo.value) == "A configuration with MC_TODO values can not be sealed, found in [Env('pp')]."
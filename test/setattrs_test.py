@@ -0,0 +1,177 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import re
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, ConfigException, MC_REQUIRED
+from multiconf.envs import EnvFactory
+
+from .utils.utils import replace_ids, config_error, next_line_num, file_line
+from .utils.messages import setattr_not_defined_in_init_expected
+
+
+ef = EnvFactory()
+dev1 = ef.Env('dev1')
+dev2 = ef.Env('dev2')
+g_dev = ef.EnvGroup('g_dev', dev1, dev2)
+g_dev_overlap = ef.EnvGroup('g_dev_overlap', dev2)
+prod = ef.Env('prod')
+
+
+def ce(line_num, *lines):
+    return config_error(__file__, line_num, *lines)
+
+
+class Item(ConfigItem):
+    def __init__(self):
+        super().__init__()
+        self.aa = MC_REQUIRED
+        self.bb = MC_REQUIRED
+        self.cc = MC_REQUIRED
+        self.dd = None
+
+
+def test_setattrs_same_as_setattr():
+    @mc_config(ef, load_now=True)
+    def config1(_):
+        with Item() as it:
+            it.setattr('aa', default=1, prod=2)
+            it.setattr('bb', default=3, prod=4)
+            it.setattr('cc', g_dev=5, prod=6)
+            it.setattr('ee', default=None, dev1=7, mc_set_unknown=True)
+
+    @mc_config(ef, load_now=True)
+    def config2(_):
+        with Item() as it:
+            it.setattrs({
+                'aa': dict(default=1, prod=2),
+                'bb': dict(default=3, prod=4),
+                'cc': dict(g_dev=5, prod=6),
+            })
+            it.setattrs({'ee': dict(default=None, dev1=7)}, mc_set_unknown=True)
+
+    for env in ef.envs.values():
+        assert replace_ids(config2(env).json()) == replace_ids(config1(env).json())
+
+    it = config2(dev2).Item
+    assert (it.aa, it.bb, it.cc, it.ee) == (1, 3, 5, None)
+    it = config2(prod).Item
+    assert (it.aa, it.bb, it.cc) == (2, 4, 6)
+
+
+def test_setattrs_overridden_setattr(capsys):
+    calls = []
+
+    class OverrideItem(Item):
+        def setattr(self, attr_name, *, mc_error_info_up_level=2, **kwargs):  # pylint: disable=arguments-differ
+            calls.append(attr_name)
+            if attr_name == 'aa':
+                kwargs = {key: val * 10 if isinstance(val, int) else val for key, val in kwargs.items()}
+            super().setattr(attr_name, mc_error_info_up_level=mc_error_info_up_level + 1, **kwargs)
+
+    @mc_config(ef, load_now=True)
+    def config(_):
+        with OverrideItem() as it:
+            it.setattrs({'aa': dict(default=1, prod=2), 'bb': dict(default=3), 'cc': dict(default=5)})
+            it.setattrs({'ee': dict(default=7)}, mc_set_unknown=True)
+
+    assert calls == ['aa', 'bb', 'cc', 'ee'] * len(ef.envs)
+    it = config(prod).OverrideItem
+    assert (it.aa, it.bb, it.cc, it.ee) == (20, 3, 5, 7)
+    assert config(dev1).OverrideItem.aa == 10
+
+    errorline = [None]
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config2(_):
+            with OverrideItem() as it:
+                errorline[0] = next_line_num()
+                it.setattrs({'aa': dict(default=1), 'bb': dict(default=1), 'cc': dict(default=1), 'ee': dict(default=1)})
+
+    _sout, serr = capsys.readouterr()
+    assert serr == ce(errorline[0], setattr_not_defined_in_init_expected.format('ee'))
+
+
+def test_setattrs_single_pass():
+    @mc_config(ef)
+    def config(_):
+        with Item() as it:
+            it.setattrs({'aa': dict(default=1, prod=2), 'bb': dict(default=3, g_dev=4), 'cc': dict(default=5)})
+
+    config.load(single_pass=True)
+    assert config(dev1).Item.bb == 4
+    assert config(prod).Item.aa == 2
+    assert config(prod).Item.cc == 5
+
+
+def test_setattrs_unknown_env_names(capsys):
+    errorline = [None]
+
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config(_):
+            with Item() as it:
+                errorline[0] = next_line_num()
+                it.setattrs({'aa': dict(default=1, pros=2), 'bb': dict(default=1, pros=2), 'cc': dict(default=1)})
+
+    _sout, serr = capsys.readouterr()
+    # Only one error for the same names
+    assert serr == ce(errorline[0], "No such Env or EnvGroup: 'pros'")
+
+
+def test_setattrs_ambiguous(capsys):
+    errorline = [None]
+
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config(_):
+            with Item() as it:
+                errorline[0] = next_line_num()
+                it.setattrs({'aa': dict(default=1, g_dev=2, g_dev_overlap=3), 'bb': dict(default=1), 'cc': dict(default=1)})
+
+    _sout, serr = capsys.readouterr()
+    assert serr.startswith(file_line(__file__, errorline[0]))
+    assert "ConfigError: Value for Env('dev2') is specified more than once, with no single most specific group or direct env:\nvalue: 2, from: EnvGroup('g_dev')" in serr
+
+
+def test_setattrs_errors(capsys):
+    errorline = [None]
+
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config(_):
+            with Item() as it:
+                errorline[0] = next_line_num()
+                it.setattrs({'aa': dict(default=1), '_bb': dict(default=1), 'cc': {}, 'ee': dict(default=1)})
+
+    _sout, serr = capsys.readouterr()
+    assert serr == ce(
+        errorline[0],
+        "Trying to set attribute '_bb' on a config item. Atributes starting with '_' cannot be set using item.setattr. Use assignment instead.") + \
+        ce(errorline[0], "No Env or EnvGroup names specified.") + \
+        ce(errorline[0], setattr_not_defined_in_init_expected.format('ee'))
+
+
+def test_setattrs_errors_same_as_setattr(capsys):
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config1(_):
+            with Item() as it:
+                it.setattr('_mc_aa', default=1)
+                it.setattr('aa', default=1, g_dev=2, g_dev_overlap=3, pros=4)
+                it.setattr('bb', default=1)
+                it.setattr('cc', default=1)
+
+    _sout, serr1 = capsys.readouterr()
+
+    with raises(ConfigException):
+        @mc_config(ef, load_now=True)
+        def config2(_):
+            with Item() as it:
+                it.setattrs({'_mc_aa': dict(default=1), 'aa': dict(default=1, g_dev=2, g_dev_overlap=3, pros=4), 'bb': dict(default=1), 'cc': dict(default=1)})
+
+    _sout, serr2 = capsys.readouterr()
+    assert "No such Env or EnvGroup: 'pros'" in serr1
+    assert re.sub(r'line \d+', 'line N', serr2) == re.sub(r'line \d+', 'line N', serr1)
@@ -0,0 +1,182 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, ConfigException, ConfigApiException, MC_REQUIRED
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+
+from .utils.utils import replace_ids
+from .utils.tstclasses import ItemWithAA, ItemWithAABB
+
+
+ef = EnvFactory()
+dev1 = ef.Env('dev1')
+dev2 = ef.Env('dev2')
+g_dev = ef.EnvGroup('g_dev', dev1, dev2)
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+g_prod = ef.EnvGroup('g_prod', pp, prod)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None, mc_exclude=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include, mc_exclude=mc_exclude)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+
+
+class ItemWithMcInit(ItemWithAABB):
+    def mc_init(self):
+        self.setattr('aa', default=7, pp=8)
+        self.bb = 9
+
+
+class Builder(ConfigBuilder):
+    def __init__(self, prefix, num, mc_include=None):
+        super().__init__(mc_include=mc_include)
+        self.prefix = prefix
+        self.num = num
+
+    def mc_build(self):
+        for num in range(self.num):
+            RItem(mc_key=self.prefix + str(num), aa=num)
+
+
+def _assert_single_pass_equal(conf_func):
+    @mc_config(ef)
+    def config_multi(root):
+        conf_func(root)
+
+    @mc_config(ef)
+    def config_single(root):
+        conf_func(root)
+
+    multi = config_multi.load()
+    single = config_single.load(single_pass=True)
+
+    for env in ef.envs.values():
+        assert replace_ids(single(env).json(), named_as=False) == replace_ids(multi(env).json(), named_as=False)
+
+
+def test_single_pass_assign_and_setattr():
+    def conf(_):
+        with Root(aa=1) as rt:
+            rt.setattr('aa', g_dev=2, prod=3)
+            with ItemWithAABB(bb=11) as it:
+                it.setattr('aa', default=1, dev1=12)
+                it.setattr('bb', g_prod=13)
+
+    _assert_single_pass_equal(conf)
+
+
+def test_single_pass_include_exclude_and_select_envs():
+    def conf(_):
+        with Root() as rt:
+            rt.aa = 1
+            RItem('a', aa=1)
+            with RItem('b', mc_exclude=[dev1, pp]) as ri:
+                ri.setattr('aa', default=2, prod=3)
+            with RItem('c', mc_include=[g_dev]) as ri:
+                ri.setattr('aa', default=4, dev2=5)
+            with ItemWithAA() as it:
+                it.mc_select_envs(exclude=[prod])
+                it.aa = 6
+
+    _assert_single_pass_equal(conf)
+
+
+def test_single_pass_mc_init_and_builder():
+    def conf(_):
+        with Root() as rt:
+            with ItemWithMcInit(aa=1) as it:
+                it.setattr('aa', prod=17)
+            Builder('a', 3)
+            Builder('b', 2, mc_include=[g_prod])
+            rt.setattr('aa', default=1, dev2=2)
+
+    _assert_single_pass_equal(conf)
+
+
+def test_single_pass_mc_required_error_all_envs(capsys):
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAA() as it:
+            it.setattr('aa', dev1=MC_REQUIRED, default=1)
+
+    with raises(ConfigException) as exinfo:
+        config.load(single_pass=True)
+
+    _sout, serr = capsys.readouterr()
+    assert "Attribute: 'aa' MC_REQUIRED did not receive a value for env Env('dev1')" in serr
+    assert "for env Env('dev2')" not in serr
+    assert "There was 1 error when defining item" in str(exinfo.value)
+
+
+def test_single_pass_read_env_specific_value():
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAABB() as it:
+            it.setattr('aa', default=1, prod=2)
+            it.bb = it.aa
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(single_pass=True)
+
+    assert "Trying to access attribute 'aa' which has env specific values while loading with 'single_pass'" in str(exinfo.value)
+
+
+def test_single_pass_read_common_value():
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAABB() as it:
+            it.setattr('aa', default=1, dev1=1)
+            it.bb = it.aa + 1
+
+    cr = config.load(single_pass=True)
+    assert cr(prod).ItemWithAABB.bb == 2
+    assert cr(dev1).ItemWithAABB.bb == 2
+
+
+def test_single_pass_access_partially_excluded_repeatable_item():
+    @mc_config(ef)
+    def config(_):
+        with Root() as rt:
+            RItem('a', aa=1, mc_exclude=[dev1])
+            rt.aa = rt.ritems['a'].aa
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(single_pass=True)
+
+    assert "Trying to access repeatable item 'a' which is excluded from some envs while loading with 'single_pass'" in str(exinfo.value)
+
+
+def test_single_pass_env_access():
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAA() as it:
+            it.aa = it.env
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(single_pass=True)
+
+    assert "Trying to access 'env' while loading with 'single_pass'" in str(exinfo.value)
+
+
+def test_single_pass_lazy_load():
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(1)
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(lazy_load=True, single_pass=True)
+
+    assert str(exinfo.value) == "'single_pass' cannot be used with 'lazy_load'."
@@ -0,0 +1,290 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import sys
+import textwrap
+import importlib
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigBuilder, ConfigApiException, MC_REQUIRED
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory
+import multiconf
+from multiconf import snapshot
+
+from .utils.utils import replace_ids
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+tst = ef.Env('tst')
+prod = ef.Env('prod')
+g_dev = ef.EnvGroup('g_dev', dev, tst)
+
+
+@named_as('ritems')
+class RItem(RepeatableConfigItem):
+    def __init__(self, mc_key, aa=MC_REQUIRED, mc_include=None):
+        super().__init__(mc_key=mc_key, mc_include=mc_include)
+        self.aa = aa
+
+
+@nested_repeatables('ritems')
+class Root(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+        self._post_validated = False
+
+    def mc_post_validate(self):
+        self._post_validated = True
+
+
+class Shared(ConfigItem):
+    def __init__(self, xx=None):
+        super().__init__()
+        self.xx = xx
+
+
+class Builder(ConfigBuilder):
+    def __init__(self, num):
+        super().__init__()
+        self.num = num
+
+    def mc_build(self):
+        for num in range(self.num):
+            RItem(mc_key='b' + str(num), aa=num)
+
+
+def _snapshot_config(calls):
+    @mc_config(ef)
+    def config(root):
+        calls.append(root.env)
+        with Root() as rt:
+            rt.setattr('aa', default=1, g_dev=2)
+            RItem('a', aa=rt, mc_include=[prod])
+            with Builder(2) as bb:
+                bb.setattr('num', dev=3)
+                Shared(xx=7)
+        return rt.aa
+
+    return config
+
+
+def test_snapshot_saved_and_restored(tmp_path):
+    snapshot_file = str(tmp_path / 'config.snapshot')
+
+    calls = []
+    loaded = _snapshot_config(calls).load(snapshot_file=snapshot_file)
+    assert calls == [dev, tst, prod]
+
+    calls = []
+    restored = _snapshot_config(calls).load(snapshot_file=snapshot_file)
+    assert calls == []
+
+    for env in ef.envs.values():
+        assert replace_ids(restored(env).json(builders=True), named_as=False) == replace_ids(loaded(env).json(builders=True), named_as=False)
+        assert restored(env).mc_config_result == loaded(env).mc_config_result
+
+    cr = restored(prod)
+    assert cr.Root._post_validated
+    assert cr.Root.ritems['a'].aa is cr.Root
+    assert list(cr.Root.ritems) == ['a', 'b0', 'b1']
+    assert list(restored(dev).Root.ritems) == ['b0', 'b1', 'b2']
+    assert restored(dev).Root.ritems['b2'].Shared.contained_in == restored(dev).Root.ritems['b2']
+
+    with raises(ConfigApiException):
+        cr.Root.aa = 3
+
+
+def test_snapshot_stale(tmp_path):
+    snapshot_file = tmp_path / 'config.snapshot'
+
+    _snapshot_config([]).load(snapshot_file=str(snapshot_file))
+    data = snapshot_file.read_bytes()
+
+    # Change the key
+    snapshot_file.write_bytes(data[:20] + bytes([data[20] ^ 1]) + data[21:])
+    calls = []
+    _snapshot_config(calls).load(snapshot_file=str(snapshot_file))
+    assert calls == [dev, tst, prod]
+    assert snapshot_file.read_bytes() == data
+
+    # Corrupt data
+    snapshot_file.write_bytes(data[:-10])
+    calls = []
+    _snapshot_config(calls).load(snapshot_file=str(snapshot_file))
+    assert calls == [dev, tst, prod]
+    assert snapshot_file.read_bytes() == data
+
+
+def test_snapshot_key_env_factory():
+    ef2 = EnvFactory()
+    ef2.Env('dev')
+    ef2.Env('tst')
+    ef2.Env('prod')
+
+    @mc_config(ef2)
+    def config2(_):
+        pass
+
+    assert snapshot.snapshot_key(_snapshot_config([])) != snapshot.snapshot_key(config2)
+    assert snapshot.snapshot_key(_snapshot_config([])) == snapshot.snapshot_key(_snapshot_config([]))
+
+
+def test_snapshot_key_modules(tmp_path):
+    sources = {
+        'mc_snapshot_helper': """
+            def aa():
+                return 1
+        """,
+        'mc_snapshot_conf': """
+            from multiconf import mc_config
+            from test.snapshot_test import ef
+            from test.utils.tstclasses import ItemWithAA
+            import mc_snapshot_helper as helper
+
+            @mc_config(ef)
+            def config(_):
+                ItemWithAA(aa=helper.aa())
+        """,
+        'mc_snapshot_unrelated': """
+            from multiconf import ConfigItem
+
+            class UnrelatedItem(ConfigItem):
+                pass
+        """,
+    }
+
+    for mod_name, source in sources.items():
+        (tmp_path / (mod_name + '.py')).write_text(textwrap.dedent(source))
+
+    sys.path.insert(0, str(tmp_path))
+    importlib.invalidate_caches()
+    try:
+        config = importlib.import_module('mc_snapshot_conf').config
+        importlib.import_module('mc_snapshot_unrelated')
+        key = snapshot.snapshot_key(config)
+
+        # A module defining other items, which is not used by the config, does not change the key
+        (tmp_path / 'mc_snapshot_unrelated.py').write_text(textwrap.dedent(sources['mc_snapshot_unrelated']) + "\n# changed\n")
+        assert snapshot.snapshot_key(config) == key
+
+        # A helper module without item classes used by the config changes the key
+        (tmp_path / 'mc_snapshot_helper.py').write_text(textwrap.dedent(sources['mc_snapshot_helper']).replace('1', '2'))
+        assert snapshot.snapshot_key(config) != key
+    finally:
+        sys.path.remove(str(tmp_path))
+        for mod_name in sources:
+            sys.modules.pop(mod_name, None)
+
+
+def test_snapshot_key_item_class_modules_and_version(tmp_path, monkeypatch):
+    sources = {
+        'mc_snapshot_items': """
+            from multiconf import ConfigItem
+
+            class Item(ConfigItem):
+                pass
+        """,
+        'mc_snapshot_factory': """
+            def make():
+                # Not imported at module level, so only found through the items in the config
+                from mc_snapshot_items import Item
+                return Item()
+        """,
+        'mc_snapshot_conf': """
+            from multiconf import mc_config
+            from test.snapshot_test import ef
+            import mc_snapshot_factory as factory
+
+            @mc_config(ef, load_now=True)
+            def config(_):
+                factory.make()
+        """,
+    }
+
+    for mod_name, source in sources.items():
+        (tmp_path / (mod_name + '.py')).write_text(textwrap.dedent(source))
+
+    sys.path.insert(0, str(tmp_path))
+    importlib.invalidate_caches()
+    try:
+        config = importlib.import_module('mc_snapshot_conf').config
+        assert 'mc_snapshot_items' in snapshot.item_class_modules(config)
+        key = snapshot.snapshot_key(config)
+
+        (tmp_path / 'mc_snapshot_items.py').write_text(textwrap.dedent(sources['mc_snapshot_items']) + "\n# changed\n")
+        key2 = snapshot.snapshot_key(config)
+        assert key2 != key
+
+        monkeypatch.setattr(multiconf, '__version__', multiconf.__version__ + '.changed')
+        assert snapshot.snapshot_key(config) != key2
+    finally:
+        sys.path.remove(str(tmp_path))
+        for mod_name in sources:
+            sys.modules.pop(mod_name, None)
+
+
+def test_snapshot_restore_item_class_module_changed(tmp_path):
+    snapshot_file = tmp_path / 'config.snapshot'
+    items_file = tmp_path / 'mc_snapshot_restore_items.py'
+    items_file.write_text("from multiconf import ConfigItem\n\nclass Item(ConfigItem):\n    pass\n")
+
+    def make_config(calls):
+        @mc_config(ef)
+        def config(root):
+            # Not imported at module level, so only found through the items in the config
+            from mc_snapshot_restore_items import Item  # pylint: disable=import-outside-toplevel
+            calls.append(root.env)
+            Item()
+
+        return config
+
+    sys.path.insert(0, str(tmp_path))
+    importlib.invalidate_caches()
+    try:
+        make_config([]).load(snapshot_file=str(snapshot_file))
+
+        calls = []
+        make_config(calls).load(snapshot_file=str(snapshot_file))
+        assert calls == []
+
+        items_file.write_text(items_file.read_text() + "\n# changed\n")
+        calls = []
+        make_config(calls).load(snapshot_file=str(snapshot_file))
+        assert calls == [dev, tst, prod]
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop('mc_snapshot_restore_items', None)
+
+
+def test_snapshot_unpicklable_value(tmp_path, capsys):
+    @mc_config(ef)
+    def config(_):
+        with ItemWithAA() as it:
+            it.aa = lambda: 1
+
+    config.load(snapshot_file=str(tmp_path / 'config.snapshot'))
+    assert config(prod).ItemWithAA.aa() == 1
+
+    _sout, serr = capsys.readouterr()
+    assert serr.startswith("ConfigWarning: Cannot save snapshot of configuration:")
+    assert serr.endswith("The snapshot file '{}' was not written.\n".format(tmp_path / 'config.snapshot'))
+    assert not (tmp_path / 'config.snapshot').exists()
+
+
+def test_snapshot_not_loaded(tmp_path):
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(1)
+
+    with raises(ConfigApiException) as exinfo:
+        snapshot.save_snapshot(config, str(tmp_path / 'config.snapshot'))
+    assert str(exinfo.value) == "Only a configuration which is loaded for all envs (without 'lazy_load') can be saved as a snapshot."
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(lazy_load=True, snapshot_file=str(tmp_path / 'config.snapshot'))
+    assert str(exinfo.value) == "'snapshot_file' cannot be used with 'lazy_load'."
@@ -1,7 +1,7 @@
 # Copyright (c) 2012-2017 Lars Hupfeldt Nielsen, Hupfeldt IT
 # All rights reserved. This work is under a BSD license, see LICENSE.TXT.
 
-from typing import Optional
+from typing import Optional, Union
 
 # pylint: disable=E0611
 from pytest import raises
@@ -57,6 +57,16 @@ class ItemWithFloatAA(ItemWithAA):
         super().__init__(aa=aa)
 
 
+class ItemWithOptionalFloatAA(ItemWithAA):
+    def __init__(self, aa: Optional[float] = None):
+        super().__init__(aa=aa)
+
+
+class ItemWithFloatOrStrAA(ItemWithAA):
+    def __init__(self, aa: Union[float, str] = MC_REQUIRED):
+        super().__init__(aa=aa)
+
+
 def test_attribute_defined_with_correct_types(capsys):
     @mc_config(ef_pp_prod, load_now=True)
     def config(_):
@@ -173,3 +183,43 @@ def test_attribute_defined_with_correct_types_int_float(capsys):
     sout, serr = capsys.readouterr()
     assert not sout
     assert not serr
+
+
+def test_attribute_defined_with_correct_types_int_optional_float_and_union(capsys):
+    @mc_config(ef_pp_prod, load_now=True)
+    def config(_):
+        with ItemWithOptionalFloatAA() as cr:
+            cr.setattr('aa', prod=1.01, pp=2)
+        with ItemWithFloatOrStrAA() as cr:
+            cr.setattr('aa', prod='a', pp=3)
+
+    assert config(pp).ItemWithOptionalFloatAA.aa == 2
+    assert config(pp).ItemWithFloatOrStrAA.aa == 3
+
+    sout, serr = capsys.readouterr()
+    assert not sout
+    assert not serr
+
+
+def test_attribute_type_check_class_redefined(capsys):
+    class ItemWithAnyAA(ItemWithAA):
+        def __init__(self, aa: int = MC_REQUIRED):
+            super().__init__(aa=aa)
+
+    @mc_config(ef_pp_prod, load_now=True)
+    def config1(_):
+        ItemWithAnyAA(1)
+
+    assert config1(pp).ItemWithAnyAA.aa == 1
+
+    class ItemWithAnyAA(ItemWithAA):  # pylint: disable=function-redefined
+        def __init__(self, aa: str = MC_REQUIRED):
+            super().__init__(aa=aa)
+
+    with raises(ConfigException):
+        @mc_config(ef_pp_prod, load_now=True)
+        def config2(_):
+            ItemWithAnyAA(1)
+
+    _sout, serr = capsys.readouterr()
+    assert "ConfigError: Expected value of type: <class 'str'>, got <class 'int'> for ItemWithAnyAA.aa" in serr
@@ -0,0 +1,97 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, ConfigException, ConfigApiException, InvalidUsageException
+from multiconf.envs import EnvFactory
+
+from .utils.utils import replace_ids
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+tst = ef.Env('tst')
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+
+
+class Item(ConfigItem):
+    def __init__(self, aa=None):
+        super().__init__()
+        self.aa = aa
+
+    @property
+    def bb(self):
+        print("bb", self.env.name)
+        if self.aa is None:
+            raise Exception("No aa in " + self.env.name)
+        return self.aa * 2
+
+    @property
+    def cc(self):
+        if self.env == tst:
+            raise InvalidUsageException("Not in tst")
+        return 1
+
+
+def _conf(_):
+    with Item(aa=1) as it:
+        it.setattr('aa', tst=None, prod=None)
+        ItemWithAA(aa=2)
+
+
+def _load(conf, **kwargs):
+    @mc_config(ef)
+    def config(root):
+        conf(root)
+
+    return config.load(**kwargs)
+
+
+def test_validate_properties_parallel_same_as_sequential(capsys):
+    def conf(_):
+        with Item(aa=1) as it:
+            it.setattr('aa', prod=3)
+
+    seq = _load(conf)
+    seq_sout, seq_serr = capsys.readouterr()
+
+    par = _load(conf, validate_properties_parallel=3)
+    par_sout, par_serr = capsys.readouterr()
+
+    assert par_sout == seq_sout == "bb dev\nbb tst\nbb pp\nbb prod\n"
+    assert par_serr == seq_serr == ""
+    assert par.num_invalid_property_usage == seq.num_invalid_property_usage == 1
+    assert par(prod).Item.bb == 6
+
+
+def test_validate_properties_parallel_error_reported_in_env_order(capsys):
+    with raises(ConfigException) as exinfo:
+        _load(_conf)
+    seq_ex = exinfo.value
+    seq_serr = capsys.readouterr()[1]
+
+    with raises(ConfigException) as exinfo:
+        _load(_conf, validate_properties_parallel=2)
+    par_serr = capsys.readouterr()[1]
+
+    assert str(exinfo.value) == str(seq_ex) == "Error validating @property methods for Env('tst')"
+    assert replace_ids(par_serr) == replace_ids(seq_serr)
+    assert "No aa in tst" in par_serr
+
+
+def test_validate_properties_parallel_error_next_env(capsys):
+    with raises(ConfigException) as exinfo:
+        _load(_conf, error_next_env=True, validate_properties_parallel=4)
+
+    assert str(exinfo.value) == "The following envs had errors [Env('tst'), Env('prod')]"
+    serr = capsys.readouterr()[1]
+    assert serr.index("No aa in tst") < serr.index("Error in config for Env('tst') above.") < serr.index("No aa in prod")
+
+
+def test_validate_properties_parallel_lazy_load():
+    with raises(ConfigApiException) as exinfo:
+        _load(_conf, lazy_load=True, validate_properties_parallel=2)
+    assert str(exinfo.value) == "'validate_properties_parallel' cannot be used with 'lazy_load'."
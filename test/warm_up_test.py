@@ -0,0 +1,223 @@
+# Copyright (c) 2012 Lars Hupfeldt Nielsen, Hupfeldt IT
+# All rights reserved. This work is under a BSD license, see LICENSE.TXT.
+
+import threading
+
+from pytest import raises
+
+from multiconf import mc_config, ConfigItem, RepeatableConfigItem, ConfigException, ConfigApiException, MC_REQUIRED
+from multiconf.decorators import nested_repeatables, named_as
+from multiconf.envs import EnvFactory, MC_NO_ENV
+
+from .utils.tstclasses import ItemWithAA
+
+
+ef = EnvFactory()
+dev = ef.Env('dev')
+tst = ef.Env('tst')
+pp = ef.Env('pp')
+prod = ef.Env('prod')
+g_prod = ef.EnvGroup('g_prod', pp, prod)
+
+
+post_validated = []
+
+
+class Item(ConfigItem):
+    def __init__(self, aa=MC_REQUIRED):
+        super().__init__()
+        self.aa = aa
+
+    def mc_post_validate(self):
+        post_validated.append(self)
+
+
+def test_warm_up_priority_and_post_validate():
+    loaded = []
+
+    @mc_config(ef)
+    def config(root):
+        loaded.append(root.env)
+        with Item(aa=1) as it:
+            it.setattr('aa', prod=2)
+
+    cr = config.load(lazy_load=True, warm_up=[g_prod, tst])
+    assert not cr.loaded_future(dev).done()
+
+    assert cr(tst).Item.aa == 1
+    assert cr.loaded_future().result(timeout=10) is cr
+    assert loaded == [tst, pp, prod, dev]
+
+    assert cr.loaded_future(prod).result().Item.aa == 2
+    assert cr(dev).Item.aa == 1
+    assert post_validated == [cr(MC_NO_ENV).Item]
+
+    with raises(ConfigApiException):
+        cr(prod).Item.aa = 7
+
+
+def test_warm_up_error():
+    @mc_config(ef)
+    def config(root):
+        with ItemWithAA(aa=1) as it:
+            if root.env == pp:
+                it.aa = MC_REQUIRED
+
+    cr = config.load(lazy_load=True, warm_up=True)
+    assert cr(dev).ItemWithAA.aa == 1
+
+    with raises(ConfigException) as exinfo:
+        cr.loaded_future().result(timeout=10)
+    assert cr.loaded_future(pp).exception() is exinfo.value
+
+    # The envs after the failed env are not loaded, their futures must not block
+    ex = cr.loaded_future(prod).exception(timeout=10)
+    assert str(ex) == "The env Env('prod') was not loaded, because loading Env('pp') failed."
+    assert ex.__cause__ is exinfo.value
+
+    with raises(ConfigException):
+        cr(pp)
+    with raises(ConfigException) as exinfo:
+        cr(prod)
+    assert exinfo.value is ex
+
+
+def test_warm_up_error_next_env(capsys):
+    @mc_config(ef)
+    def config(root):
+        with ItemWithAA(aa=1) as it:
+            if root.env in (tst, pp):
+                it.aa = MC_REQUIRED
+
+    cr = config.load(lazy_load=True, warm_up=True, error_next_env=True)
+    cr(dev)
+
+    with raises(ConfigException) as exinfo:
+        cr.loaded_future().result(timeout=10)
+    assert str(exinfo.value) == "The following envs had errors [Env('tst'), Env('pp')]"
+    assert str(cr.loaded_future(tst).exception()) == "Error in config for Env('tst')."
+    assert cr.loaded_future(prod).result().ItemWithAA.aa == 1
+    assert "Error in config for Env('pp') above." in capsys.readouterr()[1]
+
+
+def test_warm_up_concurrent_read():
+    ef2 = EnvFactory()
+    envs = [ef2.Env('e' + str(ii)) for ii in range(40)]
+
+    @named_as('ritems')
+    class RItem(RepeatableConfigItem):
+        def __init__(self, mc_key):
+            super().__init__(mc_key=mc_key)
+            self.aa = None
+
+    @nested_repeatables('ritems')
+    class Root(ConfigItem):
+        pass
+
+    @mc_config(ef2)
+    def config(root):
+        with Root():
+            for ii in range(30):
+                with RItem(str(ii)) as ri:
+                    # Many distinct values, changing the representation of the values while loading
+                    ri.setattr('aa', default=0, **{env.name: (env.index * ii) % 11 for env in envs[1:]})
+            if root.env != envs[0]:
+                # New item while other threads read
+                RItem('extra_' + str(root.env.index))
+
+    cr = config.load(lazy_load=True, warm_up=True)
+    cr(envs[0])
+    errors = []
+
+    def read():
+        root = cr(envs[0]).Root
+        try:
+            while not cr.loaded_future().done():
+                assert [ri.aa for ri in root.ritems.values()] == [0] * 30
+                assert len(list(root.items())) == 1
+        except Exception as ex:  # pylint: disable=broad-except
+            errors.append(ex)
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert cr.loaded_future().result() is cr
+    assert cr(envs[3]).Root.ritems['7'].aa == (envs[3].index * 7) % 11
+    assert len(cr(envs[3]).Root.ritems) == 31
+
+
+def test_warm_up_print_while_loading():
+    ef2 = EnvFactory()
+    envs = [ef2.Env('e' + str(ii)) for ii in range(40)]
+
+    @named_as('ritems')
+    class RItem(RepeatableConfigItem):
+        def __init__(self, mc_key):
+            super().__init__(mc_key=mc_key)
+            self.aa = None
+
+        @property
+        def bb(self):
+            return self.aa
+
+    @nested_repeatables('ritems')
+    class Root(ConfigItem):
+        pass
+
+    @mc_config(ef2)
+    def config(_):
+        with Root():
+            for ii in range(30):
+                with RItem(str(ii)) as ri:
+                    ri.setattr('aa', default=0, **{env.name: ii for env in envs[1::2]})
+
+    cr = config.load(lazy_load=True, warm_up=True)
+    cr(envs[0])
+    errors = []
+
+    def output():
+        root = cr(envs[0]).Root
+        try:
+            while not cr.loaded_future().done():
+                str(root)
+                root.json()
+                root.to_dict(property_methods=True)
+        except Exception as ex:  # pylint: disable=broad-except
+            errors.append(ex)
+
+    readers = [threading.Thread(target=output) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert cr.loaded_future().result() is cr
+    assert cr(envs[1]).Root.ritems['7'].aa == 7
+
+    # Output from other threads did not re-enable setting attributes
+    with raises(ConfigApiException):
+        cr(envs[1]).Root.ritems['7'].aa = 3
+
+
+def test_warm_up_api_errors():
+    @mc_config(ef)
+    def config(_):
+        ItemWithAA(aa=1)
+
+    with raises(ConfigApiException) as exinfo:
+        config.load(warm_up=True)
+    assert str(exinfo.value) == "'warm_up' requires 'lazy_load'."
+
+    with raises(ConfigApiException) as exinfo:
+        config.loaded_future()
+    assert str(exinfo.value) == "'loaded_future' requires loading with 'warm_up'."
+
+    ef2 = EnvFactory()
+    with raises(ConfigApiException) as exinfo:
+        config.load(lazy_load=True, warm_up=[ef2.Env('dev')])
+    assert str(exinfo.value) == "The 'warm_up' env Env('dev') must be from the 'env_factory' specified for 'mc_config'."